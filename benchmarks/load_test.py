@@ -0,0 +1,226 @@
+"""アプリ全体を Textual の Pilot で動かして、ソルブを止めてから表示が更新されるまでの時間を計る
+
+一時的なデータベースに指定した数のソルブがあるセッションを作り、ヘッドレスで Sctt を起動する。
+keyboard のフックは root 権限が必要なので使わずに、 TimerWidget.Solved を送ってソルブを追加する。
+ランダムな状態のスクランブルの表を生成するプロセスが計測と重ならないよう、表は使わずに
+ランダムな回転記号のスクランブルにする。
+ソルブごとに次の区間の時間を記録して、 p50 / p95 / p99 を表示する。
+
+- update_stats: ソルブを保存してから統計の表に追加し終わるまで
+- update_scramble: 次のスクランブルを表示するまで
+- cube_net: 展開図を次のスクランブルのキューブにして描画し直すまで
+- end_to_end: Solved を送ってから画面を描画し終わるまで
+
+    uv run python benchmarks/load_test.py --solves 10000 --iterations 200 --output load.json
+"""
+
+import argparse
+import asyncio
+import datetime
+import functools
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import keyboard
+from run import SEED, fill_session, get_commit
+
+from sctt.app import Sctt, cache_last_opened_session_id
+from sctt.modules.calculate_ao import DEFAULT_AO_SIZES, normalize_ao_sizes
+from sctt.modules.database import Database
+from sctt.widgets import scramble_widget
+from sctt.widgets.cube_net_widget import CubeNetWidget
+from sctt.widgets.scramble_widget import ScrambleWidget
+from sctt.widgets.stats_widget import StatsWidget
+from sctt.widgets.timer_widget import TimerWidget
+
+STAGES: tuple[str, ...] = ("update_stats", "update_scramble", "cube_net", "end_to_end")
+# 1 回のソルブの表示が更新されるのを待つ秒数 (アプリが止まった場合に待ち続けないため)
+STAGE_TIMEOUT: float = 10.0
+
+
+class StageRecorder:
+    """オブジェクトのメソッドを包んで、区間の最初のメソッドが呼ばれてから最後のメソッドが終わるまでの時間を記録する。
+
+    区間はソルブごとに 1 回ずつ記録する。 (end を呼ぶまでに同じ区間が何度呼ばれても、最初の開始時刻と最後の終了時刻を使う)
+    """
+
+    def __init__(self) -> None:
+        self.timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+        self._starts: dict[str, float] = {}
+        self._ends: dict[str, float] = {}
+
+    def wrap(self, obj: object, name: str, stage: str) -> None:
+        method: Callable[..., Any] = getattr(obj, name)
+
+        @functools.wraps(method)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            self._starts.setdefault(stage, time.perf_counter())
+
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._ends[stage] = time.perf_counter()
+
+        setattr(obj, name, wrapper)
+
+    def is_recorded(self, stage: str) -> bool:
+        return stage in self._ends
+
+    def end(self, end_to_end: float) -> None:
+        """1 回のソルブの記録を終える。"""
+
+        for stage in STAGES[:-1]:
+            if stage in self._ends:
+                self.timings[stage].append(self._ends[stage] - self._starts[stage])
+
+        self.timings["end_to_end"].append(end_to_end)
+        self._starts.clear()
+        self._ends.clear()
+
+
+def summarize(timings: list[float]) -> dict[str, float]:
+    if len(timings) < 2:
+        return {}
+
+    percentiles: list[float] = statistics.quantiles(timings, n=100, method="inclusive")
+
+    return {
+        "count": len(timings),
+        "mean": statistics.fmean(timings),
+        "p50": percentiles[49],
+        "p95": percentiles[94],
+        "p99": percentiles[98],
+        "max": max(timings),
+    }
+
+
+async def wait_until_recorded(app: Sctt, recorder: StageRecorder, stage: str) -> None:
+    while not recorder.is_recorded(stage):
+        if app.return_code is not None:
+            raise RuntimeError(f"The app exited with return code {app.return_code}.")
+
+        await asyncio.sleep(0)
+
+
+async def run_load_test(
+    db: Database, iterations: int, size: tuple[int, int]
+) -> dict[str, list[float]]:
+    recorder: StageRecorder = StageRecorder()
+    rng: random.Random = random.Random(SEED)
+    app: Sctt = Sctt(db)
+
+    # root 権限が必要なキーボードのフックは使わない。
+    # ScrambleWidget は表のディレクトリを渡さないと、表を読み込んだり生成したりしない。
+    with (
+        mock.patch.object(keyboard, "hook"),
+        mock.patch.object(keyboard, "unhook_all"),
+        mock.patch.object(scramble_widget, "get_cache_dir", return_value=None),
+    ):
+        async with app.run_test(size=size) as pilot:
+            await pilot.pause()
+
+            timer_widget: TimerWidget = app.query_one(TimerWidget)
+            stats_widget: StatsWidget = app.query_one(StatsWidget)
+            cube_net_widget: CubeNetWidget = app.query_one(CubeNetWidget)
+
+            recorder.wrap(app, "save_solve", "update_stats")
+            recorder.wrap(stats_widget, "append_solve", "update_stats")
+            recorder.wrap(app.query_one(ScrambleWidget), "update", "update_scramble")
+            recorder.wrap(cube_net_widget, "set_cube", "cube_net")
+            recorder.wrap(cube_net_widget, "update", "cube_net")
+
+            for _ in range(iterations):
+                solve_time: float = round(rng.uniform(8, 20), 3)
+                start: float = time.perf_counter()
+                timer_widget.post_message(
+                    TimerWidget.Solved(solve_time, round(solve_time * 1e9))
+                )
+
+                # 続けて送られるメッセージ (ScrambleWidget.Changed) も処理されるまで待ってから、画面を描画する。
+                await asyncio.wait_for(
+                    wait_until_recorded(app, recorder, "cube_net"), STAGE_TIMEOUT
+                )
+
+                await pilot.pause(0)
+                recorder.end(time.perf_counter() - start)
+
+    return recorder.timings
+
+
+def format_milliseconds(seconds: float) -> str:
+    return f"{seconds * 1e3:9.3f} ms"
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "-n", "--solves", type=int, default=10_000, help="セッションのソルブの数"
+    )
+    parser.add_argument("-i", "--iterations", type=int, default=100, help="追加するソルブの数")
+    parser.add_argument("--ao", type=int, nargs="+", default=DEFAULT_AO_SIZES, metavar="N")
+    parser.add_argument("--width", type=int, default=140, help="画面の幅")
+    parser.add_argument("--height", type=int, default=45, help="画面の高さ")
+    parser.add_argument("-o", "--output", type=Path, help="結果を保存する JSON ファイル")
+    args: argparse.Namespace = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="sctt-load-test-") as directory:
+        # 最後に開いたセッションのキャッシュを、ユーザーのものと分ける。
+        os.environ["XDG_CACHE_HOME"] = directory
+        os.environ["XDG_DATA_HOME"] = directory
+
+        with Database(Path(directory) / "sctt.db", normalize_ao_sizes(args.ao)) as db:
+            session_id: int | None = db.create_session("load test")
+
+            if session_id is None:
+                raise ValueError("Failed to create a session.")
+
+            random.seed(SEED)
+            fill_session(db, session_id, args.solves)
+            cache_last_opened_session_id(session_id)
+
+            timings: dict[str, list[float]] = asyncio.run(
+                run_load_test(db, args.iterations, (args.width, args.height))
+            )
+
+    summaries: dict[str, dict[str, float]] = {
+        stage: summarize(stage_timings) for stage, stage_timings in timings.items()
+    }
+
+    print(f"{args.solves} solves, {args.iterations} iterations")
+    print(f"{'stage':<16}{'p50':>13}{'p95':>13}{'p99':>13}")
+
+    for stage, summary in summaries.items():
+        if summary:
+            print(
+                f"{stage:<16}"
+                + "".join(format_milliseconds(summary[key]) for key in ("p50", "p95", "p99"))
+            )
+
+    if args.output is not None:
+        report: dict[str, Any] = {
+            "commit": get_commit(),
+            "date": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": SEED,
+            "solves": args.solves,
+            "iterations": args.iterations,
+            "ao_sizes": list(normalize_ao_sizes(args.ao)),
+            "stages": summaries,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
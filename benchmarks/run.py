@@ -0,0 +1,430 @@
+"""sctt の処理の速さを計るベンチマーク
+
+乱数のシードを固定しているので、同じ環境なら何度実行しても同じデータで計る。
+結果を JSON で保存しておけば、別のコミットの結果と比べられる。
+
+    uv run python benchmarks/run.py --output before.json
+    uv run python benchmarks/run.py --output after.json --compare before.json
+"""
+
+import argparse
+import collections
+import datetime
+import functools
+import io
+import itertools
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from rich.console import Console
+
+from sctt.modules.calculate_ao import DEFAULT_AO_SIZES, RollingAO, calculate_ao
+from sctt.modules.database import Database
+from sctt.modules.pocket_cube import PocketCubeScrambler, generate_distance_table
+from sctt.modules.scramble import generate_scramble
+from sctt.modules.simulate import Cube, compile_scramble
+from sctt.modules.timer import Timer
+from sctt.renderables.cube_net import CubeNet
+from sctt.widgets.stats_widget import StatsWidget
+
+SEED: int = 0
+SOLVE_COUNTS: tuple[int, ...] = (1_000, 10_000, 100_000)
+CUBE_SIZES: range = range(2, 8)
+DATABASE_ROWS: int = 100_000
+# import_solves で追加するセッションの数と、セッションごとのソルブの数
+IMPORT_SESSIONS: int = 200
+IMPORT_SESSION_ROWS: int = 250
+# --compare でこの割合以上遅くなったものを遅くなったとして報告する。
+DEFAULT_THRESHOLD: float = 1.1
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    """計る関数を返す関数 (データの準備は計る時間に含めない)"""
+    number: int = 1
+    """1 回の計測で計る関数を呼ぶ回数"""
+
+
+BENCHMARKS: list[Benchmark] = []
+
+
+def benchmark(
+    name: str, number: int = 1
+) -> Callable[[Callable[[], Callable[[], object]]], Callable[[], Callable[[], object]]]:
+    def decorator(
+        setup: Callable[[], Callable[[], object]],
+    ) -> Callable[[], Callable[[], object]]:
+        BENCHMARKS.append(Benchmark(name, setup, number))
+        return setup
+
+    return decorator
+
+
+def generate_solves(count: int) -> list[tuple[float, str]]:
+    """タイムとペナルティのリストを作る。 (だいたい 90% はペナルティなし、 7% は +2、 3% は DNF)"""
+
+    rng: random.Random = random.Random(SEED)
+
+    return [
+        (round(rng.uniform(8, 20), 3), rng.choices(("", "plus_2", "dnf"), (90, 7, 3))[0])
+        for _ in range(count)
+    ]
+
+
+def setup_calculate_ao(count: int) -> Callable[[], object]:
+    solves: tuple[tuple[float, str], ...] = tuple(generate_solves(count))
+
+    def run() -> None:
+        # 前の計測の結果を使わないように、キャッシュを空にしてから計る。
+        calculate_ao.cache_clear()
+
+        for n in (5, 12):
+            for i in range(n, len(solves) + 1):
+                calculate_ao(solves[i - n : i])
+
+    return run
+
+
+def setup_rolling_ao(count: int) -> Callable[[], object]:
+    solves: list[tuple[float, str]] = generate_solves(count)
+
+    def run() -> None:
+        for n in DEFAULT_AO_SIZES:
+            RollingAO(n, solves)
+
+    return run
+
+
+def setup_format_ao(count: int) -> Callable[[], object]:
+    values: list[float] = [
+        StatsWidget._to_ao_number(value)
+        for n in DEFAULT_AO_SIZES
+        for value in RollingAO(n, generate_solves(count)).values
+    ]
+
+    def run() -> None:
+        for value in values:
+            StatsWidget._format_ao_number(value)
+
+    return run
+
+
+for count in SOLVE_COUNTS:
+    benchmark(f"calculate_ao/ao5+ao12/{count}")(functools.partial(setup_calculate_ao, count))
+    benchmark(f"rolling_ao/{'+'.join(map(str, DEFAULT_AO_SIZES))}/{count}")(
+        functools.partial(setup_rolling_ao, count)
+    )
+    benchmark(f"stats_widget/format_ao/{count}")(functools.partial(setup_format_ao, count))
+
+
+def setup_generate_scramble(size: int) -> Callable[[], object]:
+    return lambda: generate_scramble(size)
+
+
+def setup_apply_scramble(size: int) -> Callable[[], object]:
+    scrambles: Iterator[str] = itertools.cycle([generate_scramble(size) for _ in range(100)])
+    cube: Cube = Cube(size)
+
+    def run() -> None:
+        # 新しいスクランブルを 1 回だけ適用するときの時間を計るので、キャッシュは使わない。
+        compile_scramble.cache_clear()
+        cube.initialize()
+        cube.apply_scramble(next(scrambles))
+
+    return run
+
+
+def setup_cube_net(size: int) -> Callable[[], object]:
+    # CubeNet は描画した結果をキャッシュするので、キャッシュに入りきらない数のキューブを順番に描画する。
+    cube_nets: list[CubeNet] = []
+
+    for _ in range(CubeNet.LINES_CACHE_SIZE * 2):
+        cube: Cube = Cube(size)
+        cube.apply_scramble(generate_scramble(size))
+        cube_nets.append(CubeNet(cube=cube))
+
+    console: Console = Console(
+        file=io.StringIO(), width=200, color_system="truecolor", force_terminal=True
+    )
+    cube_net_iterator: Iterator[CubeNet] = itertools.cycle(cube_nets)
+
+    return lambda: list(console.render(next(cube_net_iterator)))
+
+
+for size in CUBE_SIZES:
+    benchmark(f"generate_scramble/{size}x{size}", number=100)(
+        functools.partial(setup_generate_scramble, size)
+    )
+    benchmark(f"apply_scramble/{size}x{size}", number=100)(
+        functools.partial(setup_apply_scramble, size)
+    )
+    benchmark(f"cube_net/{size}x{size}", number=32)(functools.partial(setup_cube_net, size))
+
+
+@benchmark("random_state_scramble/2x2", number=1_000)
+def setup_random_state_scramble_2x2() -> Callable[[], object]:
+    # 表の生成 (数秒) は計らない。
+    scrambler: PocketCubeScrambler = PocketCubeScrambler(generate_distance_table())
+    rng: random.Random = random.Random(SEED)
+
+    return lambda: scrambler.generate_scramble(rng)
+
+
+@benchmark("timer/format_time", number=1_000)
+def setup_format_time() -> Callable[[], object]:
+    rng: random.Random = random.Random(SEED)
+    # 1 分未満、 1 時間未満、 1 時間以上のタイム
+    seconds: Iterator[float] = itertools.cycle(
+        [rng.uniform(0, 60) for _ in range(800)]
+        + [rng.uniform(60, 3_600) for _ in range(150)]
+        + [rng.uniform(3_600, 36_000) for _ in range(50)]
+    )
+
+    return lambda: Timer.format_time(next(seconds), 2)
+
+
+@functools.cache
+def get_temporary_directory() -> tempfile.TemporaryDirectory[str]:
+    # キャッシュして終了するまで残しておき、終了するときに削除する。
+    return tempfile.TemporaryDirectory(prefix="sctt-benchmark-", ignore_cleanup_errors=True)
+
+
+def fill_session(db: Database, session_id: int, count: int) -> None:
+    """セッションに count 個のソルブを追加して、 solve_stats を作る。"""
+
+    # add_solve で 1 つずつ追加すると時間がかかるので、まとめて追加してから solve_stats を作る。
+    with sqlite3.connect(db.db_path) as conn:
+        conn.executemany(
+            "INSERT INTO solves (event, time, penalty, scramble, date, session_id, time_us) VALUES ('3x3x3', ?, ?, ?, DATETIME('now'), ?, ?);",
+            (
+                (time_us / 1_000_000, penalty, generate_scramble(3), session_id, time_us)
+                for time_us, penalty in (
+                    (round(time * 1_000_000), penalty)
+                    for time, penalty in generate_solves(count)
+                )
+            ),
+        )
+
+    conn.close()
+    db.rebuild_solve_stats(session_id)
+
+
+@functools.cache
+def create_database() -> tuple[Database, int]:
+    """DATABASE_ROWS 個のソルブがあるセッションを持つデータベースを作る。"""
+
+    db: Database = Database(Path(get_temporary_directory().name) / "sctt.db")
+    session_id: int | None = db.create_session("benchmark")
+
+    if session_id is None:
+        raise ValueError("Failed to create a session.")
+
+    fill_session(db, session_id, DATABASE_ROWS)
+    return db, session_id
+
+
+@benchmark(f"database/rebuild_solve_stats/{DATABASE_ROWS}")
+def setup_rebuild_solve_stats() -> Callable[[], object]:
+    db, session_id = create_database()
+    return lambda: db.rebuild_solve_stats(session_id)
+
+
+@benchmark(f"database/add_solve/{DATABASE_ROWS}", number=100)
+def setup_add_solve() -> Callable[[], object]:
+    db, session_id = create_database()
+    rng: random.Random = random.Random(SEED)
+    scramble: str = generate_scramble(3)
+
+    return lambda: db.add_solve("3x3x3", rng.uniform(8, 20), scramble, session_id)
+
+
+@benchmark(f"database/import_solves/{IMPORT_SESSIONS}x{IMPORT_SESSION_ROWS}")
+def setup_import_solves() -> Callable[[], object]:
+    solves: list[tuple[str, str, int, str, str, str]] = [
+        (f"session {i}", "3x3x3", round(time * 1_000_000), penalty, "", "2024-01-01 00:00:00")
+        for i in range(IMPORT_SESSIONS)
+        for time, penalty in generate_solves(IMPORT_SESSION_ROWS)
+    ]
+    # 毎回新しいデータベースに追加する。
+    paths: Iterator[Path] = (
+        Path(get_temporary_directory().name) / f"import-{i}.db" for i in itertools.count()
+    )
+
+    def import_solves() -> None:
+        with Database(next(paths)) as db:
+            db.import_solves(solves)
+
+    return import_solves
+
+
+@benchmark(f"database/get_solve_stats/{DATABASE_ROWS}")
+def setup_get_solve_stats() -> Callable[[], object]:
+    db, session_id = create_database()
+    return lambda: db.get_solve_stats(session_id)
+
+
+@benchmark(f"database/get_all_solves/{DATABASE_ROWS}")
+def setup_get_all_solves() -> Callable[[], object]:
+    db, session_id = create_database()
+    return lambda: db.get_all_solves(session_id)
+
+
+@benchmark(f"database/get_solves_page/{DATABASE_ROWS}", number=100)
+def setup_get_solves_page() -> Callable[[], object]:
+    db, session_id = create_database()
+    return lambda: db.get_solves_page(session_id)
+
+
+@benchmark(f"database/iter_solves/{DATABASE_ROWS}")
+def setup_iter_solves() -> Callable[[], object]:
+    db, session_id = create_database()
+    return lambda: collections.deque(db.iter_solves(session_id), maxlen=0)
+
+
+@benchmark(f"database/get_session_summaries/{DATABASE_ROWS}")
+def setup_get_session_summaries() -> Callable[[], object]:
+    db, _ = create_database()
+    return db.get_session_summaries
+
+
+def measure(bench: Benchmark, repeat: int) -> dict[str, Any]:
+    """bench を repeat 回計って、 1 回の呼び出しにかかった秒数の統計を返す。"""
+
+    random.seed(SEED)
+    function: Callable[[], object] = bench.setup()
+    times: list[float] = []
+
+    for _ in range(repeat):
+        start: int = time.perf_counter_ns()
+
+        for _ in range(bench.number):
+            function()
+
+        times.append((time.perf_counter_ns() - start) / 1e9 / bench.number)
+
+    return {
+        "name": bench.name,
+        "number": bench.number,
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "stdev": statistics.stdev(times) if repeat > 1 else 0.0,
+    }
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=Path(__file__).parent,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if seconds * scale >= 1:
+            return f"{seconds * scale:.3f} {unit}"
+
+    return f"{seconds * 1e9:.1f} ns"
+
+
+def compare(results: list[dict[str, Any]], base: dict[str, Any], threshold: float) -> bool:
+    """base の結果と中央値を比べて表示する。 threshold 倍以上遅くなったものがあれば True を返す。"""
+
+    base_results: dict[str, dict[str, Any]] = {
+        result["name"]: result for result in base["benchmarks"]
+    }
+    regressed: bool = False
+
+    print(f"\ncompared with {base.get('commit') or 'unknown commit'}")
+
+    for result in results:
+        if (base_result := base_results.get(result["name"])) is None:
+            continue
+
+        ratio: float = result["median"] / base_result["median"]
+        mark: str = ""
+
+        if ratio >= threshold:
+            mark = "  slower"
+            regressed = True
+        elif ratio <= 1 / threshold:
+            mark = "  faster"
+
+        print(f"{result['name']:<44} {ratio:>7.2f}x{mark}")
+
+    return regressed
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-o", "--output", type=Path, help="結果を保存する JSON ファイル")
+    parser.add_argument(
+        "-k", "--filter", default="", help="名前にこの文字列を含むものだけを計る"
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="計測する回数")
+    parser.add_argument("--compare", type=Path, help="比べる結果の JSON ファイル")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="--compare でこの倍率以上遅くなったら終了コード 1 で終了する",
+    )
+    parser.add_argument("--list", action="store_true", help="ベンチマークの名前を表示する")
+    args: argparse.Namespace = parser.parse_args()
+
+    benchmarks: list[Benchmark] = [bench for bench in BENCHMARKS if args.filter in bench.name]
+
+    if args.list:
+        print("\n".join(bench.name for bench in benchmarks))
+        return
+
+    results: list[dict[str, Any]] = []
+
+    for bench in benchmarks:
+        result: dict[str, Any] = measure(bench, args.repeat)
+        results.append(result)
+        print(
+            f"{bench.name:<44} {format_seconds(result['median']):>12}"
+            f" (min {format_seconds(result['min'])})",
+            flush=True,
+        )
+
+    report: dict[str, Any] = {
+        "commit": get_commit(),
+        "date": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": SEED,
+        "benchmarks": results,
+    }
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare is not None:
+        base: dict[str, Any] = json.loads(args.compare.read_text(encoding="utf-8"))
+
+        if compare(results, base, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
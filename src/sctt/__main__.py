@@ -1,15 +1,198 @@
+import argparse
+import importlib.util
+import secrets
+from pathlib import Path
+from typing import Any
+
 from sctt.app import Sctt
 from sctt.locations import get_database_file
+from sctt.modules.calculate_ao import DEFAULT_AO_SIZES, normalize_ao_sizes
 from sctt.modules.database import Database
+from sctt.modules.exporter import ExportFormat, export_session
+from sctt.modules.importer import ImportFormat, ImportReport, import_file
+from sctt.modules.scramble import CUBE_SIZE_VARIANT, write_scrambles
+
+
+def parse_args() -> argparse.Namespace:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="sctt", description="SpeedCubeTimer-TUI (sctt)"
+    )
+    parser.add_argument(
+        "--ao",
+        type=int,
+        nargs="+",
+        default=DEFAULT_AO_SIZES,
+        metavar="N",
+        help="ao N columns shown in the statistics table. "
+        f"(default: {' '.join(map(str, DEFAULT_AO_SIZES))})",
+    )
+    parser.add_argument(
+        "--rebuild-stats",
+        action="store_true",
+        help="rebuild the saved ao N statistics of all sessions, remove the ones not in --ao and exit.",
+    )
+    subparsers: argparse._SubParsersAction[argparse.ArgumentParser] = parser.add_subparsers(
+        dest="command"
+    )
+    import_parser: argparse.ArgumentParser = subparsers.add_parser(
+        "import",
+        help="import solves from a csTimer, Twisty Timer or CSV export into new sessions.",
+    )
+    import_parser.add_argument("file", type=Path, help="the exported file to import.")
+    import_parser.add_argument(
+        "--format",
+        type=ImportFormat,
+        choices=list(ImportFormat),
+        help="the format of the file. (default: detected from the file)",
+    )
+    import_parser.add_argument(
+        "--session",
+        metavar="NAME",
+        help="import all solves into one new session with this name.",
+    )
+    export_parser: argparse.ArgumentParser = subparsers.add_parser(
+        "export", help="export the solves of a session to CSV, JSON Lines or a columnar file."
+    )
+    export_parser.add_argument("session", help="the ID or name of the session to export.")
+    export_parser.add_argument(
+        "file", type=Path, help="the file to write. (.csv, .jsonl or .scol)"
+    )
+    export_parser.add_argument(
+        "--format",
+        type=ExportFormat,
+        choices=list(ExportFormat),
+        help="the format of the file. (default: detected from the file extension)",
+    )
+    scrambles_parser: argparse.ArgumentParser = subparsers.add_parser(
+        "scrambles", help="generate scrambles into a file, one per line. (requires numpy)"
+    )
+    scrambles_parser.add_argument(
+        "size", type=int, choices=CUBE_SIZE_VARIANT, help="the cube size. (e.g. 3 for 3x3x3)"
+    )
+    scrambles_parser.add_argument("count", type=int, help="the number of scrambles.")
+    scrambles_parser.add_argument("file", type=Path, help="the file to write.")
+    scrambles_parser.add_argument(
+        "--seed",
+        type=int,
+        help="the random seed. The same seed always generates the same scrambles. "
+        "(default: a random seed, printed after writing)",
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.command == "scrambles" and args.count < 0:
+        parser.error("count must not be negative")
+
+    try:
+        args.ao = normalize_ao_sizes(args.ao)
+    except ValueError as e:
+        parser.error(str(e))
+
+    return args
+
+
+def import_solves(
+    db: Database, path: Path, import_format: ImportFormat | None, session_name: str | None
+) -> None:
+    try:
+        report: ImportReport = import_file(db, path, import_format, session_name)
+    except (OSError, ValueError) as e:
+        print(f"Failed to import {path}: {e}")
+        return
+
+    print(f"Imported {report.total} solves into {len(report.session_ids)} sessions.")
+
+    for name, count in report.counts.items():
+        print(f"  {name}: {count}")
+
+    if report.skipped:
+        print(f"Skipped {report.skipped} invalid solves.")
+
+        for error in report.errors:
+            print(f"  {error}")
+
+
+def find_session_id(db: Database, session: str) -> int:
+    """ID か名前からセッションの ID を返す。見つからない場合や、同じ名前が複数ある場合は ValueError を送出する。"""
+
+    sessions: list[tuple[Any, ...]] = db.get_all_sessions()
+
+    if session.isdecimal() and any(id == int(session) for id, *_ in sessions):
+        return int(session)
+
+    match [id for id, name, *_ in sessions if name == session]:
+        case [id]:
+            return id
+        case []:
+            raise ValueError(f"Session not found: {session}")
+        case ids:
+            raise ValueError(
+                f"There are {len(ids)} sessions named {session}. Use the ID instead."
+            )
+
+
+def export_solves(
+    db: Database, session: str, path: Path, export_format: ExportFormat | None
+) -> None:
+    try:
+        count: int = export_session(db, find_session_id(db, session), path, export_format)
+    except (OSError, ValueError) as e:
+        print(f"Failed to export {session}: {e}")
+        return
+
+    print(f"Exported {count} solves to {path}.")
+
+
+def save_scrambles(path: Path, cube_size: int, count: int, seed: int | None) -> None:
+    if importlib.util.find_spec("numpy") is None:
+        print("numpy is required to generate scrambles. (pip install 'sctt[numpy]')")
+        return
+
+    # 後から同じスクランブルを生成して確かめられるように、シードは必ず表示する。
+    if seed is None:
+        seed = secrets.randbits(64)
+
+    try:
+        written: int = write_scrambles(path, cube_size, count, seed)
+    except (OSError, ValueError) as e:
+        print(f"Failed to write {path}: {e}")
+        return
+
+    print(
+        f"Wrote {written} {cube_size}x{cube_size}x{cube_size} scrambles to {path}. (seed: {seed})"
+    )
 
 
 def main() -> None:
+    args: argparse.Namespace = parse_args()
+
+    # スクランブルの生成にはデータベースを使わない。
+    if args.command == "scrambles":
+        save_scrambles(args.file, args.size, args.count, args.seed)
+        return
+
     try:
-        db: Database = Database(get_database_file())
+        # import と export は統計を表示しないので、 --ao の ao N を計算しない。
+        # (--rebuild-stats は全て作り直すので、ここで計算しても無駄になる)
+        db: Database = Database(
+            get_database_file(),
+            args.ao,
+            sync_stats=args.command is None and not args.rebuild_stats,
+        )
     except PermissionError:
         print("You must be root to use sctt on linux.\n\nsudo -E $(which sctt)")
     else:
-        Sctt(db).run()
+        try:
+            if args.command == "import":
+                import_solves(db, args.file, args.format, args.session)
+            elif args.command == "export":
+                export_solves(db, args.session, args.file, args.format)
+            elif args.rebuild_stats:
+                db.rebuild_solve_stats()
+                print("Rebuilt the statistics of all sessions.")
+            else:
+                Sctt(db).run()
+        finally:
+            db.close()
 
 
 if __name__ == "__main__":
@@ -34,6 +34,7 @@ def cache_last_opened_session_id(session_id: int) -> None:
 class SolveBuffer:
     event: str
     time: float
+    time_us: int | None = None
     penalty: str
     scramble: str
     session_id: int
@@ -74,7 +75,7 @@ class Sctt(App[None]):
     def compose(self) -> ComposeResult:
         with AppBody():
             with Horizontal():
-                yield StatsWidget()
+                yield StatsWidget(self.db.ao_sizes)
                 with Vertical():
                     yield ScrambleWidget()
                     yield TimerWidget()
@@ -90,9 +91,7 @@ class Sctt(App[None]):
             self.solve_buffer.session_id, session_name, _, _ = self.db.get_last_session()
 
         stats_widget.border_title = session_name
-        stats_widget.update(
-            self.db.get_solve_ids_and_times_and_penalties(self.solve_buffer.session_id)
-        )
+        stats_widget.update_stats(self.db.get_solve_stats(self.solve_buffer.session_id))
 
     def on_app_focus(self) -> None:
         self.query_one(TimerWidget).start_key_detection()
@@ -108,17 +107,20 @@ class Sctt(App[None]):
     def update_scramble(self) -> None:
         self.query_one(ScrambleWidget).update()
 
-    def save_solve(self) -> None:
+    def save_solve(self) -> int:
         solve_id: int | None = self.db.add_solve(
             self.solve_buffer.event,
             self.solve_buffer.time,
             self.solve_buffer.scramble,
             self.solve_buffer.session_id,
+            time_us=self.solve_buffer.time_us,
         )
 
         if solve_id is None:
             raise ValueError("Failed to add solve to database.")
 
+        return solve_id
+
     def reset_solve_buffer(self) -> None:
         self.solve_buffer = SolveBuffer()
         self.solve_buffer.session_id = get_cached_last_opened_session_id()
@@ -126,10 +128,14 @@ class Sctt(App[None]):
     @on(TimerWidget.Solved)
     def update_stats(self, message: TimerWidget.Solved) -> None:
         self.solve_buffer.time = message.time_
-        self.save_solve()
-        self.query_one(StatsWidget).update(
-            self.db.get_solve_ids_and_times_and_penalties(self.solve_buffer.session_id)
+        self.solve_buffer.time_us = (
+            None if message.time_ns is None else message.time_ns // 1000
         )
+        session_id: int = self.solve_buffer.session_id
+        solve_id: int = self.save_solve()
+        # データベースに保存された値で表示するので、保存したソルブを読み直す。
+        _, _, time, penalty, *_ = self.db.get_solve(session_id, solve_id)
+        self.query_one(StatsWidget).append_solve(solve_id, time, penalty)
         self.reset_solve_buffer()
 
     @on(ScrambleWidget.Changed)
@@ -138,8 +144,12 @@ class Sctt(App[None]):
         cube_net_widget: CubeNetWidget = self.query_one(CubeNetWidget)
 
         try:
-            cube_net_widget.cube_size = scramble_widget.get_cube_size(message.solve_event)
-            cube_net_widget.apply_scramble(message.scramble)
+            if message.cube is not None:
+                cube_net_widget.set_cube(message.cube)
+            else:
+                cube_net_widget.cube_size = scramble_widget.get_cube_size(message.solve_event)
+                cube_net_widget.apply_scramble(message.scramble)
+
             cube_net_widget.update()
         except ValueError:
             self.notify("[#ff0000][b]Error[/][/]\nInvalid scramble", severity="error")
@@ -158,9 +168,7 @@ class Sctt(App[None]):
 
         if penalty != saved_penalty:
             self.db.change_solve_penalty(penalty, solve_id)
-            self.query_one(StatsWidget).update(
-                self.db.get_solve_ids_and_times_and_penalties(self.solve_buffer.session_id)
-            )
+            self.query_one(StatsWidget).update_penalty(solve_id, penalty)
 
     def show_solve_screen(self, solve_id: int) -> None:
         def handle_result(result: str | None) -> None:
@@ -175,9 +183,7 @@ class Sctt(App[None]):
                     session_id: int = self.solve_buffer.session_id
 
                     self.db.remove_solve(solve_id, session_id)
-                    self.query_one(StatsWidget).update(
-                        self.db.get_solve_ids_and_times_and_penalties(session_id)
-                    )
+                    self.query_one(StatsWidget).remove_solve(solve_id)
                 case _:
                     pass
 
@@ -210,10 +216,9 @@ class Sctt(App[None]):
 
         if column_key == "time":
             self.show_solve_screen(solve_id)
-        elif column_key == "ao5" and cell_value != Text("-"):
-            self.show_ao_screen(cell_value, 5, solve_id)
-        elif column_key == "ao12" and cell_value != Text("-"):
-            self.show_ao_screen(cell_value, 12, solve_id)
+        elif column_key.value is not None and cell_value != Text("-"):
+            if (n := StatsWidget.parse_ao_column_key(column_key.value)) is not None:
+                self.show_ao_screen(cell_value, n, solve_id)
 
     def action_show_session_manager(self) -> None:
         def handle_result(result: int | None) -> None:
@@ -226,7 +231,7 @@ class Sctt(App[None]):
                 stats_widget: StatsWidget = self.query_one(StatsWidget)
                 session_name: str = self.db.get_session(session_id)[1]
                 stats_widget.border_title = session_name
-                stats_widget.update(self.db.get_solve_ids_and_times_and_penalties(session_id))
+                stats_widget.update_stats(self.db.get_solve_stats(session_id))
                 self.update_scramble()
 
         self.push_screen(
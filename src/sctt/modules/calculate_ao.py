@@ -1,6 +1,7 @@
+import bisect
 import functools
 import math
-from collections.abc import Iterator, Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from typing import Literal
 
 
@@ -58,3 +59,268 @@ def calculate_ao(solves: Sequence[tuple[float, str]]) -> float | Literal["DNF"]:
 
     times: Iterator[float] = (time for time, _ in trimmed_solves)
     return sum(times) / len(trimmed_solves)
+
+
+type AOValue = float | Literal["DNF"]
+
+DEFAULT_AO_SIZES: tuple[int, ...] = (5, 12, 50, 100)
+
+# この大きさ以上のウィンドウは、トリムした範囲のタイムの和を差分で更新する。
+# (小さいウィンドウは calculate_ao と同じ順序で足し合わせて、同じ値になるようにする)
+_RUNNING_SUM_THRESHOLD: int = 50
+
+
+def normalize_ao_sizes(ao_sizes: Iterable[int]) -> tuple[int, ...]:
+    """ao N の N のリストを重複を取り除いて昇順に並べる。
+
+    N が 2 以下の ao は計算できないので ValueError を投げる。
+    """
+
+    result: tuple[int, ...] = tuple(sorted(set(ao_sizes)))
+
+    if not result:
+        raise ValueError("At least one ao size is required.")
+
+    for n in result:
+        if n <= 2:
+            raise ValueError(f"Invalid ao size: {n}. It must be greater than 2.")
+
+    return result
+
+
+def _sort_key(solve: tuple[float, str]) -> tuple[int, float]:
+    """_sort_solves と同じ順序になるソート用のキーを返す。
+
+    dnf のソルブは有効なソルブよりも必ず後ろに並ぶように、先頭の要素を 1 にする。
+    """
+
+    time, penalty = solve
+
+    match penalty:
+        case "":
+            return (0, time)
+        case "plus_2":
+            return (0, time + 2)
+        case "dnf":
+            return (1, time)
+        case _:
+            raise ValueError(f"Invalid penalty: {penalty}")
+
+
+def _is_same_ao_value(a: AOValue, b: AOValue) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+
+    return a == b
+
+
+class SortedWindow:
+    """ペナルティを考慮した順序でソルブを保持するソート済みの多重集合 (ao N のウィンドウ)
+
+    ソルブの追加と削除は二分探索で位置を求めるので O(log n) で済む。
+    n が大きいときは、トリムした範囲 (keys[trim_count : len - trim_count]) のタイムの和を
+    境界を跨いだ要素だけで更新するので、ao N の計算も O(1) で済む。
+    """
+
+    def __init__(self, n: int, solves: Iterable[tuple[float, str]] = ()) -> None:
+        """
+        Args:
+            n: ao N の N (ウィンドウの大きさ)
+            solves: タイムとペナルティを要素に持つタプルのイテラブル
+        """
+
+        self.n: int = n
+        self._trim_count: int = int(math.ceil(n * 0.05))
+        self._keys: list[tuple[int, float]] = sorted(map(_sort_key, solves))
+        # None のときは ao() で計算し直す。
+        self._trimmed_sum: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, solve: tuple[float, str]) -> None:
+        key: tuple[int, float] = _sort_key(solve)
+        keys: list[tuple[int, float]] = self._keys
+        t: int = self._trim_count
+        length: int = len(keys)
+        i: int = bisect.bisect_right(keys, key)
+
+        if self._trimmed_sum is not None and length >= t * 2:
+            if i < t:
+                self._trimmed_sum += keys[t - 1][1]
+            elif i <= length - t:
+                self._trimmed_sum += key[1]
+            else:
+                self._trimmed_sum += keys[length - t][1]
+        else:
+            self._trimmed_sum = None
+
+        keys.insert(i, key)
+
+    def remove(self, solve: tuple[float, str]) -> None:
+        key: tuple[int, float] = _sort_key(solve)
+        keys: list[tuple[int, float]] = self._keys
+        t: int = self._trim_count
+        length: int = len(keys)
+        i: int = bisect.bisect_left(keys, key)
+
+        if i == length or keys[i] != key:
+            raise ValueError(f"Solve not in window: {solve}")
+
+        if self._trimmed_sum is not None and length - 1 >= t * 2:
+            if i < t:
+                self._trimmed_sum -= keys[t][1]
+            elif i < length - t:
+                self._trimmed_sum -= key[1]
+            else:
+                self._trimmed_sum -= keys[length - t - 1][1]
+        else:
+            self._trimmed_sum = None
+
+        del keys[i]
+
+    def ao(self) -> AOValue:
+        """ウィンドウ内のソルブの Average of N を計算する。 (calculate_ao と同じ結果を返す)"""
+
+        if (n := len(self._keys)) <= 2:
+            return float("nan")
+
+        trim_count: int = int(math.ceil(n * 0.05))
+
+        # ペナルティを考慮してソートしたあと、トリムするから最も遅いソルブのペナルティが dnf なら ao N の値も DNF になる。
+        if self._keys[n - trim_count - 1][0] == 1:
+            return "DNF"
+
+        if n == self.n and self.n >= _RUNNING_SUM_THRESHOLD:
+            if self._trimmed_sum is None:
+                self._trimmed_sum = math.fsum(
+                    time for _, time in self._keys[trim_count : n - trim_count]
+                )
+
+            return self._trimmed_sum / (n - trim_count * 2)
+
+        times: Iterator[float] = (time for _, time in self._keys[trim_count : n - trim_count])
+        return sum(times) / (n - trim_count * 2)
+
+
+class RollingAO:
+    """セッション内の全てのソルブの ao N を保持して、差分だけを再計算するクラス
+
+    values[i] は i 番目のソルブで終わる ao N の値。ソルブが N 個に満たない位置は nan になる。
+    append, remove, change_penalty は値が変化したインデックスと新しい値の辞書を返す。
+    (インデックスは操作後のもの)
+    """
+
+    def __init__(
+        self,
+        n: int,
+        solves: Iterable[tuple[float, str]] = (),
+        values: Iterable[AOValue] | None = None,
+    ) -> None:
+        """
+        Args:
+            n: ao N の N
+            solves: タイムとペナルティを要素に持つタプルのイテラブル
+            values: 計算済みの ao N の値。指定した場合は再計算しない。
+        """
+
+        if n <= 0:
+            raise ValueError(f"Invalid ao size: {n}")
+
+        self.n: int = n
+        self._solves: list[tuple[float, str]] = list(solves)
+        self._values: list[AOValue]
+
+        if values is None:
+            self._values = self._compute_values(0, len(self._solves))
+        else:
+            self._values = list(values)
+
+            if len(self._values) != len(self._solves):
+                raise ValueError("The number of values must match the number of solves.")
+
+        # 末尾の N 個のソルブのウィンドウ。append のときに必要になるまで作らない。
+        self._tail_window: SortedWindow | None = None
+
+    def __len__(self) -> int:
+        return len(self._solves)
+
+    @property
+    def values(self) -> Sequence[AOValue]:
+        return self._values
+
+    def _compute_values(self, start: int, stop: int) -> list[AOValue]:
+        """start から stop - 1 番目までのソルブで終わる ao N をウィンドウをスライドさせながら計算する。"""
+
+        n: int = self.n
+
+        result: list[AOValue] = []
+        window: SortedWindow = SortedWindow(n, self._solves[max(start - n + 1, 0) : start])
+
+        for i in range(start, stop):
+            if len(window) == n:
+                window.remove(self._solves[i - n])
+
+            window.add(self._solves[i])
+
+            result.append(window.ao() if len(window) == n else float("nan"))
+
+        return result
+
+    def _recompute(self, start: int, stop: int) -> dict[int, AOValue]:
+        """start から stop - 1 番目までのソルブで終わる ao N を再計算して、変化した値を返す。"""
+
+        stop = min(stop, len(self._solves))
+        changed: dict[int, AOValue] = {}
+
+        for i, value in enumerate(self._compute_values(start, stop), start=start):
+            if not _is_same_ao_value(value, self._values[i]):
+                changed[i] = value
+                self._values[i] = value
+
+        return changed
+
+    def append(self, solve: tuple[float, str]) -> dict[int, AOValue]:
+        n: int = self.n
+
+        if self._tail_window is None:
+            self._tail_window = SortedWindow(
+                n, self._solves[max(len(self._solves) - n + 1, 0) :]
+            )
+
+        if len(self._tail_window) == n:
+            self._tail_window.remove(self._solves[-n])
+
+        self._solves.append(solve)
+        self._tail_window.add(solve)
+
+        value: AOValue = (
+            self._tail_window.ao() if len(self._tail_window) == n else float("nan")
+        )
+        self._values.append(value)
+
+        return {len(self._solves) - 1: value}
+
+    def remove(self, index: int) -> dict[int, AOValue]:
+        """index 番目のソルブを削除する。
+
+        削除したソルブを含んでいたウィンドウは、後続の N - 1 個のソルブで終わるものだけが変化する。
+        """
+
+        del self._solves[index]
+        del self._values[index]
+        self._tail_window = None
+
+        return self._recompute(index, index + self.n - 1)
+
+    def change_penalty(self, index: int, penalty: str) -> dict[int, AOValue]:
+        """index 番目のソルブのペナルティを変更する。
+
+        変更したソルブを含むウィンドウは、そのソルブから N 個のソルブで終わるものだけが変化する。
+        """
+
+        time, _ = self._solves[index]
+        self._solves[index] = (time, penalty)
+        self._tail_window = None
+
+        return self._recompute(index, index + self.n)
@@ -1,6 +1,18 @@
+import itertools
+import math
 import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Self
+
+from sctt.modules.calculate_ao import (
+    DEFAULT_AO_SIZES,
+    AOValue,
+    RollingAO,
+    normalize_ao_sizes,
+)
 
 
 class SessionNotFoundError(Exception):
@@ -30,20 +42,116 @@ class Database:
     |  1 | 3x3x3 | 12.34 |   dnf   |  L2 F U B2 D F2 U' F2 U' L2 B2 L2 U' B' L' B F L F U2 | 2024-12-22 13:50:31 |      1     |
     |  2 | 2x2x2 |  5.67 |         |                 R F2 R' U F' U F2 R2 U'               | 2024-12-22 14:10:58 |      2     |
     |  3 | 3x3x3 | 11.82 |  plus_2 | U2 B2 L R U2 R U2 F2 L B2 U2 B2 D' B' D B' R2 D2 F2 U | 2024-12-22 17:15:12 |      1     |
+
+    ### solve_stats table
+
+    ソルブごとの ao N の値を保存しておくテーブル。 add_solve, remove_solve, change_solve_penalty で
+    影響を受けるウィンドウだけを再計算して更新する。
+    DNF は inf で保存する。ソルブが N 個に満たない位置の行は存在しない。
+
+    | solve_id | session_id | n  |  ao   |
+    |:--------:|:----------:|:--:|:-----:|
+    |     3    |      1     |  3 |  inf  |
+
+    ### solve_stats_sizes table
+
+    solve_stats に保存されている ao N の N のリスト。
+
+    ## 接続
+
+    接続は 1 つだけ開いて使い回す。 (close で閉じる)
+    WAL モードにして、コミットのたびに fsync しないようにしている。
     """
 
-    def __init__(self, db_path: Path) -> None:
+    # プリペアドステートメントのキャッシュ数 (sqlite3 のデフォルトは 128)
+    CACHED_STATEMENTS: int = 256
+    # メモリマップド I/O で読み込む最大サイズ (256 MiB)
+    MMAP_SIZE: int = 256 * 1024 * 1024
+    # import_solves で 1 回の executemany に渡すソルブの数
+    IMPORT_BATCH_SIZE: int = 50_000
+    # iter_solves と get_solves_page で 1 回に取得するソルブの数
+    PAGE_SIZE: int = 1_000
+    # iter_solve_batches で 1 回の fetchmany で取り出すソルブの数
+    EXPORT_BATCH_SIZE: int = 10_000
+    # よく使うクエリがテーブル全体をスキャンしないようにするインデックス (名前と作成するクエリ)
+    INDEXES: dict[str, str] = {
+        # セッションごとのソルブの取得、件数、平均をインデックスだけで済ませる。
+        "solves_session_id_id_time_penalty_idx": """
+        CREATE INDEX IF NOT EXISTS solves_session_id_id_time_penalty_idx
+        ON solves (session_id, id, time, penalty);
+        """,
+        # 最後に更新されたセッションの取得
+        "sessions_updated_at_idx": """
+        CREATE INDEX IF NOT EXISTS sessions_updated_at_idx
+        ON sessions (updated_at);
+        """,
+        # セッションごとの solve_stats の削除と集計
+        "solve_stats_session_id_n_idx": """
+        CREATE INDEX IF NOT EXISTS solve_stats_session_id_n_idx
+        ON solve_stats (session_id, n, ao);
+        """,
+    }
+
+    def __init__(
+        self,
+        db_path: Path,
+        ao_sizes: Iterable[int] = DEFAULT_AO_SIZES,
+        sync_stats: bool = True,
+    ) -> None:
+        """
+        Args:
+            db_path: データベースファイルのパス
+            ao_sizes: solve_stats に保存する ao N の N のリスト
+            sync_stats: False の場合は、 ao_sizes のうち solve_stats に保存されていない ao N を
+                開いたときに計算しない。 (統計を表示しない import や export のコマンドで使う)
+        """
+
         self.db_path: Path = db_path
+        self.ao_sizes: tuple[int, ...] = normalize_ao_sizes(ao_sizes)
+        # solve_stats に保存されていて、ソルブを変更したときに更新する ao N の N (昇順)
+        # ao_sizes に無いものも残しておいて、別の --ao で開いたときに使えるようにする。
+        self._stats_sizes: tuple[int, ...] = ()
+        self._lock: threading.RLock = threading.RLock()
+        self._conn: sqlite3.Connection = self._connect()
 
         self._create_sessions_table()
         self._create_solves_table()
-
-    def _get_connection(self) -> sqlite3.Connection:
-        conn: sqlite3.Connection = sqlite3.connect(self.db_path)
+        self._add_solves_time_us_column()
+        self._create_solve_stats_tables()
+        self._create_indexes()
+        self._load_solve_stats_sizes()
+
+        if sync_stats:
+            self._sync_solve_stats_sizes()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=self.CACHED_STATEMENTS
+        )
         conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
 
         return conn
 
+    @contextmanager
+    def _get_connection(self) -> Iterator[sqlite3.Connection]:
+        """接続を返す。 with ブロックを抜けるとコミットされる。 (例外が発生した場合はロールバックされる)"""
+
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
     def _create_sessions_table(self) -> None:
         query: str = """
         CREATE TABLE IF NOT EXISTS sessions (
@@ -67,6 +175,7 @@ class Database:
             scramble TEXT NOT NULL,
             date TEXT NOT NULL,
             session_id INTEGER NOT NULL,
+            time_us INTEGER,
             FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE
         );
         """
@@ -74,6 +183,240 @@ class Database:
         with self._get_connection() as conn:
             conn.execute(query)
 
+    def _add_solves_time_us_column(self) -> None:
+        """time_us 列が無い既存のデータベースに列を追加して、 time から埋める。
+
+        time_us はタイムを整数のマイクロ秒で持つ列。 (time は time_us を秒にした値)
+        """
+
+        with self._get_connection() as conn:
+            columns: set[str] = {
+                column[1] for column in conn.execute("PRAGMA table_info(solves);").fetchall()
+            }
+
+            if "time_us" not in columns:
+                conn.execute("ALTER TABLE solves ADD COLUMN time_us INTEGER;")
+                conn.execute(
+                    "UPDATE solves SET time_us = CAST(ROUND(time * 1000000) AS INTEGER);"
+                )
+
+    def _create_solve_stats_tables(self) -> None:
+        solve_stats_query: str = """
+        CREATE TABLE IF NOT EXISTS solve_stats (
+            solve_id INTEGER NOT NULL,
+            session_id INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            ao REAL NOT NULL,
+            PRIMARY KEY (solve_id, n),
+            FOREIGN KEY (solve_id) REFERENCES solves (id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        """
+        solve_stats_sizes_query: str = """
+        CREATE TABLE IF NOT EXISTS solve_stats_sizes (
+            n INTEGER PRIMARY KEY
+        );
+        """
+
+        with self._get_connection() as conn:
+            conn.execute(solve_stats_query)
+            conn.execute(solve_stats_sizes_query)
+
+    def _create_indexes(self) -> None:
+        """INDEXES のインデックスを作る。
+
+        既存のデータベースには、開いたときに作られる。
+        """
+
+        with self._get_connection() as conn:
+            for query in self.INDEXES.values():
+                conn.execute(query)
+
+    def _load_solve_stats_sizes(self) -> None:
+        with self._get_connection() as conn:
+            self._stats_sizes = tuple(
+                sorted(
+                    n for (n,) in conn.execute("SELECT n FROM solve_stats_sizes;").fetchall()
+                )
+            )
+
+    def _sync_solve_stats_sizes(self) -> None:
+        """self.ao_sizes のうち、 solve_stats に保存されていない ao N を全てのセッションで計算する。
+
+        使われなくなった ao N は削除しない。 (削除するのは rebuild_solve_stats で全て作り直すときだけ)
+        """
+
+        if added_sizes := set(self.ao_sizes) - set(self._stats_sizes):
+            self.rebuild_solve_stats(ao_sizes=added_sizes)
+
+    @staticmethod
+    def _encode_ao_value(ao_value: AOValue) -> float:
+        return math.inf if ao_value == "DNF" else float(ao_value)
+
+    @staticmethod
+    def _decode_ao_value(ao: float | None) -> AOValue:
+        if ao is None:
+            return float("nan")
+        elif math.isinf(ao):
+            return "DNF"
+        else:
+            return ao
+
+    def _write_solve_stats(
+        self,
+        session_id: int,
+        n: int,
+        solve_ids: Iterable[int],
+        ao_values: Iterable[AOValue],
+        conn: sqlite3.Connection,
+    ) -> None:
+        insert_query: str = "INSERT OR REPLACE INTO solve_stats (solve_id, session_id, n, ao) VALUES (?, ?, ?, ?);"
+        delete_query: str = "DELETE FROM solve_stats WHERE solve_id = ? AND n = ?;"
+        rows: list[tuple[int, int, int, float]] = []
+        missing_rows: list[tuple[int, int]] = []
+
+        for solve_id, ao_value in zip(solve_ids, ao_values, strict=True):
+            if isinstance(ao_value, float) and math.isnan(ao_value):
+                missing_rows.append((solve_id, n))
+            else:
+                rows.append((solve_id, session_id, n, self._encode_ao_value(ao_value)))
+
+        conn.executemany(insert_query, rows)
+        conn.executemany(delete_query, missing_rows)
+
+    def _update_solve_stats(
+        self, session_id: int, solve_id: int, conn: sqlite3.Connection
+    ) -> None:
+        """solve_id 以降の N 個のソルブで終わる ao N を再計算する。
+
+        ソルブを追加、削除したときやペナルティを変更したときに、影響を受けるウィンドウだけを更新する。
+        (削除したときは、削除したソルブの次のソルブの ID を指定する)
+        """
+
+        if not self._stats_sizes:
+            return
+
+        max_n: int = self._stats_sizes[-1]
+        before_query: str = """
+        SELECT id, time, penalty
+        FROM solves
+        WHERE session_id = ? AND id < ?
+        ORDER BY id DESC
+        LIMIT ?;
+        """
+        after_query: str = """
+        SELECT id, time, penalty
+        FROM solves
+        WHERE session_id = ? AND id >= ?
+        ORDER BY id
+        LIMIT ?;
+        """
+
+        before: list[tuple[Any, ...]] = conn.execute(
+            before_query, (session_id, solve_id, max_n - 1)
+        ).fetchall()
+        after: list[tuple[Any, ...]] = conn.execute(
+            after_query, (session_id, solve_id, max_n)
+        ).fetchall()
+        solves: list[tuple[Any, ...]] = before[::-1] + after
+        start: int = len(before)
+
+        for n in self._stats_sizes:
+            lo: int = max(start - n + 1, 0)
+            window: list[tuple[Any, ...]] = solves[lo : start + n]
+            ao_values: list[AOValue] = list(
+                RollingAO(n, ((time, penalty) for _, time, penalty in window)).values
+            )
+            self._write_solve_stats(
+                session_id,
+                n,
+                (id for id, _, _ in window[start - lo :]),
+                ao_values[start - lo :],
+                conn,
+            )
+
+    def _rebuild_session_solve_stats(
+        self,
+        session_id: int,
+        sizes: Iterable[int],
+        conn: sqlite3.Connection,
+        is_new_session: bool = False,
+    ) -> None:
+        """
+        Args:
+            is_new_session: True の場合は、まだ solve_stats に行が無いので古い行を削除しない。
+        """
+
+        solves: list[tuple[Any, ...]] = conn.execute(
+            "SELECT id, time, penalty FROM solves WHERE session_id = ? ORDER BY id;",
+            (session_id,),
+        ).fetchall()
+        times_and_penalties: list[tuple[float, str]] = [
+            (time, penalty) for _, time, penalty in solves
+        ]
+
+        for n in sizes:
+            if not is_new_session:
+                conn.execute(
+                    "DELETE FROM solve_stats WHERE session_id = ? AND n = ?;",
+                    (session_id, n),
+                )
+
+            self._write_solve_stats(
+                session_id,
+                n,
+                (solve_id for solve_id, _, _ in solves),
+                RollingAO(n, times_and_penalties).values,
+                conn,
+            )
+
+    def rebuild_solve_stats(
+        self, session_id: int | None = None, ao_sizes: Iterable[int] | None = None
+    ) -> None:
+        """solve_stats を作り直す。
+
+        全てのセッションを ao_sizes を指定せずに作り直す場合 (--rebuild-stats) は、
+        self.ao_sizes に無い ao N を solve_stats から削除する。
+
+        Args:
+            session_id: 作り直すセッションの ID。None の場合は全てのセッション。
+            ao_sizes: 作り直す ao N の N のリスト。None の場合は、全てのセッションなら self.ao_sizes、
+                1 つのセッションなら保存されている全ての ao N。
+        """
+
+        is_full_rebuild: bool = session_id is None and ao_sizes is None
+        sizes: tuple[int, ...]
+
+        if ao_sizes is not None:
+            sizes = normalize_ao_sizes(ao_sizes)
+        elif is_full_rebuild:
+            sizes = self.ao_sizes
+        else:
+            sizes = self._stats_sizes
+
+        with self._get_connection() as conn:
+            session_ids: list[int] = (
+                [id for (id,) in conn.execute("SELECT id FROM sessions;").fetchall()]
+                if session_id is None
+                else [session_id]
+            )
+
+            for id in session_ids:
+                self._rebuild_session_solve_stats(id, sizes, conn)
+
+            if is_full_rebuild:
+                for n in set(self._stats_sizes) - set(sizes):
+                    conn.execute("DELETE FROM solve_stats WHERE n = ?;", (n,))
+                    conn.execute("DELETE FROM solve_stats_sizes WHERE n = ?;", (n,))
+
+            conn.executemany(
+                "INSERT OR IGNORE INTO solve_stats_sizes (n) VALUES (?);",
+                ((n,) for n in sizes),
+            )
+
+        self._stats_sizes = (
+            sizes if is_full_rebuild else tuple(sorted({*self._stats_sizes, *sizes}))
+        )
+
     def create_session(self, name: str) -> int | None:
         query: str = "INSERT INTO sessions (name, created_at, updated_at) VALUES (?, DATETIME('now'), DATETIME('now'));"
 
@@ -92,25 +435,125 @@ class Database:
         conn.execute(query, (session_id,))
 
     def add_solve(
-        self, event: str, time: float, scramble: str, session_id: int, penalty: str = ""
+        self,
+        event: str,
+        time: float,
+        scramble: str,
+        session_id: int,
+        penalty: str = "",
+        time_us: int | None = None,
     ) -> int | None:
-        query: str = "INSERT INTO solves (event, time, penalty, scramble, date, session_id) VALUES (?, ?, ?, ?, DATETIME('now'), ?);"
+        """ソルブを追加して、その id を返す。
+
+        Args:
+            time: タイム (秒)。 time_us を指定した場合は無視される。
+            time_us: 整数のマイクロ秒のタイム。タイマーで計った値をそのまま保存する場合に指定する。
+        """
+
+        query: str = "INSERT INTO solves (event, time, penalty, scramble, date, session_id, time_us) VALUES (?, ?, ?, ?, DATETIME('now'), ?, ?);"
+
+        if time_us is None:
+            time_us = round(time * 1_000_000)
 
         with self._get_connection() as conn:
             solve_id: int | None = conn.execute(
-                query, (event, time, penalty, scramble, session_id)
+                query, (event, time_us / 1_000_000, penalty, scramble, session_id, time_us)
             ).lastrowid
             self._update_session_updated_at(session_id, conn)
 
+            if solve_id is not None:
+                self._update_solve_stats(session_id, solve_id, conn)
+
             return solve_id
 
+    def import_solves(
+        self,
+        solves: Iterable[tuple[str, str, int, str, str, str]],
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ) -> dict[str, int]:
+        """ソルブをまとめて追加して、セッション名とそのセッションの ID の辞書を返す。
+
+        セッション名ごとに新しいセッションを作って、そこにソルブを追加する。
+        solves は batch_size 個ずつ取り出して executemany で追加するので、すべてをメモリに読み込まない。
+        追加は 1 つのトランザクションで行い、途中で例外が発生した場合は何も追加されない。
+        追加している間は solves と solve_stats のインデックスを削除しておき、最後に 1 回だけ作り直す。
+        solve_stats も最後に、追加したセッションの分を同じトランザクションで 1 回だけ作る。
+        (セッションごとにソルブを読むので、 solves のインデックスはその前に作り直す)
+
+        Args:
+            solves: (セッション名, event, time_us, penalty, scramble, date) のイテラブル。
+                date は UTC の "YYYY-MM-DD HH:MM:SS"
+            batch_size: 1 回の executemany で追加するソルブの数
+        """
+
+        session_query: str = "INSERT INTO sessions (name, created_at, updated_at) VALUES (?, DATETIME('now'), DATETIME('now'));"
+        insert_query: str = "INSERT INTO solves (event, time, penalty, scramble, date, session_id, time_us) VALUES (?, ?, ?, ?, ?, ?, ?);"
+        session_ids: dict[str, int] = {}
+        iterator: Iterator[tuple[str, str, int, str, str, str]] = iter(solves)
+
+        try:
+            with self._get_connection() as conn:
+                # インデックスの削除もロールバックされるように、最初からトランザクションを始める。
+                conn.execute("BEGIN;")
+                for name in (
+                    "solves_session_id_id_time_penalty_idx",
+                    "solve_stats_session_id_n_idx",
+                ):
+                    conn.execute(f"DROP INDEX IF EXISTS {name};")
+
+                while batch := list(itertools.islice(iterator, batch_size)):
+                    rows: list[tuple[str, float, str, str, str, int, int]] = []
+
+                    for name, event, time_us, penalty, scramble, date in batch:
+                        if (session_id := session_ids.get(name)) is None:
+                            if (
+                                session_id := conn.execute(session_query, (name,)).lastrowid
+                            ) is None:
+                                raise ValueError("Failed to create session.")
+
+                            session_ids[name] = session_id
+
+                        rows.append(
+                            (
+                                event,
+                                time_us / 1_000_000,
+                                penalty,
+                                scramble,
+                                date,
+                                session_id,
+                                time_us,
+                            )
+                        )
+
+                    conn.executemany(insert_query, rows)
+
+                # インデックスが無いと、セッションごとに solves 全体をスキャンしてしまう。
+                conn.execute(self.INDEXES["solves_session_id_id_time_penalty_idx"])
+
+                for session_id in session_ids.values():
+                    self._rebuild_session_solve_stats(
+                        session_id, self._stats_sizes, conn, is_new_session=True
+                    )
+        finally:
+            self._create_indexes()
+
+        return session_ids
+
     def remove_solve(self, solve_id: int, session_id: int) -> None:
         query: str = "DELETE FROM solves WHERE id = ?;"
+        next_solve_query: str = "SELECT MIN(id) FROM solves WHERE session_id = ? AND id > ?;"
 
         with self._get_connection() as conn:
             conn.execute(query, (solve_id,))
             self._update_session_updated_at(session_id, conn)
 
+            next_solve_id: int | None = conn.execute(
+                next_solve_query, (session_id, solve_id)
+            ).fetchone()[0]
+
+            if next_solve_id is not None:
+                self._update_solve_stats(session_id, next_solve_id, conn)
+
     def get_session(self, id: int) -> tuple[Any, ...]:
         """Return a tuple of (id, name, created_at, updated_at)."""
 
@@ -136,7 +579,7 @@ class Database:
     def get_solve(self, session_id: int, solve_id: int) -> tuple[Any, ...]:
         """Return a tuple of (id, event, time, penalty, scramble, date, session_id)."""
 
-        query: str = "SELECT * FROM solves WHERE session_id = ? AND id = ?;"
+        query: str = "SELECT id, event, time, penalty, scramble, date, session_id FROM solves WHERE session_id = ? AND id = ?;"
 
         with self._get_connection() as conn:
             if (solve := conn.execute(query, (session_id, solve_id)).fetchone()) is not None:
@@ -151,11 +594,101 @@ class Database:
             return conn.execute(query).fetchall()
 
     def get_all_solves(self, session_id: int) -> list[tuple[Any, ...]]:
-        query: str = "SELECT * FROM solves WHERE session_id = ?;"
+        query: str = "SELECT id, event, time, penalty, scramble, date, session_id FROM solves WHERE session_id = ?;"
 
         with self._get_connection() as conn:
             return conn.execute(query, (session_id,)).fetchall()
 
+    def iter_solves(
+        self, session_id: int, after_id: int | None = None, batch: int = PAGE_SIZE
+    ) -> Iterator[tuple[Any, ...]]:
+        """Yield tuples of (id, event, time, penalty, scramble, date, session_id) in id order.
+
+        after_id より後のソルブを batch 個ずつキーセットページネーション (id > 最後の id) で取得する。
+        1 回の取得ごとに接続を返すので、反復している間も他の操作を妨げない。
+
+        Args:
+            session_id: セッションの ID
+            after_id: この ID より後のソルブを返す。None の場合は最初のソルブから。
+            batch: 1 回のクエリで取得するソルブの数
+        """
+
+        query: str = """
+        SELECT id, event, time, penalty, scramble, date, session_id
+        FROM solves
+        WHERE session_id = ? AND id > ?
+        ORDER BY id
+        LIMIT ?;
+        """
+        last_id: int = 0 if after_id is None else after_id
+
+        while True:
+            with self._get_connection() as conn:
+                rows: list[tuple[Any, ...]] = conn.execute(
+                    query, (session_id, last_id, batch)
+                ).fetchall()
+
+            yield from rows
+
+            if len(rows) < batch:
+                return
+
+            last_id = rows[-1][0]
+
+    def get_solves_page(
+        self, session_id: int, before_id: int | None = None, limit: int = PAGE_SIZE
+    ) -> list[tuple[Any, ...]]:
+        """Return up to limit tuples of (id, event, time, penalty, scramble, date, session_id) before before_id, newest first.
+
+        before_id が None の場合は最新のソルブから。次のページは最後のソルブの ID を before_id に指定して取得する。
+        """
+
+        query: str = """
+        SELECT id, event, time, penalty, scramble, date, session_id
+        FROM solves
+        WHERE session_id = ? AND id < ?
+        ORDER BY id DESC
+        LIMIT ?;
+        """
+
+        # SQLite の INTEGER の最大値
+        upper_id: int = 2**63 - 1 if before_id is None else before_id
+
+        with self._get_connection() as conn:
+            return conn.execute(query, (session_id, upper_id, limit)).fetchall()
+
+    def iter_solve_batches(
+        self, session_id: int, batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[list[tuple[Any, ...]]]:
+        """Yield lists of (id, event, time_us, penalty, scramble, local_date, timestamp) in id order.
+
+        local_date はローカル時間の "YYYY-MM-DD HH:MM:SS"、 timestamp は UNIX 時間 (秒)。
+        日時の変換は SQLite がまとめて行う。
+
+        読み込み専用の接続を別に開いて fetchmany で batch_size 個ずつ取り出すので、
+        セッションのソルブをすべてメモリに読み込まず、反復している間も他の操作を妨げない。
+        (WAL モードなので、反復を始めた時点のソルブが返される)
+        """
+
+        query: str = """
+        SELECT id, event, time_us, penalty, scramble,
+            DATETIME(date, 'localtime'), CAST(STRFTIME('%s', date) AS INTEGER)
+        FROM solves
+        WHERE session_id = ?
+        ORDER BY id;
+        """
+        conn: sqlite3.Connection = sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True
+        )
+
+        try:
+            cursor: sqlite3.Cursor = conn.execute(query, (session_id,))
+
+            while batch := cursor.fetchmany(batch_size):
+                yield batch
+        finally:
+            conn.close()
+
     def get_solve_ids_and_times_and_penalties(self, session_id: int) -> list[Any]:
         query: str = "SELECT id, time, penalty FROM solves WHERE session_id = ?;"
 
@@ -174,18 +707,116 @@ class Database:
         with self._get_connection() as conn:
             return conn.execute(query, (session_id, solve_id, n)).fetchall()
 
+    def get_solve_stats(self, session_id: int) -> list[tuple[Any, ...]]:
+        """Return a list of (id, time, penalty, *ao_values) in the order of self.ao_sizes.
+
+        ao_values are float, "DNF", or nan when there are not enough solves.
+        """
+
+        joins: str = "\n".join(
+            f"LEFT JOIN solve_stats AS ao_{i} ON ao_{i}.solve_id = s.id AND ao_{i}.n = ?"
+            for i in range(len(self.ao_sizes))
+        )
+        columns: str = "".join(f", ao_{i}.ao" for i in range(len(self.ao_sizes)))
+        query: str = f"""
+        SELECT s.id, s.time, s.penalty{columns}
+        FROM solves AS s
+        {joins}
+        WHERE s.session_id = ?
+        ORDER BY s.id;
+        """
+
+        with self._get_connection() as conn:
+            rows: list[tuple[Any, ...]] = conn.execute(
+                query, (*self.ao_sizes, session_id)
+            ).fetchall()
+
+        return [(*row[:3], *map(self._decode_ao_value, row[3:])) for row in rows]
+
     def change_solve_penalty(self, penalty: str, solve_id: int) -> None:
         query: str = "UPDATE solves SET penalty = ? WHERE id = ?;"
+        session_id_query: str = "SELECT session_id FROM solves WHERE id = ?;"
 
         with self._get_connection() as conn:
             conn.execute(query, (penalty, solve_id))
 
+            if (row := conn.execute(session_id_query, (solve_id,)).fetchone()) is not None:
+                self._update_solve_stats(row[0], solve_id, conn)
+
     def rename_session(self, name: str, session_id: int) -> None:
         query: str = "UPDATE sessions SET name = ? WHERE id = ?;"
 
         with self._get_connection() as conn:
             conn.execute(query, (name, session_id))
 
+    def _get_session_summaries(
+        self, session_id: int | None, conn: sqlite3.Connection
+    ) -> list[tuple[Any, ...]]:
+        where: str = "" if session_id is None else "WHERE se.id = :session_id"
+        query: str = f"""
+        SELECT
+            se.id,
+            se.name,
+            COUNT(so.id),
+            AVG(so.time),
+            MIN(
+                CASE so.penalty
+                    WHEN '' THEN so.time
+                    WHEN 'plus_2' THEN so.time + 2
+                END
+            ),
+            (
+                SELECT MIN(st.ao)
+                FROM solve_stats AS st
+                WHERE st.session_id = se.id AND st.n = :n
+            ),
+            se.created_at,
+            se.updated_at
+        FROM sessions AS se
+        LEFT JOIN solves AS so ON so.session_id = se.id
+        {where}
+        GROUP BY se.id
+        ORDER BY se.id;
+        """
+
+        rows: list[tuple[Any, ...]] = conn.execute(
+            query, {"session_id": session_id, "n": self.ao_sizes[0]}
+        ).fetchall()
+
+        return [
+            (
+                id,
+                name,
+                solve_count,
+                float("nan") if mean is None else mean,
+                float("nan") if best is None else best,
+                self._decode_ao_value(best_ao),
+                created_at,
+                updated_at,
+            )
+            for id, name, solve_count, mean, best, best_ao, created_at, updated_at in rows
+        ]
+
+    def get_session_summaries(self) -> list[tuple[Any, ...]]:
+        """Return a list of (id, name, solve_count, mean, best, best_ao, created_at, updated_at).
+
+        mean is the mean of the times without penalties (same as calculate_solve_mean).
+        best is the best single excluding DNF, and best_ao is the best ao N of the smallest N
+        in self.ao_sizes ("DNF" if all of them are DNF). They are nan if there are no values.
+        """
+
+        with self._get_connection() as conn:
+            return self._get_session_summaries(None, conn)
+
+    def get_session_summary(self, session_id: int) -> tuple[Any, ...]:
+        """Return a tuple of (id, name, solve_count, mean, best, best_ao, created_at, updated_at)."""
+
+        with self._get_connection() as conn:
+            if summaries := self._get_session_summaries(session_id, conn):
+                return summaries[0]
+            else:
+                raise SessionNotFoundError
+
     def get_solve_count(self, session_id: int) -> int:
         query: str = "SELECT COUNT(*) FROM solves WHERE session_id = ?;"
 
@@ -0,0 +1,227 @@
+import csv
+import itertools
+import json
+import struct
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, BinaryIO, NamedTuple
+
+from sctt.modules.database import Database
+
+PENALTIES: tuple[str, ...] = ("", "plus_2", "dnf")
+# CSV では sctt import の CSV と同じ書き方にする。
+CSV_PENALTIES: dict[str, str] = {"": "", "plus_2": "+2", "dnf": "DNF"}
+CSV_HEADER: tuple[str, ...] = ("id", "event", "time", "penalty", "scramble", "date")
+
+COLUMNAR_MAGIC: bytes = b"SCTTCOL1"
+_UINT32: struct.Struct = struct.Struct("<I")
+
+
+class ExportFormat(StrEnum):
+    CSV = "csv"
+    JSONL = "jsonl"
+    COLUMNAR = "columnar"
+
+
+EXPORT_SUFFIXES: dict[str, ExportFormat] = {
+    ".csv": ExportFormat.CSV,
+    ".jsonl": ExportFormat.JSONL,
+    ".scol": ExportFormat.COLUMNAR,
+}
+
+
+class ColumnBatch(NamedTuple):
+    """列形式のファイルの 1 つの行グループ"""
+
+    ids: array[int]
+    times_us: array[int]
+    timestamps: array[int]
+    """UNIX 時間 (秒)"""
+    penalties: list[str]
+    events: list[str]
+    scrambles: list[str]
+
+
+def write_csv(batches: Iterable[list[tuple[Any, ...]]], path: Path) -> int:
+    """タイムは秒、日時はローカル時間で書く。 (sctt import でそのままインポートできる)"""
+
+    count: int = 0
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+
+        for batch in batches:
+            count += len(batch)
+            writer.writerows(
+                (id, event, time_us / 1_000_000, CSV_PENALTIES[penalty], scramble, date)
+                for id, event, time_us, penalty, scramble, date, _ in batch
+            )
+
+    return count
+
+
+def write_jsonl(batches: Iterable[list[tuple[Any, ...]]], path: Path) -> int:
+    """1 行に 1 つのソルブを JSON で書く。タイムは整数のマイクロ秒、日時はローカル時間。"""
+
+    encode: Callable[[Any], str] = json.JSONEncoder(ensure_ascii=False).encode
+    count: int = 0
+
+    with open(path, "w", encoding="utf-8") as file:
+        for batch in batches:
+            count += len(batch)
+            file.writelines(
+                encode(
+                    {
+                        "id": id,
+                        "event": event,
+                        "time_us": time_us,
+                        "penalty": penalty,
+                        "scramble": scramble,
+                        "date": date,
+                    }
+                )
+                + "\n"
+                for id, event, time_us, penalty, scramble, date, _ in batch
+            )
+
+    return count
+
+
+def _write_array(file: BinaryIO, values: array[Any]) -> None:
+    # ファイルの中ではリトルエンディアンにする。
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    values.tofile(file)
+
+
+def _write_strings(file: BinaryIO, strings: Iterable[str]) -> None:
+    encoded: list[bytes] = [string.encode() for string in strings]
+    offsets: array[int] = array("I", [0])
+    offset: int = 0
+
+    for data in encoded:
+        offset += len(data)
+        offsets.append(offset)
+
+    _write_array(file, offsets)
+    file.write(b"".join(encoded))
+
+
+def write_columnar(batches: Iterable[list[tuple[Any, ...]]], path: Path) -> int:
+    """列ごとに型のあるバイナリ形式で書く。
+
+    ファイルは COLUMNAR_MAGIC の後に行グループが続き、行数 0 の行グループで終わる。
+    行グループはリトルエンディアンで次の順に並ぶ。 (n は行数)
+
+    - n: uint32
+    - id, time_us, timestamp (UNIX 時間の秒): それぞれ int64 × n
+    - penalty: uint8 × n (PENALTIES のインデックス)
+    - event, scramble: それぞれ uint32 × (n + 1) の UTF-8 のオフセットと、その後に文字列のバイト列
+    """
+
+    penalty_indexes: dict[str, int] = {penalty: i for i, penalty in enumerate(PENALTIES)}
+    count: int = 0
+
+    with open(path, "wb") as file:
+        file.write(COLUMNAR_MAGIC)
+
+        for batch in batches:
+            count += len(batch)
+            ids, events, times_us, penalties, scrambles, _, timestamps = zip(
+                *batch, strict=True
+            )
+            file.write(_UINT32.pack(len(batch)))
+            _write_array(file, array("q", ids))
+            _write_array(file, array("q", times_us))
+            _write_array(file, array("q", timestamps))
+            _write_array(file, array("B", [penalty_indexes[penalty] for penalty in penalties]))
+            _write_strings(file, events)
+            _write_strings(file, scrambles)
+
+        file.write(_UINT32.pack(0))
+
+    return count
+
+
+def _read_array(file: BinaryIO, typecode: str, count: int) -> array[Any]:
+    values: array[Any] = array(typecode)
+    values.fromfile(file, count)
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values
+
+
+def _read_strings(file: BinaryIO, count: int) -> list[str]:
+    offsets: array[int] = _read_array(file, "I", count + 1)
+    data: bytes = file.read(offsets[-1])
+    return [data[start:end].decode() for start, end in itertools.pairwise(offsets)]
+
+
+def read_columnar(path: Path) -> Iterator[ColumnBatch]:
+    """write_columnar で書いたファイルを行グループごとに読み込む。"""
+
+    with open(path, "rb") as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"{path.name} is not a sctt columnar file.")
+
+        while count := _UINT32.unpack(file.read(_UINT32.size))[0]:
+            yield ColumnBatch(
+                ids=_read_array(file, "q", count),
+                times_us=_read_array(file, "q", count),
+                timestamps=_read_array(file, "q", count),
+                penalties=[PENALTIES[i] for i in _read_array(file, "B", count)],
+                events=_read_strings(file, count),
+                scrambles=_read_strings(file, count),
+            )
+
+
+WRITERS: dict[ExportFormat, Callable[[Iterable[list[tuple[Any, ...]]], Path], int]] = {
+    ExportFormat.CSV: write_csv,
+    ExportFormat.JSONL: write_jsonl,
+    ExportFormat.COLUMNAR: write_columnar,
+}
+
+
+def detect_format(path: Path) -> ExportFormat:
+    if (export_format := EXPORT_SUFFIXES.get(path.suffix.lower())) is None:
+        raise ValueError(
+            f"Cannot detect the format from {path.name}. "
+            f"(use {', '.join(EXPORT_SUFFIXES)} or specify the format)"
+        )
+
+    return export_format
+
+
+def export_session(
+    db: Database,
+    session_id: int,
+    path: Path,
+    export_format: ExportFormat | None = None,
+    batch_size: int = Database.EXPORT_BATCH_SIZE,
+) -> int:
+    """セッションのソルブをファイルに書き出して、書き出したソルブの数を返す。
+
+    ソルブは batch_size 個ずつ読み込んで書き出すので、セッションの大きさによらずメモリの使用量は一定。
+
+    Args:
+        db: データベース
+        session_id: 書き出すセッションの ID
+        path: 書き出すファイル
+        export_format: ファイルの形式。 None の場合はファイルの拡張子から判断する。
+        batch_size: 1 回に読み込むソルブの数
+    """
+
+    writer: Callable[[Iterable[list[tuple[Any, ...]]], Path], int] = WRITERS[
+        export_format or detect_format(path)
+    ]
+    # 存在しないセッションの場合は SessionNotFoundError を送出する。
+    db.get_session(session_id)
+
+    return writer(db.iter_solve_batches(session_id, batch_size), path)
@@ -0,0 +1,93 @@
+from pathlib import Path
+
+from textual_pyfiglet.pyfiglet import figlet_format
+
+
+class GlyphRenderer:
+    """figlet のフォントの文字をあらかじめ描画しておき、それをつなげて文字列を描画するクラス
+
+    figlet_format は呼ぶたびにすべての文字を組み直すので、タイマーのように 1 秒に何十回も描画すると重い。
+    文字を重ねずに並べるフォント (mono_banner など) なら、描画済みの文字の各行をつなげるだけで同じ結果になる。
+    """
+
+    DEFAULT_CHARACTERS: str = "0123456789:."
+
+    def __init__(self, font: Path, characters: str = DEFAULT_CHARACTERS) -> None:
+        """
+        Args:
+            font: figlet のフォントのパス (拡張子 .flf は付けない)
+            characters: あらかじめ描画しておく文字
+        """
+
+        self.font: Path = font
+        self._glyphs: dict[str, tuple[str, ...]] = {
+            character: tuple(self._figlet_format(character).splitlines())
+            for character in characters
+        }
+        self._widths: dict[str, int] = {
+            character: max(map(len, glyph), default=0)
+            for character, glyph in self._glyphs.items()
+        }
+        self._last_render: tuple[str, int, str] | None = None
+
+        # 文字を重ねて並べるフォントだと、つなげただけでは figlet_format と結果が変わってしまう。
+        width: int = sum(self._widths.values()) + 1
+
+        if self._render(characters, width) != self._figlet_format(characters, width):
+            raise ValueError(f"{font.name} overlaps characters and cannot be pre-rendered.")
+
+    def _figlet_format(self, text: str, width: int = 1_000) -> str:
+        return str(figlet_format(text, str(self.font), width=width))
+
+    def _render(self, text: str, width: int) -> str:
+        # figlet_format と同じように、文字を足すと幅が width 以上になるところで折り返す。
+        # (1 文字で width 以上になる場合は、その文字だけの行にする)
+        lines: list[list[str]] = []
+        line: list[str] = []
+        line_width: int = 0
+
+        for character in text:
+            character_width: int = self._widths[character]
+
+            if line and line_width + character_width >= width:
+                lines.append(line)
+                line = []
+                line_width = 0
+
+            line.append(character)
+            line_width += character_width
+
+        if line:
+            lines.append(line)
+
+        return "".join(
+            "".join(
+                "".join(row) + "\n"
+                for row in zip(*(self._glyphs[character] for character in line), strict=True)
+            )
+            for line in lines
+        )
+
+    def render(self, text: str, width: int) -> str:
+        """text を figlet_format(text, font, width=width) と同じように描画した文字列を返す。
+
+        前回と同じ text と width なら前回の結果をそのまま返す。
+        あらかじめ描画していない文字がある場合は figlet_format で描画する。
+
+        Args:
+            text: 描画する文字列
+            width: 折り返す幅
+        """
+
+        if self._last_render is not None and self._last_render[:2] == (text, width):
+            return self._last_render[2]
+
+        rendered: str
+
+        if all(character in self._glyphs for character in text):
+            rendered = self._render(text, width)
+        else:
+            rendered = self._figlet_format(text, width)
+
+        self._last_render = (text, width, rendered)
+        return rendered
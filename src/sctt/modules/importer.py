@@ -0,0 +1,505 @@
+import csv
+import datetime
+import functools
+import io
+import json
+import re
+import time
+from collections.abc import Callable, Iterable, Iterator
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, NamedTuple, TextIO
+
+from sctt.modules.database import Database
+from sctt.modules.simulate import ListCube
+from sctt.modules.timer import Timer
+
+# ScrambleWidget の SolveEvent と同じイベント
+EVENTS: tuple[str, ...] = (
+    "3x3x3",
+    "2x2x2",
+    "4x4x4",
+    "5x5x5",
+    "6x6x6",
+    "7x7x7",
+    "3x3x3 oh",
+    "3x3x3 fm",
+    "3x3x3 bld",
+    "4x4x4 bld",
+    "5x5x5 bld",
+)
+PENALTIES: tuple[str, ...] = ("", "plus_2", "dnf")
+
+# csTimer のスクランブルの種類 (scrType) とイベントの対応
+CSTIMER_EVENTS: dict[str, str] = {
+    "333": "3x3x3",
+    "222so": "2x2x2",
+    "444wca": "4x4x4",
+    "555wca": "5x5x5",
+    "666wca": "6x6x6",
+    "777wca": "7x7x7",
+    "333oh": "3x3x3 oh",
+    "333fm": "3x3x3 fm",
+    "333ni": "3x3x3 bld",
+    "444bld": "4x4x4 bld",
+    "555bld": "5x5x5 bld",
+}
+# csTimer のペナルティ (ミリ秒) とペナルティの対応
+CSTIMER_PENALTIES: dict[int, str] = {0: "", 2000: "plus_2", -1: "dnf"}
+
+# Twisty Timer のパズルとイベントの対応
+TWISTY_TIMER_EVENTS: dict[str, str] = {
+    "222": "2x2x2",
+    "333": "3x3x3",
+    "444": "4x4x4",
+    "555": "5x5x5",
+    "666": "6x6x6",
+    "777": "7x7x7",
+}
+TWISTY_TIMER_HEADER: tuple[str, ...] = (
+    "Puzzle",
+    "Category",
+    "Time(millis)",
+    "Date(millis)",
+    "Scramble",
+    "Penalty",
+    "Comment",
+)
+TWISTY_TIMER_PENALTIES: dict[str, str] = {"0": "", "1": "plus_2", "2": "dnf"}
+
+# CSV のペナルティの書き方とペナルティの対応 (小文字にして比べる)
+CSV_PENALTIES: dict[str, str] = {
+    "": "",
+    "ok": "",
+    "+2": "plus_2",
+    "plus_2": "plus_2",
+    "dnf": "dnf",
+}
+
+
+class ImportFormat(StrEnum):
+    CSTIMER = "cstimer"
+    TWISTY_TIMER = "twistytimer"
+    CSV = "csv"
+
+
+class ImportedSolve(NamedTuple):
+    """Database.import_solves に渡すソルブ"""
+
+    session: str
+    event: str
+    time_us: int
+    penalty: str
+    scramble: str
+    date: str
+    """UTC の "YYYY-MM-DD HH:MM:SS" """
+
+
+class ImportReport:
+    """インポートしたソルブの数と、読み飛ばしたソルブの理由"""
+
+    # 記録しておく読み飛ばした理由の数
+    MAX_ERRORS: int = 20
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+        """セッション名とインポートしたソルブの数"""
+        self.session_ids: dict[str, int] = {}
+        """セッション名と作ったセッションの ID"""
+        self.skipped: int = 0
+        self.errors: list[str] = []
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def count(self, solves: Iterable[ImportedSolve]) -> Iterator[ImportedSolve]:
+        for solve in solves:
+            self.counts[solve.session] = self.counts.get(solve.session, 0) + 1
+            yield solve
+
+    def skip(self, location: str, reason: str) -> None:
+        self.skipped += 1
+
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(f"{location}: {reason}")
+
+
+@functools.cache
+def _get_valid_moves(size: int) -> frozenset[str]:
+    # キューブのすべての層を回す回転記号は、スクランブルには使わない。
+    return frozenset(
+        move for move in ListCube.VALID_MOVES if ListCube._get_num_layers(move) < size
+    )
+
+
+def create_solve(
+    session: str, event: str, time_us: int, penalty: str, scramble: str, date: str
+) -> ImportedSolve:
+    """値を確かめて ImportedSolve を作る。不正な値の場合は ValueError を送出する。
+
+    スクランブルの空白はまとめて 1 つにする。空のスクランブル (手入力したタイムなど) は許す。
+    """
+
+    if event not in EVENTS:
+        raise ValueError(f"Invalid event: {event}")
+
+    if penalty not in PENALTIES:
+        raise ValueError(f"Invalid penalty: {penalty}")
+
+    # DNF は 0 秒のこともあるので許す。
+    if not (0 if penalty == "dnf" else 1) <= time_us <= Timer.MAXIMUM_TIME_NS // 1_000:
+        raise ValueError(f"Invalid time: {time_us / 1_000_000}")
+
+    moves: list[str] = scramble.split()
+
+    # イベントの名前の最初の文字がキューブのサイズ
+    if not _get_valid_moves(int(event[0])).issuperset(moves):
+        raise ValueError(f"{scramble} is invalid scramble.")
+
+    return ImportedSolve(session, event, time_us, penalty, " ".join(moves), date)
+
+
+def format_timestamp(seconds: float) -> str:
+    """UNIX 時間をデータベースの日時 (UTC) にする。"""
+
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+
+
+def parse_date(text: str) -> str:
+    """ISO 8601 の日時をデータベースの日時 (UTC) にする。タイムゾーンが無い場合はローカル時間とみなす。"""
+
+    # strftime よりも isoformat の方が速い。
+    return (
+        datetime.datetime.fromisoformat(text)
+        .astimezone(datetime.UTC)
+        .replace(tzinfo=None)
+        .isoformat(" ", "seconds")
+    )
+
+
+def parse_time(text: str) -> int:
+    """ "12.34", "1:02.34", "1:01:02.34" の形式のタイムをマイクロ秒にする。"""
+
+    *larger_units, seconds = text.strip().split(":")
+
+    if len(larger_units) > 2:
+        raise ValueError(f"Invalid time: {text}")
+
+    total: float = float(seconds)
+
+    for exponent, unit in enumerate(reversed(larger_units), start=1):
+        total += int(unit) * 60**exponent
+
+    return round(total * 1_000_000)
+
+
+class _JSONStreamReader:
+    """大きな JSON を少しずつ読み込みながら、値を 1 つずつ取り出すクラス
+
+    配列の要素などを json.JSONDecoder.raw_decode で 1 つずつデコードするので、
+    ファイル全体をメモリに読み込まずに済む。
+    """
+
+    CHUNK_SIZE: int = 1024 * 1024
+    WHITESPACE: re.Pattern[str] = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, file: TextIO) -> None:
+        self._file: TextIO = file
+        self._buffer: str = ""
+        self._pos: int = 0
+        self._decoder: json.JSONDecoder = json.JSONDecoder()
+
+    def _read(self) -> bool:
+        """次のチャンクを読み込む。ファイルの終わりの場合は False を返す。"""
+
+        if not (chunk := self._file.read(self.CHUNK_SIZE)):
+            return False
+
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """空白を読み飛ばして、次の文字を返す。 (ファイルの終わりの場合は "")"""
+
+        while True:
+            match: re.Match[str] | None = self.WHITESPACE.match(self._buffer, self._pos)
+            self._pos = match.end() if match is not None else self._pos
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._read():
+                return ""
+
+    def expect(self, character: str) -> None:
+        if (next_character := self.peek()) != character:
+            raise ValueError(
+                f"Invalid JSON: expected {character!r} but got {next_character!r}"
+            )
+
+        self._pos += 1
+
+    def decode(self) -> Any:
+        self.peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if self._read():
+                    continue
+
+                raise ValueError(f"Invalid JSON: {e}") from e
+
+            # 数値はチャンクの境目で切れていてもデコードできてしまうので、続きがあれば読み込んでやり直す。
+            if end == len(self._buffer) and self._read():
+                continue
+
+            self._pos = end
+            return value
+
+
+# csTimer の properties を探すために、ファイルの末尾から読み込む大きさ
+CSTIMER_PROPERTIES_SIZE: int = 16 * 1024 * 1024
+
+
+def _read_cstimer_properties(path: Path) -> dict[str, Any]:
+    """csTimer のファイルの末尾にある properties を読み込む。
+
+    セッションの名前とイベントは properties にあり、ソルブよりも後に書かれている。
+    ソルブを読み込む前に知りたいので、ファイルの末尾から "properties" のキーを探してデコードする。
+    """
+
+    with open(path, "rb") as file:
+        size: int = file.seek(0, io.SEEK_END)
+        file.seek(max(size - CSTIMER_PROPERTIES_SIZE, 0))
+        tail: bytes = file.read()
+
+    end: int = len(tail)
+
+    while (start := tail.rfind(b'"properties"', 0, end)) != -1:
+        try:
+            data: Any = json.loads(b"{" + tail[start:])
+        except ValueError:
+            # 文字列の中にある "properties" など
+            end = start
+            continue
+
+        if isinstance(data, dict) and isinstance(properties := data.get("properties"), dict):
+            return properties
+
+        end = start
+
+    return {}
+
+
+def _parse_cstimer_solve(session: str, event: str, solve: Any) -> ImportedSolve:
+    match solve:
+        case [
+            [int() as penalty, int() as time_ms, *_],
+            str() as scramble,
+            _,
+            int() as date,
+            *_,
+        ]:
+            if penalty not in CSTIMER_PENALTIES:
+                raise ValueError(f"Invalid penalty: {penalty}")
+
+            return create_solve(
+                session,
+                event,
+                time_ms * 1_000,
+                CSTIMER_PENALTIES[penalty],
+                scramble,
+                format_timestamp(date),
+            )
+        case _:
+            raise ValueError(f"Invalid solve: {solve}")
+
+
+def read_cstimer(path: Path, report: ImportReport) -> Iterator[ImportedSolve]:
+    """csTimer のエクスポート (JSON) を読み込む。
+
+    {"session1": [[[penalty, time], scramble, comment, date], ...], ..., "properties": {...}}
+    penalty は 0 (なし), 2000 (+2), -1 (DNF)、 time はミリ秒、 date は UNIX 時間。
+    """
+
+    session_data: Any = json.loads(_read_cstimer_properties(path).get("sessionData", "{}"))
+
+    if not isinstance(session_data, dict):
+        session_data = {}
+
+    with open(path, encoding="utf-8") as file:
+        reader: _JSONStreamReader = _JSONStreamReader(file)
+        reader.expect("{")
+
+        while reader.peek() != "}":
+            key: Any = reader.decode()
+            reader.expect(":")
+
+            if isinstance(key, str) and key.startswith("session") and reader.peek() == "[":
+                data: Any = session_data.get(key.removeprefix("session"), {})
+                name: str = str(data.get("name", key))
+                scramble_type: str = data.get("opt", {}).get("scrType", "333")
+                event: str | None = CSTIMER_EVENTS.get(scramble_type)
+
+                reader.expect("[")
+                index: int = 0
+
+                while reader.peek() != "]":
+                    solve: Any = reader.decode()
+
+                    try:
+                        if event is None:
+                            raise ValueError(f"Unsupported event: {scramble_type}")
+
+                        yield _parse_cstimer_solve(name, event, solve)
+                    except ValueError as e:
+                        report.skip(f"{key}[{index}]", str(e))
+
+                    index += 1
+
+                    if reader.peek() == ",":
+                        reader.expect(",")
+
+                reader.expect("]")
+            else:
+                # properties など
+                reader.decode()
+
+            if reader.peek() == ",":
+                reader.expect(",")
+
+        reader.expect("}")
+
+
+def read_twisty_timer(path: Path, report: ImportReport) -> Iterator[ImportedSolve]:
+    """Twisty Timer のバックアップ (CSV) を読み込む。
+
+    "Puzzle";"Category";"Time(millis)";"Date(millis)";"Scramble";"Penalty";"Comment"
+    Penalty は 0 (なし), 1 (+2), 2 (DNF)。セッションはパズルとカテゴリーごとに分ける。
+    """
+
+    with open(path, encoding="utf-8", newline="") as file:
+        rows: Iterator[list[str]] = csv.reader(file, delimiter=";")
+
+        if tuple(next(rows, ())) != TWISTY_TIMER_HEADER:
+            raise ValueError(f"{path.name} is not a Twisty Timer backup.")
+
+        for line_number, row in enumerate(rows, start=2):
+            try:
+                puzzle, category, time_ms, date_ms, scramble, penalty, *_ = row
+
+                if (event := TWISTY_TIMER_EVENTS.get(puzzle)) is None:
+                    raise ValueError(f"Unsupported puzzle: {puzzle}")
+
+                if (converted_penalty := TWISTY_TIMER_PENALTIES.get(penalty)) is None:
+                    raise ValueError(f"Invalid penalty: {penalty}")
+
+                time_us: int = int(time_ms) * 1_000
+
+                # Twisty Timer は +2 を足したタイムを保存している。
+                if converted_penalty == "plus_2":
+                    time_us -= 2_000_000
+
+                yield create_solve(
+                    f"{event} {category}",
+                    event,
+                    time_us,
+                    converted_penalty,
+                    scramble,
+                    format_timestamp(int(date_ms) / 1_000),
+                )
+            except ValueError as e:
+                report.skip(f"line {line_number}", str(e))
+
+
+def read_csv(path: Path, report: ImportReport) -> Iterator[ImportedSolve]:
+    """ヘッダーのある CSV を読み込む。セッションの名前はファイル名にする。
+
+    time の列は必須で、 penalty, scramble, date, event の列は省略できる。
+    time は "12.34", "1:02.34" の形式 (ペナルティを含めない)、 penalty は "", "+2", "DNF"、
+    date は ISO 8601 (省略した場合はインポートした日時)、 event は "3x3x3" などで省略した場合は "3x3x3"。
+    """
+
+    now: str = format_timestamp(time.time())
+
+    with open(path, encoding="utf-8", newline="") as file:
+        rows: csv.DictReader[str] = csv.DictReader(file)
+
+        if rows.fieldnames is None or "time" not in (
+            fieldnames := [name.strip().lower() for name in rows.fieldnames]
+        ):
+            raise ValueError(f"{path.name} has no time column.")
+
+        rows.fieldnames = fieldnames
+
+        for line_number, row in enumerate(rows, start=2):
+            try:
+                penalty: str = (row.get("penalty") or "").strip().lower()
+
+                if penalty not in CSV_PENALTIES:
+                    raise ValueError(f"Invalid penalty: {penalty}")
+
+                yield create_solve(
+                    path.stem,
+                    (row.get("event") or "3x3x3").strip(),
+                    parse_time(row["time"] or ""),
+                    CSV_PENALTIES[penalty],
+                    row.get("scramble") or "",
+                    parse_date(date) if (date := (row.get("date") or "").strip()) else now,
+                )
+            except ValueError as e:
+                report.skip(f"line {line_number}", str(e))
+
+
+READERS: dict[ImportFormat, Callable[[Path, ImportReport], Iterator[ImportedSolve]]] = {
+    ImportFormat.CSTIMER: read_cstimer,
+    ImportFormat.TWISTY_TIMER: read_twisty_timer,
+    ImportFormat.CSV: read_csv,
+}
+
+
+def detect_format(path: Path) -> ImportFormat:
+    if path.suffix.lower() == ".json":
+        return ImportFormat.CSTIMER
+
+    with open(path, encoding="utf-8", newline="") as file:
+        header: str = file.readline()
+
+    if next(csv.reader([header], delimiter=";"), [None])[0] == TWISTY_TIMER_HEADER[0]:
+        return ImportFormat.TWISTY_TIMER
+
+    return ImportFormat.CSV
+
+
+def import_file(
+    db: Database,
+    path: Path,
+    import_format: ImportFormat | None = None,
+    session_name: str | None = None,
+) -> ImportReport:
+    """ファイルのソルブを新しいセッションにインポートする。
+
+    ファイルは少しずつ読み込み、不正なソルブは読み飛ばして ImportReport に記録する。
+    ファイル自体が読み込めない場合は ValueError を送出し、何もインポートしない。
+
+    Args:
+        db: インポート先のデータベース
+        path: インポートするファイル
+        import_format: ファイルの形式。 None の場合はファイルから判断する。
+        session_name: 指定した場合は、すべてのソルブをこの名前の 1 つのセッションにインポートする。
+    """
+
+    report: ImportReport = ImportReport()
+    solves: Iterator[ImportedSolve] = READERS[import_format or detect_format(path)](
+        path, report
+    )
+
+    if session_name is not None:
+        solves = (solve._replace(session=session_name) for solve in solves)
+
+    report.session_ids = db.import_solves(report.count(solves))
+    return report
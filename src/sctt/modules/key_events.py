@@ -0,0 +1,129 @@
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from typing import NamedTuple
+
+
+class KeyEvent(NamedTuple):
+    event_type: str
+    """keyboard.KEY_DOWN or keyboard.KEY_UP"""
+    timestamp_ns: int
+    """キーのイベントが届いた時刻 (time.perf_counter_ns)"""
+    input_latency_ns: int = 0
+    """keyboard がイベントを受け取ってから、イベントが届くまでにかかった時間"""
+
+
+class LatencyHistogram:
+    """遅延 (ナノ秒) の分布を 2 倍ずつの幅の区間で数えるヒストグラム
+
+    区間の上限は 1 µs, 2 µs, 4 µs, ... , 2 ** (num_buckets - 1) µs で、それより大きい値は最後の区間に入る。
+    """
+
+    def __init__(self, num_buckets: int = 22) -> None:
+        """
+        Args:
+            num_buckets: 区間の数 (デフォルトでは最後の区間の上限が約 2 秒)
+        """
+
+        if num_buckets <= 0:
+            raise ValueError("num_buckets must be a natural number")
+
+        self.upper_bounds_ns: tuple[int, ...] = tuple(1_000 << i for i in range(num_buckets))
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts: list[int] = [0] * len(self.upper_bounds_ns)
+        self.count: int = 0
+        self.max_ns: int = 0
+        self._total_ns: int = 0
+
+    @property
+    def mean_ns(self) -> float:
+        return self._total_ns / self.count if self.count else 0.0
+
+    def record(self, latency_ns: int) -> None:
+        latency_ns = max(latency_ns, 0)
+        # 1 µs 以下は 0 番目、 (2 ** (i - 1), 2 ** i] µs は i 番目の区間
+        index: int = min(
+            max((latency_ns - 1) // 1_000, 0).bit_length(), len(self.upper_bounds_ns) - 1
+        )
+
+        self.counts[index] += 1
+        self.count += 1
+        self.max_ns = max(self.max_ns, latency_ns)
+        self._total_ns += latency_ns
+
+    def percentile(self, q: float) -> int:
+        """q パーセンタイルの値が入っている区間の上限を返す。 (記録が無い場合は 0)
+
+        Args:
+            q: 0 から 100 までのパーセンタイル
+        """
+
+        if not 0 <= q <= 100:
+            raise ValueError("q must be between 0 and 100")
+
+        if not self.count:
+            return 0
+
+        rank: float = self.count * q / 100
+        cumulative: int = 0
+
+        for upper_bound_ns, count in zip(self.upper_bounds_ns, self.counts, strict=True):
+            cumulative += count
+
+            if count and cumulative >= rank:
+                return upper_bound_ns
+
+        return self.upper_bounds_ns[-1]
+
+    def buckets(self) -> list[tuple[int, int]]:
+        """(区間の上限, その区間に入った数) のリストを返す。"""
+
+        return list(zip(self.upper_bounds_ns, self.counts, strict=True))
+
+
+class KeyEventQueue:
+    """キーのイベントを届いた時刻と一緒に、別のスレッドからイベントループに渡すキュー
+
+    put は keyboard のフックのスレッドから呼ばれるので、ロックを使わずに deque に追加するだけにする。
+    (deque の append と popleft はスレッドセーフ)
+    追加したら notify を呼んで、受け取る側のスレッドで drain するように知らせる。
+    取り出されていない間は何度 put しても notify は 1 回しか呼ばない。
+    """
+
+    def __init__(self, notify: Callable[[], object] | None = None) -> None:
+        """
+        Args:
+            notify: イベントが追加されたときに呼ぶ関数 (イベントを受け取る側のスレッドに drain を予約する)
+        """
+
+        self.notify: Callable[[], object] | None = notify
+        self.delay_histogram: LatencyHistogram = LatencyHistogram()
+        self._events: deque[KeyEvent] = deque()
+        self._is_notified: bool = False
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def put(self, event: KeyEvent) -> None:
+        self._events.append(event)
+
+        if not self._is_notified and self.notify is not None:
+            self._is_notified = True
+            self.notify()
+
+    def drain(self) -> Iterator[KeyEvent]:
+        """届いた順にイベントを取り出す。
+
+        イベントが届いてから取り出すまでにかかった時間を delay_histogram に記録する。
+        """
+
+        # 先に戻しておくことで、取り出している間に追加されたイベントも次の notify で取り出される。
+        self._is_notified = False
+
+        while self._events:
+            event: KeyEvent = self._events.popleft()
+            self.delay_histogram.record(time.perf_counter_ns() - event.timestamp_ns)
+
+            yield event
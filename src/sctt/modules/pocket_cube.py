@@ -0,0 +1,263 @@
+"""2x2x2 のすべての状態の最短手数の表を使って、ランダムな状態のスクランブルを作る。
+
+DBL のコーナーを固定すると、 2x2x2 は U, R, F だけで解けて、状態は 7! * 3^6 = 3,674,160 通りしかない。
+すべての状態の最短手数 (最大 11 手) を幅優先探索で求めて、 1 つの状態を 4 ビットで表に持つ。 (約 1.8 MB)
+表は一度だけ生成して、キャッシュディレクトリのファイルに保存し、 2 回目からはメモリマップする。
+
+表があれば、一様にランダムな状態を選んで、手数が 1 つずつ減る回転記号をたどるだけで最短の解が求まる。
+"""
+
+import itertools
+import math
+import mmap
+import multiprocessing
+import os
+import random
+from collections.abc import Callable, Sequence
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import Self
+
+from sctt.modules.two_phase import MOVE_CUBES, invert_moves
+from sctt.utils import original_stderr
+
+MOVES: tuple[str, ...] = ("U", "U2", "U'", "R", "R2", "R'", "F", "F2", "F'")
+N_MOVES: int = len(MOVES)
+# DBL (6) 以外のコーナーの位置 (two_phase.CubieCube の番号)
+POSITIONS: tuple[int, ...] = (0, 1, 2, 3, 4, 5, 7)
+N_PERM: int = math.factorial(len(POSITIONS))
+N_TWIST: int = 3 ** (len(POSITIONS) - 1)
+N_STATES: int = N_PERM * N_TWIST
+# WCA の規則 (4b3) と同じく、これより少ない手数で解ける状態はスクランブルにしない。
+MIN_DISTANCE: int = 4
+
+DISTANCE_TABLE_FILE_NAME: str = "pocket_cube_distances_v1.bin"
+UNKNOWN_DISTANCE: int = 0xF
+
+
+def _get_move_sources() -> list[tuple[tuple[int, ...], tuple[int, ...]]]:
+    """回転記号ごとに、各位置に移ってくるピースの元の位置と、向きの変化を返す。"""
+
+    local_indexes: dict[int, int] = {position: i for i, position in enumerate(POSITIONS)}
+
+    return [
+        (
+            tuple(local_indexes[cube.cp[position]] for position in POSITIONS),
+            tuple(cube.co[position] for position in POSITIONS),
+        )
+        for cube in MOVE_CUBES[:N_MOVES]
+    ]
+
+
+def _get_twist(co: Sequence[int]) -> int:
+    twist: int = 0
+
+    for orientation in co[:-1]:
+        twist = twist * 3 + orientation
+
+    return twist
+
+
+def _get_orientations(twist: int) -> list[int]:
+    co: list[int] = [0] * len(POSITIONS)
+
+    for i in range(len(POSITIONS) - 2, -1, -1):
+        twist, co[i] = divmod(twist, 3)
+
+    co[-1] = -sum(co) % 3
+    return co
+
+
+def build_move_tables() -> tuple[list[int], list[int]]:
+    """並び (辞書順の番号) と向きの移動表を作る。
+
+    状態の番号は 並び * N_TWIST + 向き で、揃っている状態は 0 になる。
+    """
+
+    move_sources: list[tuple[tuple[int, ...], tuple[int, ...]]] = _get_move_sources()
+    permutations: list[tuple[int, ...]] = list(itertools.permutations(range(len(POSITIONS))))
+    ranks: dict[tuple[int, ...], int] = {
+        permutation: rank for rank, permutation in enumerate(permutations)
+    }
+    perm_move: list[int] = [
+        ranks[tuple([permutation[source] for source in sources])]
+        for permutation in permutations
+        for sources, _ in move_sources
+    ]
+    twist_move: list[int] = []
+
+    for twist in range(N_TWIST):
+        co: list[int] = _get_orientations(twist)
+        twist_move.extend(
+            _get_twist(
+                [
+                    (co[source] + twist_) % 3
+                    for source, twist_ in zip(sources, twists, strict=True)
+                ]
+            )
+            for sources, twists in move_sources
+        )
+
+    return perm_move, twist_move
+
+
+def generate_distance_table(max_depth: int = UNKNOWN_DISTANCE - 1) -> bytes:
+    """すべての状態の最短手数を幅優先探索で求めて、 1 つの状態を 4 ビットに詰めた表を返す。
+
+    状態 s の手数は、 s // 2 バイト目の下位 (s が偶数) または上位 (s が奇数) の 4 ビット。
+    (数秒から数十秒かかる)
+
+    Args:
+        max_depth: この手数までの状態だけを求める。それより遠い状態は UNKNOWN_DISTANCE になる。
+    """
+
+    perm_move, twist_move = build_move_tables()
+    distances: bytearray = bytearray([UNKNOWN_DISTANCE]) * N_STATES
+    distances[0] = 0
+    unknown_marker: bytes = bytes((UNKNOWN_DISTANCE,))
+
+    for depth in range(max_depth):
+        marker: bytes = bytes((depth,))
+
+        if (frontier_count := distances.count(marker)) == 0:
+            break
+
+        # 探索の後半は、まだ手数の分からない状態の方が少ないので、そちらから隣の状態を調べる。
+        # (U, R, F の逆も U, R, F なので、隣に depth の状態があれば depth + 1 手)
+        search_backward: bool = distances.count(unknown_marker) < frontier_count
+        state: int = distances.find(unknown_marker if search_backward else marker)
+
+        while state != -1:
+            perm, twist = divmod(state, N_TWIST)
+
+            for next_perm, next_twist in zip(
+                perm_move[perm * N_MOVES : (perm + 1) * N_MOVES],
+                twist_move[twist * N_MOVES : (twist + 1) * N_MOVES],
+                strict=True,
+            ):
+                next_state: int = next_perm * N_TWIST + next_twist
+
+                if not search_backward:
+                    if distances[next_state] == UNKNOWN_DISTANCE:
+                        distances[next_state] = depth + 1
+                elif distances[next_state] == depth:
+                    distances[state] = depth + 1
+                    break
+
+            state = distances.find(unknown_marker if search_backward else marker, state + 1)
+
+    return bytes(
+        low | high << 4 for low, high in zip(distances[::2], distances[1::2], strict=True)
+    )
+
+
+def get_distance_table_file(directory: Path) -> Path:
+    return directory / DISTANCE_TABLE_FILE_NAME
+
+
+def save_distance_table(directory: Path) -> None:
+    """表を生成してファイルに保存する。 (一時ファイルに書いてから置き換える)"""
+
+    file: Path = get_distance_table_file(directory)
+    temporary_file: Path = file.with_name(f"{file.name}.{os.getpid()}.tmp")
+    temporary_file.write_bytes(generate_distance_table())
+    os.replace(temporary_file, file)
+
+
+def generate_distance_table_in_background(directory: Path) -> BaseProcess | None:
+    """表のファイルが無ければ、別のプロセスで生成を始めてそのプロセスを返す。"""
+
+    if get_distance_table_file(directory).exists():
+        return None
+
+    process: BaseProcess = multiprocessing.get_context("spawn").Process(
+        target=save_distance_table,
+        args=(directory,),
+        name="sctt-pocket-cube-table",
+        daemon=True,
+    )
+
+    # アプリの実行中に呼ばれるので、 Textual が置き換えた sys.stderr を元に戻して起動する。
+    with original_stderr():
+        process.start()
+
+    return process
+
+
+class PocketCubeScrambler:
+    """最短手数の表を使って、 2x2x2 のランダムな状態のスクランブルを作るクラス"""
+
+    def __init__(self, distances: Sequence[int]) -> None:
+        """
+        Args:
+            distances: generate_distance_table で作った表
+        """
+
+        if len(distances) != N_STATES // 2:
+            raise ValueError("Invalid distance table size.")
+
+        self.distances: Sequence[int] = distances
+        self.perm_move: list[int]
+        self.twist_move: list[int]
+        self.perm_move, self.twist_move = build_move_tables()
+
+    @classmethod
+    def load(cls, directory: Path) -> Self | None:
+        """表のファイルをメモリマップして読み込む。ファイルが無いか壊れている場合は None を返す。"""
+
+        try:
+            with open(get_distance_table_file(directory), "rb") as f:
+                return cls(memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)))
+        except (OSError, ValueError):
+            return None
+
+    def get_distance(self, state: int) -> int:
+        return self.distances[state >> 1] >> ((state & 1) << 2) & 0xF
+
+    def solve(self, state: int) -> list[str]:
+        """state を最短手数で解く回転記号のリストを返す。"""
+
+        moves: list[str] = []
+        distance: int = self.get_distance(state)
+
+        if distance == UNKNOWN_DISTANCE:
+            raise ValueError(f"Unknown distance of state {state}.")
+
+        # スクランブルごとに呼ばれるので、属性の参照をループの外に出しておく。
+        distances: Sequence[int] = self.distances
+        perm_move: list[int] = self.perm_move
+        twist_move: list[int] = self.twist_move
+
+        while distance > 0:
+            perm, twist = divmod(state, N_TWIST)
+            perm_row: int = perm * N_MOVES
+            twist_row: int = twist * N_MOVES
+
+            for move in range(N_MOVES):
+                next_state: int = (
+                    perm_move[perm_row + move] * N_TWIST + twist_move[twist_row + move]
+                )
+
+                if distances[next_state >> 1] >> ((next_state & 1) << 2) & 0xF < distance:
+                    break
+
+            moves.append(MOVES[move])
+            state = next_state
+            distance -= 1
+
+        return moves
+
+    def generate_scramble(self, rng: random.Random | None = None) -> str:
+        """一様にランダムな状態を選び、その状態にする最短の手順を返す。
+
+        MIN_DISTANCE 手より少なく解ける状態は選び直す。
+        """
+
+        randrange: Callable[[int], int] = (
+            rng.randrange if rng is not None else random.randrange
+        )
+
+        while self.get_distance(state := randrange(N_STATES)) < MIN_DISTANCE:
+            pass
+
+        return " ".join(invert_moves(self.solve(state)))
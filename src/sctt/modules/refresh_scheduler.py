@@ -0,0 +1,85 @@
+import math
+
+
+class RefreshScheduler:
+    """表示されるタイムが次に変わる時刻を求めて、タイマーを描画する時刻を決めるクラス
+
+    タイムは resolution 単位に丸めて表示されるので、表示が変わるのは (n + 0.5) * resolution 秒と、
+    分の桁が増える 60 秒ごとのときだけ。 (59.96 秒は 60.0 と表示され、 60 秒で 1:00.0 になる)
+    その時刻まで待ってから描画すれば、一定の間隔で描画するより少ない回数で同じ表示になる。
+    待つ時間は毎回タイマーの経過時間から求めるので、描画が遅れてもずれが積み重ならない。
+    """
+
+    def __init__(
+        self, resolution: float = 0.1, margin: float = 0.001, miss_tolerance: float = 1 / 60
+    ) -> None:
+        """
+        Args:
+            resolution: 表示するタイムの単位 (小数点第 1 位まで表示するなら 0.1)
+            margin: 表示が変わる時刻よりも少しだけ遅く起きるための余裕
+            miss_tolerance: 表示が変わる時刻からこれ以上遅れて描画した場合に遅延として数える
+        """
+
+        if resolution <= 0:
+            raise ValueError("resolution must be a positive number")
+
+        self.resolution: float = resolution
+        self.margin: float = margin
+        self.miss_tolerance: float = miss_tolerance
+        self.reset()
+
+    def reset(self) -> None:
+        """予定した時刻と計測した値を初期化する。"""
+
+        self.deadline: float | None = None
+        self.frame_count: int = 0
+        self.skipped_count: int = 0
+        self.missed_deadline_count: int = 0
+        self.last_frame_time: float = 0.0
+        self.max_frame_time: float = 0.0
+        self._total_frame_time: float = 0.0
+
+    @property
+    def mean_frame_time(self) -> float:
+        return self._total_frame_time / self.frame_count if self.frame_count else 0.0
+
+    def get_next_deadline(self, elapsed_time: float) -> float:
+        """elapsed_time より後で、表示されるタイムが次に変わる経過時間を返す。"""
+
+        rounding_deadline: float = (
+            math.floor(elapsed_time / self.resolution + 0.5) + 0.5
+        ) * self.resolution
+        minute_deadline: float = (math.floor(elapsed_time / 60) + 1) * 60
+
+        return min(rounding_deadline, minute_deadline)
+
+    def schedule(self, elapsed_time: float) -> float:
+        """次に表示が変わる時刻を予定して、それまで待つ秒数を返す。
+
+        Args:
+            elapsed_time: 現在のタイマーの経過時間
+        """
+
+        self.deadline = self.get_next_deadline(elapsed_time)
+        return self.deadline - elapsed_time + self.margin
+
+    def record_frame(self, elapsed_time: float, frame_time: float, updated: bool) -> None:
+        """予定した時刻に起きて描画した結果を記録する。
+
+        Args:
+            elapsed_time: 起きたときのタイマーの経過時間
+            frame_time: 描画にかかった秒数
+            updated: 表示が変わって描画したかどうか (早く起きすぎた場合は False)
+        """
+
+        if not updated:
+            self.skipped_count += 1
+            return
+
+        self.frame_count += 1
+        self.last_frame_time = frame_time
+        self.max_frame_time = max(self.max_frame_time, frame_time)
+        self._total_frame_time += frame_time
+
+        if self.deadline is not None and elapsed_time - self.deadline > self.miss_tolerance:
+            self.missed_deadline_count += 1
@@ -1,6 +1,18 @@
+import itertools
 import random
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
 
 CUBE_SIZE_VARIANT: tuple[int, ...] = (2, 3, 4, 5, 6, 7)
+# 方向(時計回り 90 度回転、反時計回り 90 度回転、180 度回転)
+# 180度回転 (U2 など) の確率を上げるために "2" を2つ設定
+MODIFIERS: tuple[str, ...] = ("", "'", "2", "2")
+# generate_scrambles で 1 回にまとめて生成するスクランブルの数
+SCRAMBLE_BATCH_SIZE: int = 10_000
 
 
 def validate_cube_size(cube_size: int) -> bool:
@@ -25,21 +37,14 @@ def _generate_3_layer_turn_moves(moves: list[str]) -> list[str]:
     return ["3" + move for move in moves if "w" in move]
 
 
-def generate_scramble(cube_size: int = 3) -> str:
-    """
+def get_scramble_moves(cube_size: int) -> tuple[list[str], int]:
+    """スクランブルに使う回転記号と、スクランブルの長さを返す。
+
     Args:
-        cube_size: 2 (2x2x2) から 7 (7x7x7) までのサイズを指定する。例 3x3x3 -> 3 (デフォルト値)
+        cube_size: 2 (2x2x2) から 7 (7x7x7) までのサイズを指定する。
     """
 
-    if not validate_cube_size(cube_size):
-        raise ValueError(
-            f"Invalid cube size: {cube_size}. Supported sizes are between 2 and 7."
-        )
-
     moves: list[str] = ["L", "R", "U", "D", "F", "B"]
-    # 方向(時計回り 90 度回転、反時計回り 90 度回転、180 度回転)
-    # 180度回転 (U2 など) の確率を上げるために "2" を2つ設定
-    modifiers: tuple[str, ...] = ("", "'", "2", "2")
     scramble_length: int
 
     match cube_size:
@@ -71,6 +76,21 @@ def generate_scramble(cube_size: int = 3) -> str:
                 f"Invalid cube size: {cube_size}. Supported sizes are between 2 and 7."
             )
 
+    return moves, scramble_length
+
+
+def generate_scramble(cube_size: int = 3) -> str:
+    """
+    Args:
+        cube_size: 2 (2x2x2) から 7 (7x7x7) までのサイズを指定する。例 3x3x3 -> 3 (デフォルト値)
+    """
+
+    if not validate_cube_size(cube_size):
+        raise ValueError(
+            f"Invalid cube size: {cube_size}. Supported sizes are between 2 and 7."
+        )
+
+    moves, scramble_length = get_scramble_moves(cube_size)
     previous: str = ""
     two_previous: str = ""
     scramble: list[str] = []
@@ -85,12 +105,96 @@ def generate_scramble(cube_size: int = 3) -> str:
         two_previous = previous
         previous = move
 
-        modifier: str = random.choice(modifiers)
+        modifier: str = random.choice(MODIFIERS)
         scramble.append(move + modifier)
 
     return " ".join(scramble)
 
 
+def iter_scrambles(
+    cube_size: int, count: int, seed: int | None = None, batch_size: int = SCRAMBLE_BATCH_SIZE
+) -> Iterator[list[str]]:
+    """count 個のスクランブルを batch_size 個ずつまとめて生成する。 (numpy が必要)
+
+    generate_scramble と同じ規則で、バッチのすべてのスクランブルの t 手目を NumPy の Generator でまとめて選ぶ。
+    直前 2 つと同じ回転記号を選んだ行だけを、配列のまま選び直す。
+    seed と batch_size が同じなら、いつも同じスクランブルが生成される。
+
+    Args:
+        cube_size: 2 (2x2x2) から 7 (7x7x7) までのサイズを指定する。
+        count: 生成するスクランブルの数
+        seed: 乱数のシード。 None の場合は毎回違うスクランブルになる。
+        batch_size: 1 回に生成するスクランブルの数
+    """
+
+    import numpy as np
+
+    if count < 0:
+        raise ValueError("count must not be negative")
+
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a natural number")
+
+    moves, scramble_length = get_scramble_moves(cube_size)
+    tokens: NDArray[np.str_] = np.array(
+        [move + modifier for move in moves for modifier in MODIFIERS]
+    )
+    rng: np.random.Generator = np.random.default_rng(seed)
+
+    for start in range(0, count, batch_size):
+        size: int = min(batch_size, count - start)
+        move_indexes: NDArray[np.intp] = np.empty((size, scramble_length), dtype=np.intp)
+
+        for t in range(scramble_length):
+            previous: NDArray[np.intp] = move_indexes[:, max(t - 2, 0) : t]
+            column: NDArray[np.intp] = rng.integers(len(moves), size=size)
+            rows: NDArray[np.intp] = np.flatnonzero(
+                (column[:, np.newaxis] == previous).any(axis=1)
+            )
+
+            while rows.size:
+                column[rows] = rng.integers(len(moves), size=rows.size)
+                rows = rows[(column[rows, np.newaxis] == previous[rows]).any(axis=1)]
+
+            move_indexes[:, t] = column
+
+        modifier_indexes: NDArray[np.intp] = rng.integers(
+            len(MODIFIERS), size=(size, scramble_length)
+        )
+        yield [
+            " ".join(row)
+            for row in tokens[move_indexes * len(MODIFIERS) + modifier_indexes].tolist()
+        ]
+
+
+def generate_scrambles(cube_size: int, count: int, seed: int | None = None) -> list[str]:
+    """count 個のスクランブルをまとめて生成する。 (numpy が必要)
+
+    Args:
+        cube_size: 2 (2x2x2) から 7 (7x7x7) までのサイズを指定する。
+        count: 生成するスクランブルの数
+        seed: 乱数のシード。同じシードならいつも同じスクランブルが生成される。
+    """
+
+    return list(itertools.chain.from_iterable(iter_scrambles(cube_size, count, seed)))
+
+
+def write_scrambles(path: Path, cube_size: int, count: int, seed: int | None = None) -> int:
+    """スクランブルを 1 行に 1 つずつファイルに書き出して、書き出した数を返す。
+
+    スクランブルはバッチごとに書き出すので、 count が大きくてもメモリの使用量は一定。
+    """
+
+    written: int = 0
+
+    with open(path, "w", encoding="utf-8") as file:
+        for scrambles in iter_scrambles(cube_size, count, seed):
+            file.writelines(scramble + "\n" for scramble in scrambles)
+            written += len(scrambles)
+
+    return written
+
+
 # test
 if __name__ == "__main__":
     print(f"Scramble: {generate_scramble(3)}")
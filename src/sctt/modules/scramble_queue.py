@@ -0,0 +1,251 @@
+import functools
+import multiprocessing
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+
+from sctt.modules.pocket_cube import (
+    PocketCubeScrambler,
+    generate_distance_table_in_background,
+)
+from sctt.modules.scramble import generate_scramble, validate_cube_size
+from sctt.modules.simulate import Cube
+from sctt.modules.two_phase import (
+    TwoPhaseSolver,
+    TwoPhaseTables,
+    generate_random_state_scramble,
+    generate_tables_in_background,
+)
+from sctt.utils import original_stderr
+
+
+@functools.cache
+def _load_two_phase_solver(tables_dir: Path) -> TwoPhaseSolver:
+    if (tables := TwoPhaseTables.load(tables_dir)) is None:
+        raise ValueError(f"Two-phase tables not found in {tables_dir}")
+
+    return TwoPhaseSolver(tables)
+
+
+def _generate_3x3x3_scramble(tables_dir: Path) -> str:
+    """ScrambleQueue のソルバーのプロセスで呼ばれる。 (ソルバーはプロセスごとに 1 回だけ読み込む)"""
+
+    return generate_random_state_scramble(_load_two_phase_solver(tables_dir))
+
+
+class ScrambleQueue:
+    """次に使うスクランブルと、それを適用したキューブをバックグラウンドで用意しておくクラス
+
+    キューブのサイズごとに最大 prefetch_count 個のスクランブルをワーカースレッドで生成して、
+    Cube.apply_scramble まで済ませておく。 pop は用意されたものを取り出すだけなので O(1) で済む。
+    (3x3x3 oh などのイベントはスクランブルの生成方法が同じなので、キューブのサイズで共有する)
+
+    tables_dir を指定すると、 2x2x2 は最短手数の表、 3x3x3 は 2 フェーズのソルバーで
+    ランダムな状態のスクランブルにする。表が無い場合は start で別のプロセスに生成させて、
+    それが終わるまではこれまで通りランダムな回転記号のスクランブルを使う。
+
+    2 フェーズのソルバーは 1 つのスクランブルに平均 0.4 秒ほど GIL を持ったまま計算するので、
+    ワーカースレッドで動かすと、キーボードフックのスレッドが時刻を取るのが最大で
+    sys.getswitchinterval() (5 ms) 遅れる。そのため、 spawn で起動した別のプロセスで解かせて、
+    ワーカースレッドは結果を待つだけにする。
+    """
+
+    # stop でワーカースレッドの終了を待つ秒数 (デーモンスレッドなので、間に合わなくても終了は妨げない)
+    STOP_TIMEOUT: float = 1.0
+
+    def __init__(self, prefetch_count: int = 3, tables_dir: Path | None = None) -> None:
+        """
+        Args:
+            prefetch_count: キューブのサイズごとに用意しておくスクランブルの数
+            tables_dir: ランダムな状態のスクランブルに使う表を置くディレクトリ
+        """
+
+        if prefetch_count <= 0:
+            raise ValueError("prefetch_count must be a natural number")
+
+        self.prefetch_count: int = prefetch_count
+        self._queues: dict[int, deque[tuple[str, Cube]]] = {}
+        self._condition: threading.Condition = threading.Condition()
+        self._is_running: bool = False
+        self._thread: threading.Thread | None = None
+        self.tables_dir: Path | None = tables_dir
+        # キューブのサイズごとの、表を生成しているプロセス
+        self._tables_processes: dict[int, BaseProcess | None] = {}
+        # キューブのサイズごとの、ランダムな状態のスクランブルを生成する関数
+        self._random_state_scramblers: dict[int, Callable[[], str]] = {}
+        # 3x3x3 のスクランブルを生成するプロセス (ソルバーを使うときに起動する)
+        self._solver_executor: ProcessPoolExecutor | None = None
+
+    def _load_random_state_scrambler(self, cube_size: int) -> Callable[[], str] | None:
+        if self.tables_dir is None:
+            return None
+
+        match cube_size:
+            case 2:
+                if (scrambler := PocketCubeScrambler.load(self.tables_dir)) is not None:
+                    return scrambler.generate_scramble
+            case 3:
+                if TwoPhaseTables.load(self.tables_dir) is not None:
+                    return self._generate_3x3x3_scramble
+
+        return None
+
+    def _generate_3x3x3_scramble(self) -> str:
+        if self.tables_dir is None:
+            raise ValueError("tables_dir is not set")
+
+        # ワーカースレッドからだけ呼ばれる。 stop の後にプロセスを起動し直さないよう、ロックの中で確かめる。
+        with self._condition:
+            if not self._is_running:
+                return generate_scramble(3)
+
+            if self._solver_executor is None:
+                self._solver_executor = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                )
+
+            executor: ProcessPoolExecutor = self._solver_executor
+
+        try:
+            # プロセスは submit で起動されるので、 Textual が置き換えた sys.stderr を元に戻しておく。
+            with original_stderr():
+                future: Future[str] = executor.submit(
+                    _generate_3x3x3_scramble, self.tables_dir
+                )
+
+            # 結果を待つ間は GIL を手放すので、ほかのスレッドは止まらない。
+            return future.result()
+        except (BrokenProcessPool, CancelledError, RuntimeError):
+            # プロセスが異常終了した場合は、次のスクランブルでプロセスを起動し直す。
+            # (stop で止められた場合は、 submit が RuntimeError に、待っていた結果が CancelledError になる)
+            with self._condition:
+                if self._solver_executor is executor:
+                    self._solver_executor = None
+
+            return generate_scramble(3)
+
+    def _get_random_state_scrambler(self, cube_size: int) -> Callable[[], str] | None:
+        """表が用意できていれば、 cube_size のランダムな状態のスクランブルを生成する関数を返す。"""
+
+        if (
+            cube_size not in self._random_state_scramblers
+            and (
+                (process := self._tables_processes.get(cube_size)) is None
+                or not process.is_alive()
+            )
+            and (scrambler := self._load_random_state_scrambler(cube_size)) is not None
+        ):
+            self._random_state_scramblers[cube_size] = scrambler
+
+        return self._random_state_scramblers.get(cube_size)
+
+    def _generate(self, cube_size: int, random_state: bool = True) -> tuple[str, Cube]:
+        """
+        Args:
+            random_state: False の場合は、表があってもランダムな回転記号のスクランブルにする。
+        """
+
+        scrambler: Callable[[], str] | None = (
+            self._get_random_state_scrambler(cube_size) if random_state else None
+        )
+        scramble: str = scrambler() if scrambler is not None else generate_scramble(cube_size)
+        cube: Cube = Cube(cube_size)
+        cube.apply_scramble(scramble)
+
+        return scramble, cube
+
+    def _get_size_to_fill(self) -> int | None:
+        for cube_size, queue in self._queues.items():
+            if len(queue) < self.prefetch_count:
+                return cube_size
+
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._is_running and (cube_size := self._get_size_to_fill()) is None:
+                    self._condition.wait()
+
+                if not self._is_running or cube_size is None:
+                    return
+
+            # 生成中はロックを持たないので、 pop はその間も待たされない。
+            item: tuple[str, Cube] = self._generate(cube_size)
+
+            with self._condition:
+                queue: deque[tuple[str, Cube]] = self._queues[cube_size]
+
+                if len(queue) < self.prefetch_count:
+                    queue.append(item)
+
+    def start(self) -> None:
+        with self._condition:
+            if self._is_running:
+                return
+
+            self._is_running = True
+
+            if self.tables_dir is not None and not self._tables_processes:
+                self._tables_processes = {
+                    2: generate_distance_table_in_background(self.tables_dir),
+                    3: generate_tables_in_background(self.tables_dir),
+                }
+
+            self._thread = threading.Thread(
+                target=self._run, name="scramble-queue", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._is_running = False
+            self._condition.notify_all()
+            executor: ProcessPoolExecutor | None = self._solver_executor
+            self._solver_executor = None
+
+        # ワーカースレッドがソルバーの結果を待っているかもしれないので、先にプロセスを止める。
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if self._thread is not None:
+            self._thread.join(self.STOP_TIMEOUT)
+            self._thread = None
+
+    def prefetch(self, cube_size: int) -> None:
+        """cube_size のスクランブルの用意を始める。"""
+
+        if not validate_cube_size(cube_size):
+            raise ValueError(
+                f"Invalid cube size: {cube_size}. Supported sizes are between 2 and 7."
+            )
+
+        with self._condition:
+            self._queues.setdefault(cube_size, deque())
+            self._condition.notify_all()
+
+    def pop(self, cube_size: int) -> tuple[str, Cube]:
+        """用意しておいたスクランブルとキューブを取り出す。
+
+        用意が間に合っていない場合は、その場でランダムな回転記号のスクランブルを生成する。
+        (ランダムな状態のスクランブルは 3x3x3 で 1 秒以上かかることがあり、呼び出し元を待たせるため)
+        """
+
+        self.prefetch(cube_size)
+
+        with self._condition:
+            queue: deque[tuple[str, Cube]] = self._queues[cube_size]
+            item: tuple[str, Cube] | None = queue.popleft() if queue else None
+            self._condition.notify_all()
+
+        return item if item is not None else self._generate(cube_size, random_state=False)
+
+    def count(self, cube_size: int) -> int:
+        """cube_size の用意できているスクランブルの数を返す。"""
+
+        with self._condition:
+            return len(self._queues.get(cube_size, ()))
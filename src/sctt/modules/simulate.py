@@ -1,10 +1,26 @@
 import copy
+import functools
+import itertools
+import operator
 import re
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, cast
 
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
 
-class Cube:
-    """ルービックキューブの状態をシュミレーションするクラス"""
+# ArrayCube のステッカーの並び順。面ごとに size * size 個のステッカーが行優先で並ぶ。
+FACE_ORDER: tuple[str, ...] = ("U", "L", "F", "R", "B", "D")
+# 揃っている状態の各面の色。 (ArrayCube では FACE_ORDER のインデックスで色を表す)
+FACE_COLORS: tuple[str, ...] = ("W", "O", "G", "R", "B", "Y")
+
+
+class ListCube:
+    """ルービックキューブの状態をシュミレーションするクラス (面をリストのリストで持つ実装)
+
+    ArrayCube の各回転記号の置換を求めるための参照実装としても使う。
+    """
 
     """
     例 3x3x3 キューブの展開図とナンバリング (リストのインデックス):
@@ -271,11 +287,13 @@ class Cube:
             new_l,
         )
 
-    def _get_base_move(self, move: str) -> str | None:
+    @staticmethod
+    def _get_base_move(move: str) -> str | None:
         result: re.Match[str] | None = re.search(r"[UDLRFB]", move)
         return result.group() if result is not None else None
 
-    def _get_num_moves(self, move: str) -> int:
+    @staticmethod
+    def _get_num_moves(move: str) -> int:
         if "2" in move:
             return 2
         elif "'" in move:
@@ -283,7 +301,8 @@ class Cube:
         else:
             return 1
 
-    def _get_num_layers(self, move: str) -> int:
+    @staticmethod
+    def _get_num_layers(move: str) -> int:
         if "w" in move:
             if "3" in move:
                 return 3
@@ -292,8 +311,8 @@ class Cube:
         else:
             return 1
 
-    def apply_scramble(self, scramble: str) -> None:
-        moves_map: dict[str, Callable[[int], None]] = {
+    def get_moves_map(self) -> dict[str, Callable[[int], None]]:
+        return {
             "U": self._move_u,
             "D": self._move_d,
             "L": self._move_l,
@@ -302,6 +321,9 @@ class Cube:
             "B": self._move_b,
         }
 
+    def apply_scramble(self, scramble: str) -> None:
+        moves_map: dict[str, Callable[[int], None]] = self.get_moves_map()
+
         for move in scramble.split(" "):
             if move not in self.VALID_MOVES:
                 raise ValueError(f"{scramble} is invalid scramble.")
@@ -314,3 +336,203 @@ class Cube:
                     raise ValueError(f"Invalid move: {move}")
                 else:
                     moves_map[m](num_layers)
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_move(move: str) -> tuple[str, int, int]:
+    """回転記号を (面, 回す層の数, 時計回りに 90 度回す回数) に分解する。例 3Rw' -> ("R", 3, 3)"""
+
+    if move not in ListCube.VALID_MOVES or (face := ListCube._get_base_move(move)) is None:
+        raise ValueError(f"Invalid move: {move}")
+
+    return face, ListCube._get_num_layers(move), ListCube._get_num_moves(move)
+
+
+@functools.lru_cache(maxsize=None)
+def get_move_permutation(size: int, move: str) -> tuple[int, ...]:
+    """size のキューブで move を回したときのステッカーの置換を返す。
+
+    回したあとの状態の i 番目のステッカーは、回す前の状態の permutation[i] 番目のステッカーになる。
+    ListCube のステッカーを位置の番号に置き換えて回すことで、サイズと回転記号ごとに一度だけ求める。
+    """
+
+    face, num_layers, num_moves = _parse_move(move)
+    cube: ListCube = ListCube(size)
+    area: int = size * size
+    labeled_faces: dict[str, list[list[int]]] = {
+        name: [[i * area + row * size + col for col in range(size)] for row in range(size)]
+        for i, name in enumerate(FACE_ORDER)
+    }
+    cube.faces = cast(dict[str, list[list[str]]], labeled_faces)
+
+    for _ in range(num_moves):
+        cube.get_moves_map()[face](num_layers)
+
+    labels: dict[str, list[list[int]]] = cast(dict[str, list[list[int]]], cube.faces)
+    return tuple(label for name in FACE_ORDER for row in labels[name] for label in row)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_move_getter(size: int, move: str) -> Callable[[Sequence[int]], tuple[int, ...]]:
+    return operator.itemgetter(*get_move_permutation(size, move))
+
+
+SCRAMBLE_CACHE_SIZE: int = 256
+
+
+@functools.lru_cache(maxsize=SCRAMBLE_CACHE_SIZE)
+def compile_scramble(size: int, scramble: str) -> tuple[int, ...]:
+    """size のキューブに scramble を適用したときのステッカーの置換を返す。
+
+    すべての手の置換を 1 つに合成するので、適用は 1 回の gather で済む。
+    p のあとに q を回す置換は composed[i] = p[q[i]] なので、恒等置換に順番に各手を適用すれば求まる。
+    最近使った SCRAMBLE_CACHE_SIZE 個のスクランブルは (size, scramble) をキーにキャッシュする。
+    """
+
+    permutation: tuple[int, ...] = tuple(range(6 * size * size))
+
+    for move in scramble.split(" "):
+        if move not in ListCube.VALID_MOVES:
+            raise ValueError(f"{scramble} is invalid scramble.")
+
+        permutation = _get_move_getter(size, move)(permutation)
+
+    return permutation
+
+
+@functools.lru_cache(maxsize=SCRAMBLE_CACHE_SIZE)
+def _get_scramble_getter(
+    size: int, scramble: str
+) -> Callable[[Sequence[int]], tuple[int, ...]]:
+    return operator.itemgetter(*compile_scramble(size, scramble))
+
+
+class ArrayCube:
+    """ルービックキューブの状態をシュミレーションするクラス (ステッカーを 1 つの bytes で持つ実装)
+
+    6 * size * size 個のステッカーの色を FACE_ORDER の順に並べた bytes で持つ。
+    回転記号ごとの置換はサイズごとに一度だけ求めておき、スクランブル全体を 1 つの置換に合成するので、
+    スクランブルの適用は 1 回の gather で済む。
+    ListCube と同じ API を持つ。
+    """
+
+    VALID_MOVES: set[str] = ListCube.VALID_MOVES
+
+    def __init__(self, size: int = 3) -> None:
+        """
+        Args:
+            size: example 3x3x3 -> 3
+        """
+
+        if self.is_natural_number(size):
+            self._size: int = size
+        else:
+            raise ValueError("size must be a natural number")
+
+        self.initialize()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def state(self) -> bytes:
+        """ステッカーの色 (FACE_COLORS のインデックス) を FACE_ORDER の順に並べた bytes"""
+
+        return self._state
+
+    @staticmethod
+    def is_natural_number(n: int) -> bool:
+        return n > 0
+
+    def initialize(self) -> None:
+        """キューブの状態をスクランブルが適用されていない状態に初期化する。"""
+
+        area: int = self._size * self._size
+        self._state: bytes = bytes(i for i in range(len(FACE_ORDER)) for _ in range(area))
+
+    @property
+    def faces(self) -> dict[str, list[list[str]]]:
+        size: int = self._size
+        area: int = size * size
+        colors: list[str] = [FACE_COLORS[color] for color in self._state]
+
+        return {
+            name: [
+                colors[i * area + row * size : i * area + (row + 1) * size]
+                for row in range(size)
+            ]
+            for i, name in enumerate(FACE_ORDER)
+        }
+
+    def apply_scramble(self, scramble: str) -> None:
+        self._state = bytes(_get_scramble_getter(self._size, scramble)(self._state))
+
+
+Cube = ArrayCube
+
+
+def apply_scrambles(
+    size: int, scrambles: Sequence[str], states: "NDArray[np.uint8] | None" = None
+) -> "NDArray[np.uint8]":
+    """size のキューブに複数のスクランブルをまとめて適用した状態を返す。 (numpy が必要)
+
+    状態は (len(scrambles), 6 * size * size) の uint8 の行列で、各行は ArrayCube.state と同じ並び。
+    すべてのスクランブルの t 手目を 1 回の fancy indexing でまとめて回す。
+    短いスクランブルは恒等置換で詰めるので、長さが違っていてもよい。
+
+    Args:
+        size: example 3x3x3 -> 3
+        scrambles: 適用するスクランブル
+        states: スクランブルを適用する前の状態 (省略すると揃っている状態)
+    """
+
+    import numpy as np
+
+    if not ArrayCube.is_natural_number(size):
+        raise ValueError("size must be a natural number")
+
+    num_stickers: int = 6 * size * size
+
+    if states is None:
+        solved: NDArray[np.uint8] = np.frombuffer(ArrayCube(size).state, dtype=np.uint8)
+        states = np.tile(solved, (len(scrambles), 1))
+    elif states.shape != (len(scrambles), num_stickers):
+        raise ValueError(
+            f"states must have shape ({len(scrambles)}, {num_stickers}), got {states.shape}"
+        )
+
+    moves_list: list[list[str]] = [scramble.split(" ") for scramble in scrambles]
+    moves: list[str] = list(itertools.chain.from_iterable(moves_list))
+    used_moves: list[str] = sorted(set(moves))
+
+    if invalid_moves := set(used_moves) - ListCube.VALID_MOVES:
+        scramble: str = next(
+            scramble
+            for scramble, scramble_moves in zip(scrambles, moves_list, strict=True)
+            if not invalid_moves.isdisjoint(scramble_moves)
+        )
+        raise ValueError(f"{scramble} is invalid scramble.")
+
+    # 使われている手だけの置換の表を作る。 0 行目は長さを揃えるための詰め物に使う恒等置換。
+    move_ids: dict[str, int] = {move: i for i, move in enumerate(used_moves, 1)}
+    table: NDArray[np.intp] = np.array(
+        [range(num_stickers), *(get_move_permutation(size, move) for move in used_moves)],
+        dtype=np.intp,
+    )
+
+    lengths: NDArray[np.intp] = np.fromiter(map(len, moves_list), dtype=np.intp)
+    max_length: int = int(lengths.max(initial=0))
+    move_matrix: NDArray[np.intp] = np.zeros((len(scrambles), max_length), dtype=np.intp)
+    move_matrix[np.arange(max_length) < lengths[:, np.newaxis]] = np.fromiter(
+        map(move_ids.__getitem__, moves), dtype=np.intp, count=len(moves)
+    )
+
+    # 各行の先頭の位置を足して、全体を 1 次元の配列として 1 回で gather する。
+    offsets: NDArray[np.intp] = np.arange(len(scrambles), dtype=np.intp)[:, np.newaxis]
+    offsets *= num_stickers
+
+    for t in range(max_length):
+        states = states.ravel()[table[move_matrix[:, t]] + offsets]
+
+    return states
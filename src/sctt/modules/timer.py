@@ -12,38 +12,75 @@ class TimerState(Enum):
 
 
 class Timer:
+    """スピードキューブのタイマー
+
+    時刻はすべて time.perf_counter_ns の整数のナノ秒で扱う。
+    on_press と on_release にはキーのイベントが届いた時刻を渡せるので、
+    イベントを処理するまでの遅れはタイムに含まれない。
+    """
+
     INIT_TIME: float = 0.0
     MAXIMUM_TIME: float = 35_999.99  # 9:59:59.99
+    MAXIMUM_TIME_NS: int = 35_999_990_000_000
 
     def __init__(self) -> None:
         self.waiting_time: float = 0.3
         self.reset()
 
     def reset(self) -> None:
-        self._start_time: float = 0.0
-        self._elapsed_time: float = 0.0
-        self._press_time: float = 0.0
+        self._start_time_ns: int = 0
+        self._elapsed_time_ns: int = 0
+        self._press_time_ns: int = 0
         self._was_key_released_after_stop: bool = False
         self.state: TimerState = TimerState.STOPPED
+        # 最後のイベントが届いてから処理されるまでにかかった時間
+        self.last_event_latency_ns: int = 0
+
+    def _get_event_time_ns(self, timestamp_ns: int | None) -> int:
+        now: int = time.perf_counter_ns()
+
+        if timestamp_ns is None:
+            self.last_event_latency_ns = 0
+            return now
+
+        self.last_event_latency_ns = now - timestamp_ns
+        return timestamp_ns
+
+    def _check_hold_duration(self, now: int) -> bool:
+        return now - self._press_time_ns >= round(self.waiting_time * 1e9)
+
+    def on_press(self, timestamp_ns: int | None = None) -> None:
+        """キーが押されたときに呼ぶ。
+
+        Args:
+            timestamp_ns: キーのイベントが届いた時刻 (time.perf_counter_ns)。省略すると呼んだ時刻になる。
+        """
 
-    def _check_hold_duration(self) -> bool:
-        return time.perf_counter() - self._press_time >= self.waiting_time
+        now: int = self._get_event_time_ns(timestamp_ns)
 
-    def on_press(self) -> None:
         match self.state:
             case TimerState.STOPPED:
-                self._press_time = time.perf_counter()
+                self._press_time_ns = now
                 self.state = TimerState.WAITING_FOR_START
             case TimerState.WAITING_FOR_START:
-                if self._check_hold_duration() and not self._was_key_released_after_stop:
+                if self._check_hold_duration(now) and not self._was_key_released_after_stop:
                     self.state = TimerState.READY_TO_START
             case TimerState.READY_TO_START:
                 pass
             case TimerState.RUNNING:
+                self._elapsed_time_ns = min(now - self._start_time_ns, self.MAXIMUM_TIME_NS)
                 self._was_key_released_after_stop = True
                 self.state = TimerState.STOPPED
 
-    def on_release(self) -> None:
+    def on_release(self, timestamp_ns: int | None = None) -> None:
+        """キーが離されたときに呼ぶ。
+
+        Args:
+            timestamp_ns: キーのイベントが届いた時刻 (time.perf_counter_ns)。省略すると呼んだ時刻になる。
+        """
+
+        now: int = self._get_event_time_ns(timestamp_ns)
+
         match self.state:
             case TimerState.STOPPED:
                 self._was_key_released_after_stop = False
@@ -52,7 +89,7 @@ class Timer:
                 self.state = TimerState.STOPPED
             case TimerState.READY_TO_START:
                 if not self._was_key_released_after_stop:
-                    self._start_time = time.perf_counter()
+                    self._start_time_ns = now
                     self.state = TimerState.RUNNING
                 else:
                     self.state = TimerState.STOPPED
@@ -60,15 +97,19 @@ class Timer:
                 pass
 
     @property
-    def elapsed_time(self) -> float:
+    def elapsed_time_ns(self) -> int:
         match self.state:
             case TimerState.STOPPED | TimerState.WAITING_FOR_START:
-                return self._elapsed_time
+                return self._elapsed_time_ns
             case TimerState.READY_TO_START:
-                return self.INIT_TIME
+                return 0
             case TimerState.RUNNING:
-                self._elapsed_time = time.perf_counter() - self._start_time
-                return min(self._elapsed_time, self.MAXIMUM_TIME)
+                self._elapsed_time_ns = time.perf_counter_ns() - self._start_time_ns
+                return min(self._elapsed_time_ns, self.MAXIMUM_TIME_NS)
+
+    @property
+    def elapsed_time(self) -> float:
+        return self.elapsed_time_ns / 1e9
 
     @staticmethod
     def _convert_seconds_to_hms(seconds: float) -> tuple[int, int, float]:
@@ -0,0 +1,597 @@
+"""Kociemba の 2 フェーズアルゴリズムで 3x3x3 を解いて、ランダムな状態のスクランブルを作る。
+
+フェーズ 1 では、コーナーの向き (twist)、エッジの向き (flip)、 E 層のエッジの位置 (slice) を揃えて、
+<U, D, R2, F2, L2, B2> だけで解ける状態 (G1) にする。
+フェーズ 2 では、 G1 の回転記号だけでコーナーの並び、 U/D 層のエッジの並び、 E 層のエッジの並びを揃える。
+どちらも移動表と枝刈り表を使った IDA* で探索する。
+
+表は一度だけ生成して、キャッシュディレクトリのファイルに保存する。 (生成には数十秒かかる)
+2 回目からはファイルをメモリマップするので、読み込みはすぐに終わる。
+"""
+
+import itertools
+import math
+import mmap
+import multiprocessing
+import os
+import random
+from array import array
+from collections.abc import Callable, Sequence
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import Literal, NamedTuple, Self
+
+from sctt.utils import original_stderr
+
+# 面の順番。回転記号のインデックスは face * 3 + (回す回数 - 1)
+FACES: str = "URFDLB"
+MOVES: tuple[str, ...] = tuple(face + power for face in FACES for power in ("", "2", "'"))
+# フェーズ 2 で使う回転記号 (U, D と R2, F2, L2, B2) のインデックス
+PHASE2_MOVES: tuple[int, ...] = (0, 1, 2, 4, 7, 9, 10, 11, 13, 16)
+PHASE2_MOVE_SET: frozenset[int] = frozenset(PHASE2_MOVES)
+
+N_MOVES: int = len(MOVES)
+N_PHASE2_MOVES: int = len(PHASE2_MOVES)
+N_TWIST: int = 3**7
+N_FLIP: int = 2**11
+N_SLICE: int = math.comb(12, 4)
+N_CORNERS: int = math.factorial(8)
+N_UD_EDGES: int = math.factorial(8)
+N_SLICE_PERM: int = math.factorial(4)
+
+# 解の最大の長さ。短くするほど探索に時間がかかる。
+MAX_LENGTH: int = 22
+
+TABLES_FILE_NAME: str = "two_phase_tables_v1.bin"
+# 表のファイルの中身 (名前, array の型, 要素数) 。ファイルはこの順に表をつなげたもの。
+# (キャッシュなので、バイトオーダーはそのマシンのもの)
+TABLE_LAYOUT: tuple[tuple[str, Literal["B", "H"], int], ...] = (
+    ("twist_move", "H", N_TWIST * N_MOVES),
+    ("flip_move", "H", N_FLIP * N_MOVES),
+    ("slice_move", "H", N_SLICE * N_MOVES),
+    ("corners_move", "H", N_CORNERS * N_PHASE2_MOVES),
+    ("ud_edges_move", "H", N_UD_EDGES * N_PHASE2_MOVES),
+    ("slice_perm_move", "H", N_SLICE_PERM * N_PHASE2_MOVES),
+    ("slice_twist_prune", "B", N_SLICE * N_TWIST),
+    ("slice_flip_prune", "B", N_SLICE * N_FLIP),
+    ("corners_slice_prune", "B", N_CORNERS * N_SLICE_PERM),
+    ("ud_edges_slice_prune", "B", N_UD_EDGES * N_SLICE_PERM),
+)
+
+
+class CubieCube(NamedTuple):
+    """キューブの状態をピースの位置と向きで表す。
+
+    コーナーは URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB の順、
+    エッジは UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR の順。
+    cp[i] は位置 i にあるコーナー、 co[i] はその向き。 (エッジも同じ)
+    """
+
+    cp: tuple[int, ...]
+    co: tuple[int, ...]
+    ep: tuple[int, ...]
+    eo: tuple[int, ...]
+
+    def multiply(self, other: Self) -> Self:
+        """self の後に other を適用した状態を返す。"""
+
+        return type(self)(
+            tuple(self.cp[p] for p in other.cp),
+            tuple((self.co[p] + o) % 3 for p, o in zip(other.cp, other.co, strict=True)),
+            tuple(self.ep[p] for p in other.ep),
+            tuple((self.eo[p] + o) % 2 for p, o in zip(other.ep, other.eo, strict=True)),
+        )
+
+
+SOLVED: CubieCube = CubieCube(tuple(range(8)), (0,) * 8, tuple(range(12)), (0,) * 12)
+# 各面を時計回りに 90 度回したときの状態 (FACES の順)
+FACE_CUBES: tuple[CubieCube, ...] = (
+    CubieCube(
+        (3, 0, 1, 2, 4, 5, 6, 7), (0,) * 8, (3, 0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11), (0,) * 12
+    ),
+    CubieCube(
+        (4, 1, 2, 0, 7, 5, 6, 3),
+        (2, 0, 0, 1, 1, 0, 0, 2),
+        (8, 1, 2, 3, 11, 5, 6, 7, 4, 9, 10, 0),
+        (0,) * 12,
+    ),
+    CubieCube(
+        (1, 5, 2, 3, 0, 4, 6, 7),
+        (1, 2, 0, 0, 2, 1, 0, 0),
+        (0, 9, 2, 3, 4, 8, 6, 7, 1, 5, 10, 11),
+        (0, 1, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0),
+    ),
+    CubieCube(
+        (0, 1, 2, 3, 5, 6, 7, 4), (0,) * 8, (0, 1, 2, 3, 5, 6, 7, 4, 8, 9, 10, 11), (0,) * 12
+    ),
+    CubieCube(
+        (0, 2, 6, 3, 4, 1, 5, 7),
+        (0, 1, 2, 0, 0, 2, 1, 0),
+        (0, 1, 10, 3, 4, 5, 9, 7, 8, 2, 6, 11),
+        (0,) * 12,
+    ),
+    CubieCube(
+        (0, 1, 3, 7, 4, 5, 2, 6),
+        (0, 0, 1, 2, 0, 0, 2, 1),
+        (0, 1, 2, 11, 4, 5, 6, 10, 8, 9, 3, 7),
+        (0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 1),
+    ),
+)
+
+
+def _generate_move_cubes() -> tuple[CubieCube, ...]:
+    move_cubes: list[CubieCube] = []
+
+    for face_cube in FACE_CUBES:
+        cube: CubieCube = SOLVED
+
+        for _ in range(3):
+            cube = cube.multiply(face_cube)
+            move_cubes.append(cube)
+
+    return tuple(move_cubes)
+
+
+# MOVES の各回転記号を適用したときの状態
+MOVE_CUBES: tuple[CubieCube, ...] = _generate_move_cubes()
+
+
+def get_twist(cube: CubieCube) -> int:
+    twist: int = 0
+
+    for orientation in cube.co[:7]:
+        twist = twist * 3 + orientation
+
+    return twist
+
+
+def get_flip(cube: CubieCube) -> int:
+    flip: int = 0
+
+    for orientation in cube.eo[:11]:
+        flip = flip * 2 + orientation
+
+    return flip
+
+
+def get_slice(cube: CubieCube) -> int:
+    """E 層のエッジ (FR, FL, BL, BR) がある 4 つの位置の組み合わせの番号 (揃っているときは 0)"""
+
+    slice_: int = 0
+    count: int = 0
+
+    for position in range(11, -1, -1):
+        if cube.ep[position] >= 8:
+            count += 1
+            slice_ += math.comb(11 - position, count)
+
+    return slice_
+
+
+def _get_permutation_rank(permutation: Sequence[int]) -> int:
+    """0 から n - 1 までの並びの辞書順の番号"""
+
+    rank: int = 0
+
+    for i, value in enumerate(permutation):
+        rank = rank * (len(permutation) - i) + sum(
+            1 for later in permutation[i + 1 :] if later < value
+        )
+
+    return rank
+
+
+def get_corners(cube: CubieCube) -> int:
+    return _get_permutation_rank(cube.cp)
+
+
+def get_ud_edges(cube: CubieCube) -> int:
+    """U 層と D 層のエッジの並びの番号 (G1 の状態でのみ意味がある)"""
+
+    return _get_permutation_rank(cube.ep[:8])
+
+
+def get_slice_perm(cube: CubieCube) -> int:
+    """E 層のエッジの並びの番号 (G1 の状態でのみ意味がある)"""
+
+    return _get_permutation_rank([edge - 8 for edge in cube.ep[8:]])
+
+
+def _twist_cube(twist: int) -> CubieCube:
+    co: list[int] = [0] * 8
+
+    for i in range(6, -1, -1):
+        twist, co[i] = divmod(twist, 3)
+
+    co[7] = -sum(co) % 3
+    return SOLVED._replace(co=tuple(co))
+
+
+def _flip_cube(flip: int) -> CubieCube:
+    eo: list[int] = [0] * 12
+
+    for i in range(10, -1, -1):
+        flip, eo[i] = divmod(flip, 2)
+
+    eo[11] = sum(eo) % 2
+    return SOLVED._replace(eo=tuple(eo))
+
+
+def _slice_cube(slice_: int) -> CubieCube:
+    ep: list[int] = [-1] * 12
+    count: int = 4
+    slice_edge: int = 8
+
+    for position in range(12):
+        if count > 0 and slice_ >= (combinations := math.comb(11 - position, count)):
+            ep[position] = slice_edge
+            slice_edge += 1
+            slice_ -= combinations
+            count -= 1
+
+    other_edges: list[int] = list(range(8))
+    return SOLVED._replace(ep=tuple(edge if edge >= 0 else other_edges.pop(0) for edge in ep))
+
+
+def _build_move_table(
+    size: int,
+    to_cube: Callable[[int], CubieCube],
+    from_cube: Callable[[CubieCube], int],
+    moves: Sequence[int],
+) -> array[int]:
+    """座標 c に moves[i] を適用した座標を table[c * len(moves) + i] に持つ移動表を作る。"""
+
+    table: array[int] = array("H")
+
+    for coordinate in range(size):
+        cube: CubieCube = to_cube(coordinate)
+        table.extend(from_cube(cube.multiply(MOVE_CUBES[move])) for move in moves)
+
+    return table
+
+
+def _build_permutation_move_table(
+    n: int, get_positions: Callable[[CubieCube], Sequence[int]], moves: Sequence[int]
+) -> array[int]:
+    """n 個のピースの並びの移動表を作る。
+
+    get_positions は回転記号の状態から、各位置に移ってくるピースの元の位置を返す。
+    並びの番号は辞書順なので、 itertools.permutations の順番と一致する。
+    """
+
+    permutations: list[tuple[int, ...]] = list(itertools.permutations(range(n)))
+    ranks: dict[tuple[int, ...], int] = {
+        permutation: rank for rank, permutation in enumerate(permutations)
+    }
+    move_positions: list[Sequence[int]] = [get_positions(MOVE_CUBES[move]) for move in moves]
+    table: array[int] = array("H")
+
+    for permutation in permutations:
+        table.extend(
+            ranks[tuple([permutation[p] for p in positions])] for positions in move_positions
+        )
+
+    return table
+
+
+def _build_pruning_table(
+    move_a: Sequence[int], size_b: int, move_b: Sequence[int], n_moves: int
+) -> bytearray:
+    """2 つの座標 (a * size_b + b) を揃えるのに必要な最小の手数の表を幅優先探索で作る。"""
+
+    size: int = len(move_a) // n_moves * size_b
+    table: bytearray = bytearray(b"\xff") * size
+    table[0] = 0
+    filled: int = 1
+    depth: int = 0
+
+    while filled < size:
+        marker: bytes = bytes((depth,))
+        index: int = table.find(marker)
+
+        while index != -1:
+            a, b = divmod(index, size_b)
+
+            for next_a, next_b in zip(
+                move_a[a * n_moves : (a + 1) * n_moves],
+                move_b[b * n_moves : (b + 1) * n_moves],
+                strict=True,
+            ):
+                if table[next_index := next_a * size_b + next_b] == 0xFF:
+                    table[next_index] = depth + 1
+                    filled += 1
+
+            index = table.find(marker, index + 1)
+
+        depth += 1
+
+    return table
+
+
+def generate_tables() -> dict[str, array[int] | bytearray]:
+    """移動表と枝刈り表を生成する。 (数十秒かかる)"""
+
+    all_moves: range = range(N_MOVES)
+    tables: dict[str, array[int] | bytearray] = {
+        "twist_move": _build_move_table(N_TWIST, _twist_cube, get_twist, all_moves),
+        "flip_move": _build_move_table(N_FLIP, _flip_cube, get_flip, all_moves),
+        "slice_move": _build_move_table(N_SLICE, _slice_cube, get_slice, all_moves),
+        "corners_move": _build_permutation_move_table(8, lambda cube: cube.cp, PHASE2_MOVES),
+        "ud_edges_move": _build_permutation_move_table(
+            8, lambda cube: cube.ep[:8], PHASE2_MOVES
+        ),
+        "slice_perm_move": _build_permutation_move_table(
+            4, lambda cube: [edge - 8 for edge in cube.ep[8:]], PHASE2_MOVES
+        ),
+    }
+    tables["slice_twist_prune"] = _build_pruning_table(
+        tables["slice_move"], N_TWIST, tables["twist_move"], N_MOVES
+    )
+    tables["slice_flip_prune"] = _build_pruning_table(
+        tables["slice_move"], N_FLIP, tables["flip_move"], N_MOVES
+    )
+    tables["corners_slice_prune"] = _build_pruning_table(
+        tables["corners_move"], N_SLICE_PERM, tables["slice_perm_move"], N_PHASE2_MOVES
+    )
+    tables["ud_edges_slice_prune"] = _build_pruning_table(
+        tables["ud_edges_move"], N_SLICE_PERM, tables["slice_perm_move"], N_PHASE2_MOVES
+    )
+
+    return tables
+
+
+def get_tables_file(directory: Path) -> Path:
+    return directory / TABLES_FILE_NAME
+
+
+def save_tables(directory: Path) -> None:
+    """表を生成してファイルに保存する。
+
+    一時ファイルに書いてから置き換えるので、ファイルがあれば中身は完全にそろっている。
+    """
+
+    tables: dict[str, array[int] | bytearray] = generate_tables()
+    file: Path = get_tables_file(directory)
+    temporary_file: Path = file.with_name(f"{file.name}.{os.getpid()}.tmp")
+
+    with open(temporary_file, "wb") as f:
+        for name, _, _ in TABLE_LAYOUT:
+            f.write(tables[name])
+
+    os.replace(temporary_file, file)
+
+
+def generate_tables_in_background(directory: Path) -> BaseProcess | None:
+    """表のファイルが無ければ、別のプロセスで生成を始めてそのプロセスを返す。
+
+    アプリのスレッドとは関係なく動くように spawn で起動する。
+    デーモンプロセスなので、アプリが終了すると生成も中断される。 (次に起動したときにやり直す)
+    """
+
+    if get_tables_file(directory).exists():
+        return None
+
+    process: BaseProcess = multiprocessing.get_context("spawn").Process(
+        target=save_tables, args=(directory,), name="sctt-two-phase-tables", daemon=True
+    )
+
+    # アプリの実行中に呼ばれるので、 Textual が置き換えた sys.stderr を元に戻して起動する。
+    with original_stderr():
+        process.start()
+
+    return process
+
+
+class TwoPhaseTables(NamedTuple):
+    twist_move: Sequence[int]
+    flip_move: Sequence[int]
+    slice_move: Sequence[int]
+    corners_move: Sequence[int]
+    ud_edges_move: Sequence[int]
+    slice_perm_move: Sequence[int]
+    slice_twist_prune: Sequence[int]
+    slice_flip_prune: Sequence[int]
+    corners_slice_prune: Sequence[int]
+    ud_edges_slice_prune: Sequence[int]
+
+    @classmethod
+    def load(cls, directory: Path) -> Self | None:
+        """表のファイルをメモリマップして読み込む。ファイルが無いか壊れている場合は None を返す。"""
+
+        try:
+            with open(get_tables_file(directory), "rb") as f:
+                data: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        view: memoryview = memoryview(data)
+        tables: list[memoryview] = []
+        offset: int = 0
+
+        for _, typecode, length in TABLE_LAYOUT:
+            size: int = array(typecode).itemsize * length
+            tables.append(view[offset : offset + size].cast(typecode))
+            offset += size
+
+        if offset != len(view):
+            return None
+
+        return cls(*tables)
+
+
+class TwoPhaseSolver:
+    """2 フェーズアルゴリズムで 3x3x3 を max_length 手以内で解く。 (最短とは限らない)"""
+
+    def __init__(self, tables: TwoPhaseTables, max_length: int = MAX_LENGTH) -> None:
+        self.tables: TwoPhaseTables = tables
+        self.max_length: int = max_length
+
+    def _phase1_distance(self, twist: int, flip: int, slice_: int) -> int:
+        return max(
+            self.tables.slice_twist_prune[slice_ * N_TWIST + twist],
+            self.tables.slice_flip_prune[slice_ * N_FLIP + flip],
+        )
+
+    def _phase2_distance(self, corners: int, ud_edges: int, slice_perm: int) -> int:
+        return max(
+            self.tables.corners_slice_prune[corners * N_SLICE_PERM + slice_perm],
+            self.tables.ud_edges_slice_prune[ud_edges * N_SLICE_PERM + slice_perm],
+        )
+
+    def _search_phase1(
+        self,
+        cube: CubieCube,
+        moves: list[int],
+        twist: int,
+        flip: int,
+        slice_: int,
+        depth: int,
+        last_face: int,
+    ) -> bool:
+        """moves の後に depth 手で G1 に着く手順を探し、見つかったらフェーズ 2 に進む。
+
+        解が見つかったら、 moves に解を入れて True を返す。
+        (探索の状態は引数で持つので、複数のスレッドから同時に solve を呼べる)
+        """
+
+        if depth == 0:
+            # U や R2 で終わる解は、それより短い解で G1 に着いているので調べない。
+            if twist or flip or slice_ or (moves and moves[-1] in PHASE2_MOVE_SET):
+                return False
+
+            return self._start_phase2(cube, moves)
+
+        tables: TwoPhaseTables = self.tables
+
+        for move in range(N_MOVES):
+            # 同じ面を続けて回したり、向かい合う面を両方の順番で回したりしない。
+            if (face := move // 3) == last_face or face == last_face - 3:
+                continue
+
+            next_twist: int = tables.twist_move[twist * N_MOVES + move]
+            next_flip: int = tables.flip_move[flip * N_MOVES + move]
+            next_slice: int = tables.slice_move[slice_ * N_MOVES + move]
+
+            if self._phase1_distance(next_twist, next_flip, next_slice) >= depth:
+                continue
+
+            moves.append(move)
+
+            if self._search_phase1(
+                cube, moves, next_twist, next_flip, next_slice, depth - 1, face
+            ):
+                return True
+
+            moves.pop()
+
+        return False
+
+    def _start_phase2(self, cube: CubieCube, moves: list[int]) -> bool:
+        for move in moves:
+            cube = cube.multiply(MOVE_CUBES[move])
+
+        corners: int = get_corners(cube)
+        ud_edges: int = get_ud_edges(cube)
+        slice_perm: int = get_slice_perm(cube)
+        last_face: int = moves[-1] // 3 if moves else -1
+
+        for depth in range(
+            self._phase2_distance(corners, ud_edges, slice_perm),
+            self.max_length - len(moves) + 1,
+        ):
+            if self._search_phase2(moves, corners, ud_edges, slice_perm, depth, last_face):
+                return True
+
+        return False
+
+    def _search_phase2(
+        self,
+        moves: list[int],
+        corners: int,
+        ud_edges: int,
+        slice_perm: int,
+        depth: int,
+        last_face: int,
+    ) -> bool:
+        if depth == 0:
+            return corners == ud_edges == slice_perm == 0
+
+        tables: TwoPhaseTables = self.tables
+
+        for i, move in enumerate(PHASE2_MOVES):
+            if (face := move // 3) == last_face or face == last_face - 3:
+                continue
+
+            next_corners: int = tables.corners_move[corners * N_PHASE2_MOVES + i]
+            next_ud_edges: int = tables.ud_edges_move[ud_edges * N_PHASE2_MOVES + i]
+            next_slice_perm: int = tables.slice_perm_move[slice_perm * N_PHASE2_MOVES + i]
+
+            if self._phase2_distance(next_corners, next_ud_edges, next_slice_perm) >= depth:
+                continue
+
+            moves.append(move)
+
+            if self._search_phase2(
+                moves, next_corners, next_ud_edges, next_slice_perm, depth - 1, face
+            ):
+                return True
+
+            moves.pop()
+
+        return False
+
+    def solve(self, cube: CubieCube) -> list[str]:
+        """cube を解く回転記号のリストを返す。 max_length 手以内の解が無い場合は ValueError を送出する。"""
+
+        moves: list[int] = []
+        twist: int = get_twist(cube)
+        flip: int = get_flip(cube)
+        slice_: int = get_slice(cube)
+
+        for depth in range(self._phase1_distance(twist, flip, slice_), self.max_length + 1):
+            if self._search_phase1(cube, moves, twist, flip, slice_, depth, -1):
+                return [MOVES[move] for move in moves]
+
+        raise ValueError(f"No solution within {self.max_length} moves.")
+
+
+def _get_parity(permutation: Sequence[int]) -> int:
+    return (
+        sum(
+            1
+            for i, value in enumerate(permutation)
+            for later in permutation[i + 1 :]
+            if later < value
+        )
+        % 2
+    )
+
+
+def generate_random_cube(rng: random.Random | None = None) -> CubieCube:
+    """解ける状態の中から一様にランダムな状態を返す。"""
+
+    rng = rng or random.Random()
+    cp: list[int] = rng.sample(range(8), 8)
+    ep: list[int] = rng.sample(range(12), 12)
+
+    # コーナーとエッジの入れ替えの偶奇は一致する。
+    if _get_parity(cp) != _get_parity(ep):
+        ep[0], ep[1] = ep[1], ep[0]
+
+    co: list[int] = [rng.randrange(3) for _ in range(7)]
+    eo: list[int] = [rng.randrange(2) for _ in range(11)]
+
+    return CubieCube(tuple(cp), (*co, -sum(co) % 3), tuple(ep), (*eo, sum(eo) % 2))
+
+
+def invert_moves(moves: Sequence[str]) -> list[str]:
+    inverse_powers: dict[str, str] = {"": "'", "'": "", "2": "2"}
+    return [move[0] + inverse_powers[move[1:]] for move in reversed(moves)]
+
+
+def generate_random_state_scramble(
+    solver: TwoPhaseSolver, rng: random.Random | None = None
+) -> str:
+    """ランダムな状態を作り、その状態にする手順 (解の逆) をスクランブルとして返す。"""
+
+    return " ".join(invert_moves(solver.solve(generate_random_cube(rng))))
@@ -1,13 +1,13 @@
+import functools
 import os
 from enum import Enum, auto
-from itertools import chain
 
 from rich.console import Console, ConsoleOptions, RenderResult
 from rich.measure import Measurement
 from rich.segment import Segment
 from rich.style import Style
 
-from sctt.modules.simulate import Cube
+from sctt.modules.simulate import FACE_COLORS, FACE_ORDER, Cube
 
 # x11 で Tmux を起動しているとき tty で新たに起動した Tmux で CubeNet の色が正しく表示されなかった。
 # XDG_SESSION_TYPE の値が x11 から tty に変わらないみたい。
@@ -31,9 +31,24 @@ class CubeNet:
         "B": "#0055ff",  # 0000ff にすると、 vscode で見づらいから 0055ff を指定する。
         "Y": "#ffee00",  # 眩しさを軽減
     }
-
-    def __init__(self, size: int = 3, sticker_size: StickerSize = StickerSize.NORMAL) -> None:
-        self._cube: Cube = Cube(size)
+    # 描画した Segment をキューブの状態とステッカーの大きさごとにキャッシュしておく数
+    LINES_CACHE_SIZE: int = 16
+    _lines_cache: dict[tuple[bytes, int, StickerSize], tuple[Segment, ...]] = {}
+
+    def __init__(
+        self,
+        size: int = 3,
+        sticker_size: StickerSize = StickerSize.NORMAL,
+        cube: Cube | None = None,
+    ) -> None:
+        """
+        Args:
+            size: キューブのサイズ。 cube を指定した場合は無視される。
+            sticker_size: ステッカーの大きさ
+            cube: 表示するキューブ。スクランブルを適用済みのキューブを表示する場合に指定する。
+        """
+
+        self._cube: Cube = Cube(size) if cube is None else cube
         self.sticker_size = sticker_size
 
     def _set_sticker_values(self, sticker_size: StickerSize) -> None:
@@ -91,82 +106,107 @@ class CubeNet:
             + self._face_bottom_padding * 2
         )
 
-    def _create_sticker(self, sticker: str, color_char: str | None = None) -> RenderResult:
-        style = Style(color=self.COLOR_MAP[color_char]) if color_char is not None else None
-        yield Segment(sticker, style=style)
-
-    def _create_dummy_face_row(self) -> RenderResult:
-        for i in range(1, self._cube.size + 1):
-            # デバック時にスペースでは見にくいので色付きのダミーステッカーを使う。
-            # yield Segment(self._sticker, Style(color="#252525"))
-            yield from self._create_sticker(" " * self._sticker_width)
-
-            if i < self._cube.size:
-                yield Segment(" " * self._letter_spacing)
-
-    def _render_top_face(self) -> RenderResult:
-        for i, face_row in enumerate(self._cube.faces["U"], start=1):
-            # Prefix
-            yield from self._create_dummy_face_row()
-            yield Segment(" " * self._face_right_padding)
-
-            for j, color_char in enumerate(face_row, start=1):
-                yield from self._create_sticker(self._sticker, color_char)
-
-                if j < self._cube.size:
-                    yield Segment(" " * self._letter_spacing)
-
-            yield Segment("\n")
-
-            if i < self._cube.size:
-                yield Segment("\n" * self._line_spacing)
-
-    def _render_middle_faces(self) -> RenderResult:
-        zipped = zip(
-            self._cube.faces["L"],
-            self._cube.faces["F"],
-            self._cube.faces["R"],
-            self._cube.faces["B"],
-            strict=False,
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_styles(color_map: tuple[tuple[str, str], ...]) -> tuple[Style, ...]:
+        """FACE_COLORS の順に並べた各色の Style を返す。 (色の対応ごとに一度だけ作る)"""
+
+        colors: dict[str, str] = dict(color_map)
+        return tuple(Style(color=colors[color_char]) for color_char in FACE_COLORS)
+
+    def _create_face_row(
+        self, stickers: bytes, styles: tuple[Style, ...], padding: int
+    ) -> list[Segment]:
+        """1 行分のステッカーの Segment を返す。
+
+        ステッカーの後ろの隙間はそのステッカーと同じ Style で塗るので (文字色だけなので見た目は変わらない)、
+        同じ色が並ぶところは 1 つの Segment にまとめる。
+
+        Args:
+            stickers: 1 行分のステッカーの色 (FACE_COLORS のインデックス)
+            styles: 各色の Style
+            padding: 最後のステッカーの後ろに付ける空白の幅
+        """
+
+        segments: list[Segment] = []
+        text: str = ""
+        current: int | None = None
+        spacing: str = " " * self._letter_spacing
+
+        for i, color in enumerate(stickers, start=1):
+            if color != current and current is not None:
+                segments.append(Segment(text, styles[current]))
+                text = ""
+
+            current = color
+            text += self._sticker
+
+            if i < len(stickers):
+                text += spacing
+
+        if current is not None:
+            segments.append(Segment(text + " " * padding, styles[current]))
+
+        return segments
+
+    def _render_lines(self) -> tuple[Segment, ...]:
+        size: int = self._cube.size
+        area: int = size * size
+        state: bytes = self._cube.state
+        styles: tuple[Style, ...] = self._get_styles(tuple(self.COLOR_MAP.items()))
+        # U と D の面の左側の空白 (L の面の幅と右側の余白)
+        prefix: Segment = Segment(
+            " " * (self._sticker_width * size + self._letter_spacing * (size - 1))
+            + " " * self._face_right_padding
         )
-
-        for i, faces_rows in enumerate(zipped, start=1):
-            for j, color_char in enumerate(chain.from_iterable(faces_rows)):
-                yield from self._create_sticker(self._sticker, color_char)
-
-                if j % self._cube.size == self._cube.size - 1:
-                    yield Segment(" " * self._face_right_padding)
+        line_spacing: list[Segment] = [Segment.line()] * self._line_spacing
+        face_bottom_padding: list[Segment] = [Segment.line()] * self._face_bottom_padding
+        segments: list[Segment] = []
+
+        def get_row(face: int, row: int) -> bytes:
+            start: int = face * area + row * size
+            return state[start : start + size]
+
+        for face in (FACE_ORDER.index("U"), None, FACE_ORDER.index("D")):
+            for row in range(size):
+                if face is None:
+                    for middle_face in ("L", "F", "R", "B"):
+                        segments += self._create_face_row(
+                            get_row(FACE_ORDER.index(middle_face), row),
+                            styles,
+                            self._face_right_padding,
+                        )
                 else:
-                    yield Segment(" " * self._letter_spacing)
+                    segments.append(prefix)
+                    segments += self._create_face_row(get_row(face, row), styles, 0)
 
-            yield Segment("\n")
+                segments.append(Segment.line())
 
-            if i < self._cube.size:
-                yield Segment("\n" * self._line_spacing)
+                if row < size - 1:
+                    segments += line_spacing
 
-    def _render_bottom_face(self) -> RenderResult:
-        for i, face_row in enumerate(self._cube.faces["D"], start=1):
-            # Prefix
-            yield from self._create_dummy_face_row()
-            yield Segment(" " * self._face_right_padding)
+            if face != FACE_ORDER.index("D"):
+                segments += face_bottom_padding
 
-            for j, color_char in enumerate(face_row, start=1):
-                yield from self._create_sticker(self._sticker, color_char)
+        return tuple(segments)
 
-                if j < self._cube.size:
-                    yield Segment(" " * self._letter_spacing)
+    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
+        key: tuple[bytes, int, StickerSize] = (
+            self._cube.state,
+            self._cube.size,
+            self._sticker_size,
+        )
 
-            yield Segment("\n")
+        # 最近使ったものが後ろに来るように入れ直して、溢れたら先頭 (一番古いもの) から消す。
+        if (lines := self._lines_cache.pop(key, None)) is None:
+            lines = self._render_lines()
 
-            if i < self._cube.size:
-                yield Segment("\n" * self._line_spacing)
+            if len(self._lines_cache) >= self.LINES_CACHE_SIZE:
+                del self._lines_cache[next(iter(self._lines_cache))]
 
-    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
-        yield from self._render_top_face()
-        yield Segment("\n" * self._face_bottom_padding)
-        yield from self._render_middle_faces()
-        yield Segment("\n" * self._face_bottom_padding)
-        yield from self._render_bottom_face()
+        self._lines_cache[key] = lines
+
+        yield from lines
 
     def __rich_measure__(self, console: Console, options: ConsoleOptions) -> Measurement:
         return Measurement(self.width, self.width)
@@ -49,10 +49,14 @@ class SessionManagerScreen(ModalScreen[int]):
         Binding("r", "rename_session", "Rename"),
     ]
 
+    # セッションが多い場合は、この数ずつ行を追加して画面をすぐに表示する。
+    LAZY_LOAD_BATCH_SIZE: int = 50
+
     def __init__(self, database: Database, current_session_id: int) -> None:
         super().__init__()
         self.db: Database = database
         self.current_session_id: int = current_session_id
+        self._pending_sessions: list[tuple[Any, ...]] = []
 
     def compose(self) -> ComposeResult:
         with Body():
@@ -70,25 +74,55 @@ class SessionManagerScreen(ModalScreen[int]):
         table.add_column("name", key="name")
         table.add_column("solve", key="solve")
         table.add_column("mean", key="mean")
+        table.add_column("best", key="best")
+        table.add_column(f"best ao{self.db.ao_sizes[0]}", key="best_ao")
         table.add_column("created_at", key="created_at")
         table.add_column("updated_at", key="updated_at")
 
-        for session in self.db.get_all_sessions():
+        self._pending_sessions = self.db.get_session_summaries()[::-1]
+        self._add_pending_sessions_to_table()
+
+    def _add_pending_sessions_to_table(self) -> None:
+        """未追加のセッションを LAZY_LOAD_BATCH_SIZE 個ずつ表に追加する。
+
+        残りがある場合は、画面を再描画したあとに続きを追加する。
+        """
+
+        table = self.query_one(MyDataTable[Text])
+
+        for _ in range(min(self.LAZY_LOAD_BATCH_SIZE, len(self._pending_sessions))):
+            session: tuple[Any, ...] = self._pending_sessions.pop()
             self.add_session_to_table(session)
 
-        table.move_cursor(row=table.get_row_index(str(self.current_session_id)))
+            if session[0] == self.current_session_id:
+                table.move_cursor(row=table.get_row_index(str(self.current_session_id)))
+
+        if self._pending_sessions:
+            self.call_after_refresh(self._add_pending_sessions_to_table)
+
+    @staticmethod
+    def _format_time(time: float | str) -> str:
+        if isinstance(time, str):
+            return time
+        elif isnan(time):
+            return "-"
+        else:
+            return Timer.format_time(time, 2)
 
     def add_session_to_table(self, session: tuple[Any, ...]) -> None:
-        session_id, name, created_at, updated_at = session
-        mean: float = self.db.calculate_solve_mean(session_id)
+        """
+        Args:
+            session: Database.get_session_summary の戻り値
+        """
+
+        session_id, name, solve_count, mean, best, best_ao, created_at, updated_at = session
 
         self.query_one(MyDataTable[Text]).add_row(
             Text(name, justify="center"),
-            Text(str(self.db.get_solve_count(session_id)), justify="center"),
-            Text(
-                "-" if isnan(mean) else Timer.format_time(mean, 2),
-                justify="center",
-            ),
+            Text(str(solve_count), justify="center"),
+            Text(self._format_time(mean), justify="center"),
+            Text(self._format_time(best), justify="center"),
+            Text(self._format_time(best_ao), justify="center"),
             Text(convert_utc_to_local(created_at), justify="center"),
             Text(convert_utc_to_local(updated_at), justify="center"),
             key=str(session_id),
@@ -102,7 +136,7 @@ class SessionManagerScreen(ModalScreen[int]):
                 if session_id is None:
                     raise ValueError("Failed to create session.")
 
-                self.add_session_to_table(self.db.get_session(session_id))
+                self.add_session_to_table(self.db.get_session_summary(session_id))
 
         self.app.push_screen(InputSessionScreen(), handle_result)
 
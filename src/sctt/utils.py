@@ -1,3 +1,6 @@
+import contextlib
+import sys
+from collections.abc import Iterator
 from datetime import datetime, timezone
 
 
@@ -16,3 +19,17 @@ def convert_utc_to_local(utc_time: str) -> str:
     local_dt: datetime = utc_dt.astimezone()
 
     return local_dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+@contextlib.contextmanager
+def original_stderr() -> Iterator[None]:
+    """Restore sys.stderr to sys.__stderr__ inside the with block.
+
+    Textual replaces sys.stderr while the app is running with an object whose fileno()
+    returns -1. Starting a spawn-context process passes sys.stderr.fileno() to the
+    multiprocessing resource tracker, which then fails with
+    "ValueError: bad value(s) in fds_to_keep", so start child processes inside this block.
+    """
+
+    with contextlib.redirect_stderr(sys.__stderr__):
+        yield
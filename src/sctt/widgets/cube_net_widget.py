@@ -1,6 +1,7 @@
 from textual.app import ComposeResult
 from textual.widgets import Static
 
+from sctt.modules.simulate import Cube
 from sctt.renderables.cube_net import CubeNet, StickerSize
 from sctt.widgets.my_scrollable_container import MyScrollableContainer
 
@@ -47,6 +48,11 @@ class CubeNetWidget(MyScrollableContainer):
     def apply_scramble(self, scramble: str) -> None:
         self._cube_net.apply_scramble(scramble)
 
+    def set_cube(self, cube: Cube) -> None:
+        """スクランブルを適用済みのキューブを表示するキューブにする。"""
+
+        self._cube_net = CubeNet(cube=cube)
+
     def on_resize(self) -> None:
         self.update()
 
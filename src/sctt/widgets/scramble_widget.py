@@ -7,7 +7,9 @@ from textual.message import Message
 from textual.reactive import reactive
 from textual.widgets import Static
 
-from sctt.modules.scramble import generate_scramble
+from sctt.locations import get_cache_dir
+from sctt.modules.scramble_queue import ScrambleQueue
+from sctt.modules.simulate import Cube
 from sctt.screens.input_scramble_screen import InputScrambleScreen
 from sctt.version import SCTT_VERSION
 from sctt.widgets.my_select import MySelect
@@ -54,10 +56,25 @@ class ScrambleWidget(Horizontal):
     scramble: reactive[str] = reactive("", init=False, always_update=True)
 
     class Changed(Message):
-        def __init__(self, scramble: str, solve_event: SolveEvent) -> None:
+        def __init__(
+            self, scramble: str, solve_event: SolveEvent, cube: Cube | None = None
+        ) -> None:
+            """
+            Args:
+                scramble: 新しいスクランブル
+                solve_event: スクランブルのイベント
+                cube: scramble を適用済みのキューブ。 (入力されたスクランブルの場合は None)
+            """
+
             super().__init__()
             self.scramble: str = scramble
             self.solve_event: SolveEvent = solve_event
+            self.cube: Cube | None = cube
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.scramble_queue: ScrambleQueue = ScrambleQueue(tables_dir=get_cache_dir())
+        self._cube: Cube | None = None
 
     @staticmethod
     def get_cube_size(solve_event: SolveEvent) -> int:
@@ -71,10 +88,15 @@ class ScrambleWidget(Horizontal):
     def on_mount(self) -> None:
         self.solve_event: SolveEvent = SolveEvent.THREE
         self.query_one(VerticalScroll).border_title = f"sctt v{SCTT_VERSION}"
+        self.scramble_queue.start()
+        self.scramble_queue.prefetch(self.get_cube_size(self.solve_event))
+
+    def on_unmount(self) -> None:
+        self.scramble_queue.stop()
 
     def watch_scramble(self, scramble: str) -> None:
         self.query_one(ScrambleDisplay).update(scramble)
-        self.post_message(self.Changed(scramble, self.solve_event))
+        self.post_message(self.Changed(scramble, self.solve_event, self._cube))
 
     def initialize(self) -> None:
         select: MySelect[ScrambleMode] = self.query_one(MySelect[ScrambleMode])
@@ -86,11 +108,15 @@ class ScrambleWidget(Horizontal):
             if scramble is None:
                 self.initialize()
             else:
+                self._cube = None
                 self.scramble = scramble.strip()
 
         match self.scramble_mode:
             case ScrambleMode.GENERATE:
-                self.scramble = generate_scramble(self.get_cube_size(self.solve_event))
+                scramble, self._cube = self.scramble_queue.pop(
+                    self.get_cube_size(self.solve_event)
+                )
+                self.scramble = scramble
             case ScrambleMode.INPUT:
                 self.app.push_screen(InputScrambleScreen(), _check_scramble)
 
@@ -1,22 +1,75 @@
+import math
+from array import array
+from bisect import bisect_left
 from collections.abc import Iterable, Sequence
+from typing import Any
 
 from rich.text import Text
 
-from sctt.modules.calculate_ao import calculate_ao
+from sctt.modules.calculate_ao import (
+    DEFAULT_AO_SIZES,
+    AOValue,
+    RollingAO,
+    normalize_ao_sizes,
+)
 from sctt.modules.timer import Timer
-from sctt.widgets.my_datatable import MyDataTable
+from sctt.widgets.virtual_data_table import VirtualDataTable
 
 
-class StatsWidget(MyDataTable[Text]):
-    def __init__(self) -> None:
-        super().__init__(cursor_type="cell", zebra_stripes=True)
+class StatsWidget(VirtualDataTable):
+    """ソルブのタイムと ao N の表
+
+    列のデータは配列で持ち、 Text は表示する行の分だけ作る。 (表示は新しいソルブが上)
+    ao N の値は NaN を "-"、 inf を "DNF" として持つ。
+
+    append_solve, remove_solve, update_penalty は変わったソルブと、その後の N - 1 個の ao N だけを
+    RollingAO で計算し直す。 "no." の列は表示するときにインデックスから作るので、
+    追加とペナルティの変更では番号を振り直す必要はない。
+    削除では、それより新しいソルブの番号が 1 つずつ減り、古いソルブの行は 1 つずつ上にずれるので、
+    すべての行を作り直す。 (作り直すのは見えている行のセルだけ)
+    列の幅はこれらの操作では広がるだけで、狭くなるのは update_stats などで表を作り直したときだけ。
+    """
+
+    PENALTIES: tuple[str, ...] = ("", "plus_2", "dnf")
+
+    def __init__(self, ao_sizes: Iterable[int] = DEFAULT_AO_SIZES) -> None:
+        """
+        Args:
+            ao_sizes: 表示する ao N の N のリスト。例 (5, 12, 100) -> ao5, ao12, ao100
+        """
+
+        super().__init__(zebra_stripes=True)
+        self.ao_sizes: tuple[int, ...] = normalize_ao_sizes(ao_sizes)
+        # ソルブの順 (ID の昇順) に並べた列のデータ
+        self._solve_ids: array[int] = array("q")
+        self._times: array[float] = array("d")
+        self._penalties: array[int] = array("b")
+        self._ao_values: list[array[float]] = [array("d") for _ in self.ao_sizes]
+        # time と ao N の列のセルの最大の幅
+        self._content_widths: list[int] = [0] * (1 + len(self.ao_sizes))
+        # 差分で ao N を計算するためのもの。最初に必要になったときに作る。
+        self._rolling_aos: list[RollingAO] | None = None
+
+    @staticmethod
+    def get_ao_column_key(n: int) -> str:
+        return f"ao{n}"
+
+    @staticmethod
+    def parse_ao_column_key(column_key: str) -> int | None:
+        """ao N の列のキーから N を返す。ao N の列でない場合は None を返す。"""
+
+        if column_key.startswith("ao") and column_key[2:].isdecimal():
+            return int(column_key[2:])
+        else:
+            return None
 
     def on_mount(self) -> None:
         # header
-        self.add_column("no.", key="no.")
-        self.add_column("time", key="time")
-        self.add_column("ao5", key="ao5")
-        self.add_column("ao12", key="ao12")
+        self.add_columns(
+            ("no.", "no."),
+            ("time", "time"),
+            *((self.get_ao_column_key(n), self.get_ao_column_key(n)) for n in self.ao_sizes),
+        )
 
     @staticmethod
     def _format_times(solves: Sequence[tuple[int, float, str]]) -> list[str]:
@@ -38,53 +91,249 @@ class StatsWidget(MyDataTable[Text]):
         return result
 
     @staticmethod
-    def _format_ao_values(solves: Sequence[tuple[float, str]], n: int) -> list[str]:
-        result: list[str] = []
+    def _format_ao_number(value: float) -> str:
+        if math.isnan(value):
+            return "-"
+        elif math.isinf(value):
+            return "DNF"
+        else:
+            return Timer.format_time(value, 2)
 
-        for i in range(1, len(solves) + 1):
-            window: Sequence[tuple[float, str]] = solves[i - n : i]
+    def get_row_count(self) -> int:
+        return len(self._solve_ids)
 
-            if len(window) == n:
-                ao_value: float | str = calculate_ao(window)
+    def _get_solve_index(self, row_index: int) -> int:
+        # 表示は新しいソルブが上
+        return len(self._solve_ids) - 1 - row_index
 
-                if isinstance(ao_value, float):
-                    result.append(Timer.format_time(ao_value, 2))
-                else:
-                    result.append(ao_value)
-            else:
-                result.append("-")
+    def _find_solve(self, solve_id: int) -> int:
+        """solve_id のソルブのインデックスを返す。無い場合は KeyError を送出する。"""
 
-        return result
+        index: int = bisect_left(self._solve_ids, solve_id)
 
-    def update(self, solves: Sequence[tuple[int, float, str]]) -> None:
-        self.clear()
+        if index == len(self._solve_ids) or self._solve_ids[index] != solve_id:
+            raise KeyError(solve_id)
+
+        return index
+
+    def _get_penalty_code(self, penalty: str) -> int:
+        if penalty not in self.PENALTIES:
+            raise ValueError(f"Invalid penalty: {penalty}")
+
+        return self.PENALTIES.index(penalty)
+
+    def get_row_key(self, row_index: int) -> str:
+        return str(self._solve_ids[self._get_solve_index(row_index)])
+
+    def get_row_index(self, row_key: str) -> int:
+        return self._get_solve_index(self._find_solve(int(row_key)))
+
+    def _format_cells(self, index: int) -> list[str]:
+        """index 番目のソルブの time と ao N のセルの文字列を返す。"""
+
+        (time,) = self._format_times(
+            [(0, self._times[index], self.PENALTIES[self._penalties[index]])]
+        )
+
+        return [time, *(self._format_ao_number(values[index]) for values in self._ao_values)]
+
+    def create_row(self, row_index: int) -> list[Text]:
+        index: int = self._get_solve_index(row_index)
+
+        return [
+            Text(str(index + 1), justify="center"),
+            *(Text(cell, justify="center") for cell in self._format_cells(index)),
+        ]
+
+    def get_column_content_widths(self) -> list[int]:
+        return [len(str(len(self._solve_ids))), *self._content_widths]
+
+    def _measure_content_widths(self) -> list[int]:
+        # フォーマットしたタイムの長さはタイムが大きいほど長いので、最大値だけを測ればよい。
+        times: dict[str, float] = {}
+
+        for time, penalty in zip(self._times, self._penalties, strict=True):
+            key: str = self.PENALTIES[penalty]
+
+            if time > times.get(key, -math.inf):
+                times[key] = time
+
+        time_width: int = max(
+            (
+                len(formatted)
+                for formatted in self._format_times(
+                    [(0, time, penalty) for penalty, time in times.items()]
+                )
+            ),
+            default=0,
+        )
+
+        ao_widths: list[int] = []
+
+        for values in self._ao_values:
+            widths: list[int] = [0]
+
+            if finite := [value for value in values if math.isfinite(value)]:
+                widths.append(len(Timer.format_time(max(finite), 2)))
+
+            if any(math.isinf(value) for value in values):
+                widths.append(len("DNF"))
+
+            if any(math.isnan(value) for value in values):
+                widths.append(len("-"))
+
+            ao_widths.append(max(widths))
+
+        return [time_width, *ao_widths]
+
+    def _widen_columns(self, indexes: range) -> None:
+        """indexes のソルブのセルが収まるように列の幅を広げる。"""
 
-        num_solves: Iterable[str] = map(str, range(len(solves), 0, -1))
-        times: Iterable[str] = reversed(self._format_times(solves))
+        for index in indexes:
+            self._content_widths = [
+                max(width, len(cell))
+                for width, cell in zip(
+                    self._content_widths, self._format_cells(index), strict=True
+                )
+            ]
+
+    def _get_rolling_aos(self) -> list[RollingAO]:
+        if self._rolling_aos is None:
+            solves: list[tuple[float, str]] = [
+                (time, self.PENALTIES[penalty])
+                for time, penalty in zip(self._times, self._penalties, strict=True)
+            ]
+            self._rolling_aos = [
+                RollingAO(n, solves, map(self._to_ao_value, values))
+                for n, values in zip(self.ao_sizes, self._ao_values, strict=True)
+            ]
+
+        return self._rolling_aos
+
+    def _apply_ao_changes(self, changes: Iterable[dict[int, AOValue]]) -> None:
+        for values, changed in zip(self._ao_values, changes, strict=True):
+            for index, value in changed.items():
+                values[index] = self._to_ao_number(value)
+
+    def append_solve(self, solve_id: int, time: float, penalty: str = "") -> None:
+        """新しいソルブを表の一番上に追加する。
+
+        Args:
+            solve_id: ソルブの ID (表にあるどのソルブの ID よりも大きい必要がある)
+            time: タイム (秒)
+            penalty: ペナルティ
+        """
+
+        if self._solve_ids and solve_id <= self._solve_ids[-1]:
+            raise ValueError(f"solve_id must be greater than {self._solve_ids[-1]}")
+
+        penalty_code: int = self._get_penalty_code(penalty)
+        rolling_aos: list[RollingAO] = self._get_rolling_aos()
+
+        self._solve_ids.append(solve_id)
+        self._times.append(time)
+        self._penalties.append(penalty_code)
+
+        for values in self._ao_values:
+            values.append(math.nan)
+
+        self._apply_ao_changes(
+            rolling_ao.append((time, penalty)) for rolling_ao in rolling_aos
+        )
+        self._widen_columns(range(len(self._solve_ids) - 1, len(self._solve_ids)))
+
+        # 追加したソルブが見えるように、表を作り直していたときと同じくカーソルを先頭に戻す。
+        self.reset_cursor()
+        self.refresh_rows()
+
+    def remove_solve(self, solve_id: int) -> None:
+        index: int = self._find_solve(solve_id)
+        rolling_aos: list[RollingAO] = self._get_rolling_aos()
+
+        del self._solve_ids[index]
+        del self._times[index]
+        del self._penalties[index]
+
+        for values in self._ao_values:
+            del values[index]
+
+        self._apply_ao_changes(rolling_ao.remove(index) for rolling_ao in rolling_aos)
+        self._widen_columns(
+            range(index, min(index + max(self.ao_sizes) - 1, len(self._solve_ids)))
+        )
+
+        # 削除した行より上の行 (新しいソルブ) は番号が変わり、下の行 (古いソルブ) は行がずれるので、
+        # すべての行を作り直す。
+        self.refresh_rows()
+
+    def update_penalty(self, solve_id: int, penalty: str) -> None:
+        index: int = self._find_solve(solve_id)
+        penalty_code: int = self._get_penalty_code(penalty)
+
+        if penalty_code == self._penalties[index]:
+            return
+
+        rolling_aos: list[RollingAO] = self._get_rolling_aos()
+        self._penalties[index] = penalty_code
+
+        self._apply_ao_changes(
+            rolling_ao.change_penalty(index, penalty) for rolling_ao in rolling_aos
+        )
+
+        # ペナルティを変えたソルブと、それを含む ao N のウィンドウで終わるソルブだけが変わる。
+        changed: range = range(index, min(index + max(self.ao_sizes), len(self._solve_ids)))
+        self._widen_columns(changed)
+        self.refresh_rows(
+            range(self._get_solve_index(changed[-1]), self._get_solve_index(index) + 1)
+        )
+
+    def _update_rows(
+        self, solves: Sequence[tuple[int, float, str]], ao_results: Sequence[Iterable[float]]
+    ) -> None:
+        """
+        Args:
+            solves: ID とタイムとペナルティを要素に持つタプルのシーケンス
+            ao_results: self.ao_sizes の順に、 ao N の値 (DNF は inf) のイテラブル
+        """
+
+        self._solve_ids = array("q", (solve[0] for solve in solves))
+        self._times = array("d", (solve[1] for solve in solves))
+        self._penalties = array("b", (self._get_penalty_code(solve[2]) for solve in solves))
+        self._ao_values = [array("d", values) for values in ao_results]
+        self._content_widths = self._measure_content_widths()
+        self._rolling_aos = None
+
+        self.reset_cursor()
+        self.refresh_rows()
+
+    @staticmethod
+    def _to_ao_number(ao_value: AOValue) -> float:
+        return math.inf if isinstance(ao_value, str) else ao_value
+
+    @staticmethod
+    def _to_ao_value(value: float) -> AOValue:
+        return "DNF" if math.isinf(value) else value
+
+    def update(self, solves: Sequence[tuple[int, float, str]]) -> None:
         _solves: tuple[tuple[float, str], ...] = tuple(
             (time, penalty) for _, time, penalty in solves
         )
-        ao5_results: Iterable[str] = reversed(self._format_ao_values(_solves, 5))
-        ao12_results: Iterable[str] = reversed(self._format_ao_values(_solves, 12))
-        solve_ids: Iterable[str] = (str(solve[0]) for solve in reversed(solves))
-
-        for num_solve, time, ao5, ao12, solve_id in zip(
-            num_solves, times, ao5_results, ao12_results, solve_ids, strict=True
-        ):
-            self.add_row(
-                Text(num_solve, justify="center"),
-                Text(time, justify="center"),
-                Text(ao5, justify="center"),
-                Text(ao12, justify="center"),
-                key=solve_id,
-            )
-
-        # cache_info = calculate_ao.cache_info()
-        # hit_rate = (
-        #     cache_info.hits / total * 100
-        #     if (total := (cache_info.hits + cache_info.misses))
-        #     else 0.0
-        # )
-        # self.log.debug(
-        #     f"calculate_ao() cache info: {cache_info}, cache hit rate: {hit_rate:.2f}%"
-        # )
+        self._update_rows(
+            solves,
+            [map(self._to_ao_number, RollingAO(n, _solves).values) for n in self.ao_sizes],
+        )
+
+    def update_stats(self, rows: Sequence[tuple[Any, ...]]) -> None:
+        """Database.get_solve_stats で取得した計算済みの ao N で表を更新する。
+
+        Args:
+            rows: (id, time, penalty, *ao_values) のシーケンス。 ao_values は self.ao_sizes の順。
+        """
+
+        solves: list[tuple[int, float, str]] = [
+            (id, time, penalty) for id, time, penalty, *_ in rows
+        ]
+        ao_results: list[list[float]] = [
+            [self._to_ao_number(row[3 + i]) for row in rows] for i in range(len(self.ao_sizes))
+        ]
+        self._update_rows(solves, ao_results)
@@ -1,19 +1,33 @@
+import time
 from pathlib import Path
 
 import keyboard
 from textual.message import Message
 from textual.screen import ModalScreen
+from textual.timer import Timer as RefreshTimer
 from textual.widgets import Static
-from textual_pyfiglet.pyfiglet import figlet_format
 
+from sctt.modules.figlet import GlyphRenderer
+from sctt.modules.key_events import KeyEvent, KeyEventQueue
+from sctt.modules.refresh_scheduler import RefreshScheduler
 from sctt.modules.timer import Timer, TimerState
 
 
 class TimerWidget(Static):
     class Solved(Message):
-        def __init__(self, time: float) -> None:
+        def __init__(self, time: float, time_ns: int | None = None) -> None:
+            """
+            Args:
+                time: タイム (秒)
+                time_ns: 整数のナノ秒のタイム
+            """
+
             super().__init__()
             self.time_: float = time
+            self.time_ns: int | None = time_ns
+
+    class KeyEventsQueued(Message):
+        """キーのイベントが key_event_queue に追加されたことを知らせる。 (post_message はスレッドセーフ)"""
 
     STATE_CLASSES: dict[TimerState, str] = {
         TimerState.STOPPED: "stopped",
@@ -21,11 +35,27 @@ class TimerWidget(Static):
         TimerState.READY_TO_START: "ready-to-start",
         TimerState.RUNNING: "running",
     }
+    # 計測中に表示する小数点以下の桁数
+    RUNNING_DECIMAL_PLACES: int = 1
 
     def __init__(self) -> None:
         super().__init__()
         self.font: Path = Path(__file__).parents[1] / "fonts" / "mono_banner"
+        self.glyph_renderer: GlyphRenderer = GlyphRenderer(self.font)
         self.timer: Timer = Timer()
+        self.refresh_scheduler: RefreshScheduler = RefreshScheduler(
+            10**-self.RUNNING_DECIMAL_PLACES
+        )
+        self._refresh_timer: RefreshTimer | None = None
+        self._styled_time: str | None = None
+        # keyboard のスレッドで届いたキーのイベントを、イベントループで処理するためのキュー
+        self.key_event_queue: KeyEventQueue = KeyEventQueue(
+            lambda: self.post_message(self.KeyEventsQueued())
+        )
+        # keyboard がキーのイベントを受け取ってからフックが呼ばれるまでにかかった時間
+        self.input_latency_ns: int = 0
+        # True にすると input_latency_ns の分だけ早くキーが操作されたものとしてタイムを計る。
+        self.compensate_input_latency: bool = False
 
     def on_mount(self) -> None:
         try:
@@ -40,13 +70,12 @@ class TimerWidget(Static):
                 return_code=1,
                 message="Sctt dose not support this environment.",
             )
-        else:
-            self.interval_timer = self.set_interval(1 / 60, self.update_time, pause=True)
 
     def on_resize(self) -> None:
         self.update_time()
 
     def reset(self) -> None:
+        self._stop_refresh()
         self.timer.reset()
 
     def style_time(self) -> str:
@@ -54,46 +83,118 @@ class TimerWidget(Static):
 
         match self.timer.state:
             case TimerState.RUNNING:
-                decimal_places = 1
+                decimal_places = self.RUNNING_DECIMAL_PLACES
             case _:
                 decimal_places = 2
 
         formatted_time: str = Timer.format_time(self.timer.elapsed_time, decimal_places)
-        styled_time: str = str(
-            figlet_format(formatted_time, str(self.font), width=self.size.width)
-        )
+        styled_time: str = self.glyph_renderer.render(formatted_time, self.size.width)
         return styled_time.strip("\n")
 
-    def update_time(self) -> None:
-        self.update(self.style_time())
+    def update_time(self) -> bool:
+        """表示するタイムを更新する。表示が前回と同じ場合は描画しない。
+
+        Returns:
+            表示を更新したかどうか
+        """
+
+        styled_time: str = self.style_time()
+
+        if styled_time == self._styled_time:
+            return False
+
+        self._styled_time = styled_time
+        self.update(styled_time)
+        return True
+
+    def _schedule_refresh(self) -> None:
+        # 待つ時間は毎回経過時間から求めるので、描画が遅れてもずれは積み重ならない。
+        elapsed_time: float = self.timer.elapsed_time
+
+        if elapsed_time >= Timer.MAXIMUM_TIME:
+            self._refresh_timer = None
+            return
+
+        self._refresh_timer = self.set_timer(
+            self.refresh_scheduler.schedule(elapsed_time), self._refresh
+        )
+
+    def _refresh(self) -> None:
+        if self.timer.state != TimerState.RUNNING:
+            self._refresh_timer = None
+            return
+
+        elapsed_time: float = self.timer.elapsed_time
+        start: float = time.perf_counter()
+        updated: bool = self.update_time()
+        self.refresh_scheduler.record_frame(elapsed_time, time.perf_counter() - start, updated)
+        self._schedule_refresh()
+
+    def _stop_refresh(self) -> None:
+        if self._refresh_timer is not None:
+            self._refresh_timer.stop()
+            self._refresh_timer = None
 
     def _update_state_color(self) -> None:
         self.set_classes(self.STATE_CLASSES[self.timer.state])
 
     def _handle_key_events(self, event: keyboard.KeyboardEvent) -> None:
-        if (
-            isinstance(self.app.screen, ModalScreen)
-            or event.event_type is None
-            or event.name != "space"
-        ):
+        """keyboard のフックのスレッドで呼ばれる。
+
+        届いた時刻を記録してキューに入れるだけにして、タイマーの操作と描画はイベントループで行う。
+        """
+
+        timestamp_ns: int = time.perf_counter_ns()
+
+        if event.event_type is None or event.name != "space":
             return
 
-        match event.event_type:
-            case keyboard.KEY_DOWN:
-                if self.timer.state == TimerState.RUNNING:
-                    self.post_message(self.Solved(self.timer.elapsed_time))
+        # event.time は keyboard がイベントを受け取った時刻 (time.time() の秒)
+        input_latency_ns: int = max(time.time_ns() - round(event.time * 1e9), 0)
+        self.key_event_queue.put(KeyEvent(event.event_type, timestamp_ns, input_latency_ns))
+
+    def on_timer_widget_key_events_queued(self, message: KeyEventsQueued) -> None:
+        message.stop()
+        state: TimerState = self.timer.state
+
+        for event in self.key_event_queue.drain():
+            if isinstance(self.app.screen, ModalScreen):
+                continue
+
+            self.input_latency_ns = event.input_latency_ns
+            # タイマーの開始と停止は、処理した時刻ではなくイベントが届いた時刻で決める。
+            timestamp_ns: int = (
+                event.timestamp_ns - event.input_latency_ns
+                if self.compensate_input_latency
+                else event.timestamp_ns
+            )
+
+            match event.event_type:
+                case keyboard.KEY_DOWN:
+                    was_running: bool = self.timer.state == TimerState.RUNNING
+                    self.timer.on_press(timestamp_ns)
+
+                    if was_running:
+                        self.post_message(
+                            self.Solved(self.timer.elapsed_time, self.timer.elapsed_time_ns)
+                        )
+                case keyboard.KEY_UP:
+                    self.timer.on_release(timestamp_ns)
 
-                self.timer.on_press()
-            case keyboard.KEY_UP:
-                self.timer.on_release()
+        if self.timer.state != state:
+            self._on_timer_state_changed()
 
+    def _on_timer_state_changed(self) -> None:
         self._update_state_color()
 
         match self.timer.state:
             case TimerState.RUNNING:
-                self.interval_timer.resume()
+                if self._refresh_timer is None:
+                    self.refresh_scheduler.reset()
+                    self.update_time()
+                    self._schedule_refresh()
             case _:
-                self.interval_timer.pause()
+                self._stop_refresh()
                 self.update_time()
 
     def start_key_detection(self) -> None:
@@ -0,0 +1,442 @@
+from collections.abc import Sequence
+from typing import ClassVar
+
+from rich.cells import cell_len, set_cell_size
+from rich.segment import Segment
+from rich.style import Style
+from rich.text import Text
+from textual import events
+from textual.binding import BindingType
+from textual.coordinate import Coordinate
+from textual.geometry import Region, Size, Spacing
+from textual.message import Message
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.widgets.data_table import CellKey, ColumnKey, RowKey
+
+from sctt.widgets.my_datatable import MyDataTable
+
+
+class VirtualDataTable(ScrollView, can_focus=True):
+    """見えている行のセルだけを作る DataTable
+
+    DataTable は add_row のたびにすべてのセルを作って幅を測るので、行が多いと重い。
+    このクラスは行のデータを持たず、サブクラスが get_row_count, get_row_key, get_row_index,
+    create_row, get_column_content_widths で必要な行だけを返す。
+    作ったセルは見えている行とその前後 OVERSCAN 行の分だけ保持する。
+
+    キーバインド、セルのカーソル、 CellSelected、コンポーネントクラス (datatable--header など) は
+    MyDataTable (cursor_type="cell") と同じ。セルは 1 行の Text だけに対応している。
+    """
+
+    BINDINGS: ClassVar[list[BindingType]] = MyDataTable.BINDINGS
+
+    COMPONENT_CLASSES: ClassVar[set[str]] = {
+        "datatable--cursor",
+        "datatable--header",
+        "datatable--even-row",
+        "datatable--odd-row",
+    }
+
+    DEFAULT_CSS = """
+    VirtualDataTable {
+        background: $surface;
+        color: $foreground;
+        height: auto;
+        max-height: 100%;
+
+        &:focus {
+            background-tint: $foreground 5%;
+            & > .datatable--cursor {
+                background: $block-cursor-background;
+                color: $block-cursor-foreground;
+                text-style: $block-cursor-text-style;
+            }
+
+            & > .datatable--header {
+                background-tint: $foreground 5%;
+            }
+        }
+
+        &:dark {
+            & > .datatable--even-row {
+                background: $surface-darken-1 40%;
+            }
+        }
+
+        & > .datatable--header {
+            text-style: bold;
+            background: $panel;
+            color: $foreground;
+        }
+
+        & > .datatable--even-row {
+            background: $surface-lighten-1 50%;
+        }
+
+        & > .datatable--cursor {
+            background: $block-cursor-blurred-background;
+            color: $block-cursor-blurred-foreground;
+            text-style: $block-cursor-blurred-text-style;
+        }
+    }
+    """
+
+    # 見えている行の前後で、作ったセルを保持しておく行数
+    OVERSCAN: int = 20
+    # セルの左右の余白
+    CELL_PADDING: int = 1
+
+    class CellSelected(Message):
+        """セルが選択されたときに送られる。 (DataTable.CellSelected と同じ属性を持つ)"""
+
+        def __init__(
+            self,
+            data_table: "VirtualDataTable",
+            value: Text,
+            coordinate: Coordinate,
+            cell_key: CellKey,
+        ) -> None:
+            super().__init__()
+            self.data_table: VirtualDataTable = data_table
+            self.value: Text = value
+            self.coordinate: Coordinate = coordinate
+            self.cell_key: CellKey = cell_key
+
+        @property
+        def control(self) -> "VirtualDataTable":
+            return self.data_table
+
+    def __init__(self, zebra_stripes: bool = False) -> None:
+        super().__init__()
+        self.zebra_stripes: bool = zebra_stripes
+        self._columns: list[tuple[ColumnKey, Text]] = []
+        self._column_widths: list[int] = []
+        self._cursor_coordinate: Coordinate = Coordinate(0, 0)
+        self._row_count: int = 0
+        self._row_cells: dict[int, Sequence[Text]] = {}
+        self._strips: dict[tuple[int, int | None], Strip] = {}
+
+    # サブクラスで実装するメソッド
+
+    def get_row_count(self) -> int:
+        raise NotImplementedError
+
+    def get_row_key(self, row_index: int) -> str:
+        raise NotImplementedError
+
+    def get_row_index(self, row_key: str) -> int:
+        """row_key の行のインデックスを返す。無い場合は KeyError を送出する。"""
+
+        raise NotImplementedError
+
+    def create_row(self, row_index: int) -> Sequence[Text]:
+        """row_index の行のセルを列の順に返す。"""
+
+        raise NotImplementedError
+
+    def get_column_content_widths(self) -> Sequence[int]:
+        """各列のセルの最大の幅を列の順に返す。 (見出しと余白は含まない)
+
+        refresh_rows のたびに呼ばれるので、行数に比例する時間がかからないようにする。
+        """
+
+        raise NotImplementedError
+
+    # 列と行
+
+    def add_columns(self, *columns: tuple[str, str]) -> None:
+        """
+        Args:
+            columns: (見出し, キー) のタプル
+        """
+
+        self._columns.extend((ColumnKey(key), Text(label)) for label, key in columns)
+        self.refresh_rows()
+
+    @property
+    def row_count(self) -> int:
+        return self._row_count
+
+    @property
+    def column_keys(self) -> list[ColumnKey]:
+        return [key for key, _ in self._columns]
+
+    def refresh_rows(self, rows: range | None = None) -> None:
+        """行のデータが変わったときに呼んで、表示を更新する。
+
+        Args:
+            rows: 変わった行のインデックスの範囲。 None の場合はすべての行を作り直す。
+                (行を削除した場合は、それより下の行もインデックスがずれるので範囲に含める)
+        """
+
+        self._row_count = self.get_row_count() if self._columns else 0
+
+        if rows is None:
+            self._row_cells.clear()
+            self._strips.clear()
+        else:
+            self._row_cells = {
+                i: cells for i, cells in self._row_cells.items() if i not in rows
+            }
+            self._strips = {
+                key: strip for key, strip in self._strips.items() if key[0] not in rows
+            }
+
+        content_widths: Sequence[int] = (
+            self.get_column_content_widths() if self._columns else ()
+        )
+        column_widths: list[int] = [
+            max(label.cell_len, width) + 2 * self.CELL_PADDING
+            for (_, label), width in zip(self._columns, content_widths, strict=True)
+        ]
+        size: Size = Size(sum(column_widths), self._row_count + 1)
+
+        if column_widths != self._column_widths or size != self.virtual_size:
+            if column_widths != self._column_widths:
+                self._strips.clear()
+
+            self._column_widths = column_widths
+            self.virtual_size = size
+            self.refresh(layout=True)
+
+        self.cursor_coordinate = self._cursor_coordinate
+        self.refresh()
+
+    def reset_cursor(self) -> None:
+        """カーソルとスクロールを先頭に戻す。"""
+
+        self._cursor_coordinate = Coordinate(0, 0)
+        self.scroll_to(0, 0, animate=False, immediate=True)
+
+    def _get_row_cells(self, row_index: int) -> Sequence[Text]:
+        if (cells := self._row_cells.get(row_index)) is None:
+            cells = self._row_cells[row_index] = self.create_row(row_index)
+
+            # 見えている範囲から離れた行のセルは捨てる。
+            top: int = round(self.scroll_y) - self.OVERSCAN
+            bottom: int = round(self.scroll_y) + self.size.height + self.OVERSCAN
+
+            if len(self._row_cells) > bottom - top:
+                self._row_cells = {
+                    i: cells for i, cells in self._row_cells.items() if top <= i < bottom
+                }
+                self._row_cells[row_index] = cells
+
+        return cells
+
+    def get_cell(self, row_key: RowKey | str, column_key: ColumnKey | str) -> Text:
+        if isinstance(row_key, RowKey):
+            if row_key.value is None:
+                raise KeyError(row_key)
+
+            row_key = row_key.value
+
+        row_index: int = self.get_row_index(row_key)
+        column_index: int = self.column_keys.index(
+            column_key if isinstance(column_key, ColumnKey) else ColumnKey(column_key)
+        )
+
+        return self._get_row_cells(row_index)[column_index]
+
+    # カーソル
+
+    @property
+    def cursor_coordinate(self) -> Coordinate:
+        return self._cursor_coordinate
+
+    @cursor_coordinate.setter
+    def cursor_coordinate(self, coordinate: Coordinate) -> None:
+        self.move_cursor(coordinate.row, coordinate.column)
+
+    def move_cursor(
+        self, row: int | None = None, column: int | None = None, scroll: bool = True
+    ) -> None:
+        row = self._cursor_coordinate.row if row is None else row
+        column = self._cursor_coordinate.column if column is None else column
+        coordinate: Coordinate = Coordinate(
+            max(min(row, self._row_count - 1), 0), max(min(column, len(self._columns) - 1), 0)
+        )
+
+        if coordinate != self._cursor_coordinate:
+            self._cursor_coordinate = coordinate
+            self.refresh()
+
+        if scroll and self._row_count:
+            self._scroll_cursor_into_view()
+
+    def _scroll_cursor_into_view(self) -> None:
+        row, column = self._cursor_coordinate
+        # 仮想的な座標では、見出しが 1 行目にあるので行は 1 つずれる。
+        region: Region = Region(
+            sum(self._column_widths[:column]), row + 1, self._column_widths[column], 1
+        )
+        self.scroll_to_region(region, spacing=Spacing(top=1), animate=False, force=True)
+
+    def _post_selected_message(self) -> None:
+        if not self._row_count or not self._columns:
+            return
+
+        row, column = self._cursor_coordinate
+        self.post_message(
+            self.CellSelected(
+                self,
+                self._get_row_cells(row)[column],
+                self._cursor_coordinate,
+                CellKey(RowKey(self.get_row_key(row)), self._columns[column][0]),
+            )
+        )
+
+    def action_select_cursor(self) -> None:
+        self._post_selected_message()
+
+    def action_cursor_up(self) -> None:
+        self.cursor_coordinate = self._cursor_coordinate.up()
+
+    def action_cursor_down(self) -> None:
+        self.cursor_coordinate = self._cursor_coordinate.down()
+
+    def action_cursor_left(self) -> None:
+        self.cursor_coordinate = self._cursor_coordinate.left()
+
+    def action_cursor_right(self) -> None:
+        self.cursor_coordinate = self._cursor_coordinate.right()
+
+    def action_page_up(self) -> None:
+        height: int = self.scrollable_content_region.height - 1
+        self.scroll_relative(y=-height, animate=False)
+        self.move_cursor(row=self._cursor_coordinate.row - height, scroll=False)
+
+    def action_page_down(self) -> None:
+        height: int = self.scrollable_content_region.height - 1
+        self.scroll_relative(y=height, animate=False, force=True)
+        self.move_cursor(row=self._cursor_coordinate.row + height, scroll=False)
+
+    def action_scroll_top(self) -> None:
+        self.move_cursor(row=0)
+
+    def action_scroll_bottom(self) -> None:
+        self.move_cursor(row=self._row_count - 1)
+
+    def action_scroll_home(self) -> None:
+        self.move_cursor(column=0)
+
+    def action_scroll_end(self) -> None:
+        self.move_cursor(column=len(self._columns) - 1)
+
+    async def _on_click(self, event: events.Click) -> None:
+        if (offset := event.get_content_offset(self)) is None or offset.y == 0:
+            return
+
+        row: int = round(self.scroll_y) + offset.y - 1
+        x: int = round(self.scroll_x) + offset.x
+
+        if row >= self._row_count:
+            return
+
+        for column, width in enumerate(self._column_widths):
+            if x < width:
+                self.move_cursor(row, column)
+                self._post_selected_message()
+                event.stop()
+                return
+
+            x -= width
+
+    # 描画
+
+    def notify_style_update(self) -> None:
+        super().notify_style_update()
+        self._strips.clear()
+
+    def _on_focus(self, event: events.Focus) -> None:
+        self._strips.clear()
+
+    def _on_blur(self, event: events.Blur) -> None:
+        self._strips.clear()
+
+    def get_content_width(self, container: Size, viewport: Size) -> int:
+        return self.virtual_size.width
+
+    def get_content_height(self, container: Size, viewport: Size, width: int) -> int:
+        return self.virtual_size.height
+
+    def _render_cells(self, cells: Sequence[Text], styles: Sequence[Style]) -> Strip:
+        segments: list[Segment] = []
+        padding: str = " " * self.CELL_PADDING
+
+        for cell, width, style in zip(cells, self._column_widths, styles, strict=True):
+            content_width: int = width - 2 * self.CELL_PADDING
+            text: str = cell.plain
+
+            if (excess := content_width - cell_len(text)) < 0:
+                text = set_cell_size(text, content_width)
+                excess = 0
+
+            match cell.justify:
+                case "center":
+                    left: int = excess // 2
+                case "right":
+                    left = excess
+                case _:
+                    left = 0
+
+            segments.append(
+                Segment(f"{padding}{' ' * left}{text}{' ' * (excess - left)}{padding}", style)
+            )
+
+        return Strip(segments, sum(self._column_widths))
+
+    def _get_strip(self, row_index: int) -> Strip:
+        """row_index の行 (-1 は見出し) を描画する。"""
+
+        cursor_row, cursor_column = self._cursor_coordinate
+        key: tuple[int, int | None] = (
+            row_index,
+            cursor_column if row_index == cursor_row else None,
+        )
+
+        if (strip := self._strips.get(key)) is not None:
+            return strip
+
+        base_style: Style = self.rich_style
+        cells: Sequence[Text]
+        styles: list[Style]
+
+        if row_index == -1:
+            cells = [label for _, label in self._columns]
+            styles = [base_style + self.get_component_rich_style("datatable--header")] * len(
+                cells
+            )
+        else:
+            cells = self._get_row_cells(row_index)
+            row_style: Style = base_style
+
+            if self.zebra_stripes:
+                row_style += self.get_component_rich_style(
+                    "datatable--odd-row" if row_index % 2 else "datatable--even-row"
+                )
+
+            styles = [row_style] * len(cells)
+
+            if key[1] is not None:
+                styles[key[1]] = row_style + self.get_component_rich_style("datatable--cursor")
+
+        if len(self._strips) > 4 * (self.size.height + self.OVERSCAN):
+            self._strips.clear()
+
+        strip = self._strips[key] = self._render_cells(cells, styles)
+        return strip
+
+    def render_line(self, y: int) -> Strip:
+        width: int = self.size.width
+        scroll_x, scroll_y = self.scroll_offset
+
+        if y == 0:
+            strip: Strip = self._get_strip(-1)
+        elif (row_index := scroll_y + y - 1) < self._row_count:
+            strip = self._get_strip(row_index)
+        else:
+            return Strip.blank(width, self.rich_style)
+
+        return strip.crop_extend(scroll_x, scroll_x + width, self.rich_style)
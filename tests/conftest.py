@@ -0,0 +1,28 @@
+from pathlib import Path
+
+import pytest
+
+from sctt.modules.two_phase import TwoPhaseTables, save_tables
+
+
+@pytest.fixture(scope="session")
+def two_phase_tables_dir(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> Path:
+    """本物の 2 フェーズの表を置いたディレクトリ
+
+    表の生成には 20 秒ほどかかるので、 pytest のキャッシュディレクトリに保存して、次からは使い回す。
+    """
+
+    # -p no:cacheprovider で実行すると、 config に cache の属性が無い。
+    cache: pytest.Cache | None = getattr(request.config, "cache", None)
+    directory: Path = (
+        cache.mkdir("two_phase_tables")
+        if cache is not None
+        else tmp_path_factory.mktemp("two_phase_tables")
+    )
+
+    if TwoPhaseTables.load(directory) is None:
+        save_tables(directory)
+
+    return directory
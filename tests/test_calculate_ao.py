@@ -1,6 +1,38 @@
 import math
+import random
 
-from sctt.modules.calculate_ao import calculate_ao
+import pytest
+
+from sctt.modules.calculate_ao import AOValue, RollingAO, calculate_ao, normalize_ao_sizes
+
+
+def _generate_solves(
+    count: int, seed: int, penalties: tuple[str, ...] = ("", "", "", "plus_2", "dnf")
+) -> list[tuple[float, str]]:
+    rng: random.Random = random.Random(seed)
+
+    return [(round(rng.uniform(8.0, 20.0), 2), rng.choice(penalties)) for _ in range(count)]
+
+
+def _expected_ao_values(solves: list[tuple[float, str]], n: int) -> list[AOValue]:
+    return [
+        calculate_ao(tuple(solves[i + 1 - n : i + 1])) if i + 1 >= n else float("nan")
+        for i in range(len(solves))
+    ]
+
+
+def _assert_same_ao_values(
+    actual: list[AOValue], expected: list[AOValue], rel_tol: float = 0.0
+) -> None:
+    assert len(actual) == len(expected)
+
+    for a, e in zip(actual, expected, strict=True):
+        if isinstance(e, float) and math.isnan(e):
+            assert isinstance(a, float) and math.isnan(a)
+        elif isinstance(e, float) and isinstance(a, float):
+            assert math.isclose(a, e, rel_tol=rel_tol)
+        else:
+            assert a == e
 
 
 def test_calculate_ao_no_solves() -> None:
@@ -213,6 +245,96 @@ def test_calculate_ao_100() -> None:
     assert calculate_ao(solves) == "DNF"
 
 
+def test_rolling_ao_values() -> None:
+    solves: list[tuple[float, str]] = _generate_solves(200, seed=1)
+
+    for n in (3, 5, 12):
+        _assert_same_ao_values(
+            list(RollingAO(n, solves).values), _expected_ao_values(solves, n)
+        )
+
+
+def test_rolling_ao_large_window() -> None:
+    penalties: tuple[str, ...] = ("",) * 40 + ("plus_2", "dnf")
+    solves: list[tuple[float, str]] = _generate_solves(1500, seed=5, penalties=penalties)
+
+    for n in (50, 100, 1000):
+        rolling_ao: RollingAO = RollingAO(n, solves)
+        expected: list[AOValue] = _expected_ao_values(solves, n)
+        _assert_same_ao_values(list(rolling_ao.values), expected, rel_tol=1e-12)
+
+        rolling_ao.change_penalty(600, "dnf")
+        rolling_ao.remove(300)
+        rolling_ao.append((12.34, "plus_2"))
+        edited_solves: list[tuple[float, str]] = list(solves)
+        edited_solves[600] = (edited_solves[600][0], "dnf")
+        del edited_solves[300]
+        edited_solves.append((12.34, "plus_2"))
+        expected = _expected_ao_values(edited_solves, n)
+        _assert_same_ao_values(list(rolling_ao.values), expected, rel_tol=1e-12)
+
+
+def test_normalize_ao_sizes() -> None:
+    assert normalize_ao_sizes((100, 5, 12, 5)) == (5, 12, 100)
+
+    with pytest.raises(ValueError):
+        normalize_ao_sizes(())
+
+    with pytest.raises(ValueError):
+        normalize_ao_sizes((5, 2))
+
+
+def test_rolling_ao_append() -> None:
+    solves: list[tuple[float, str]] = _generate_solves(60, seed=2)
+    rolling_ao: RollingAO = RollingAO(5)
+
+    for i, solve in enumerate(solves):
+        changed: dict[int, AOValue] = rolling_ao.append(solve)
+        assert list(changed) == [i]
+
+    _assert_same_ao_values(list(rolling_ao.values), _expected_ao_values(solves, 5))
+
+
+def test_rolling_ao_remove() -> None:
+    solves: list[tuple[float, str]] = _generate_solves(60, seed=3)
+    rolling_ao: RollingAO = RollingAO(12, solves)
+
+    for index in (0, 30, 20, 56):
+        del solves[index]
+
+        changed: dict[int, AOValue] = rolling_ao.remove(index)
+        expected: list[AOValue] = _expected_ao_values(solves, 12)
+
+        _assert_same_ao_values(list(rolling_ao.values), expected)
+        assert all(index <= i < index + 11 for i in changed)
+
+        for i in changed:
+            _assert_same_ao_values([changed[i]], [expected[i]])
+
+    # 変化した値しか返さないことを確認する。
+    rolling_ao.append((10.0, ""))
+    assert rolling_ao.remove(len(rolling_ao) - 1) == {}
+
+
+def test_rolling_ao_change_penalty() -> None:
+    solves: list[tuple[float, str]] = _generate_solves(60, seed=4)
+    rolling_ao: RollingAO = RollingAO(5, solves)
+
+    for index, penalty in ((10, "dnf"), (10, "plus_2"), (0, "dnf"), (59, ""), (57, "dnf")):
+        solves[index] = (solves[index][0], penalty)
+
+        changed: dict[int, AOValue] = rolling_ao.change_penalty(index, penalty)
+        expected: list[AOValue] = _expected_ao_values(solves, 5)
+
+        _assert_same_ao_values(list(rolling_ao.values), expected)
+        assert all(index <= i < index + 5 for i in changed)
+
+    # append で使うウィンドウがペナルティの変更後も正しいことを確認する。
+    solves.append((11.11, ""))
+    rolling_ao.append((11.11, ""))
+    _assert_same_ao_values(list(rolling_ao.values), _expected_ao_values(solves, 5))
+
+
 if __name__ == "__main__":
     test_calculate_ao_no_solves()
     test_calculate_ao_1()
@@ -222,3 +344,9 @@ if __name__ == "__main__":
     test_calculate_ao_5()
     test_calculate_ao_12()
     test_calculate_ao_100()
+    test_rolling_ao_values()
+    test_rolling_ao_large_window()
+    test_normalize_ao_sizes()
+    test_rolling_ao_append()
+    test_rolling_ao_remove()
+    test_rolling_ao_change_penalty()
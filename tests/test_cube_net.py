@@ -0,0 +1,159 @@
+import random
+from collections.abc import Iterable, Iterator
+from itertools import chain
+
+import pytest
+from rich.console import Console
+from rich.segment import Segment
+from rich.style import Style
+
+from sctt.modules.scramble import CUBE_SIZE_VARIANT, generate_scramble
+from sctt.renderables.cube_net import CubeNet, StickerSize
+
+Cell = tuple[str, str | None]
+
+
+@pytest.fixture(autouse=True)
+def clear_lines_cache() -> Iterator[None]:
+    CubeNet._lines_cache.clear()
+    yield
+    CubeNet._lines_cache.clear()
+
+
+def _render_face_per_sticker(cube_net: CubeNet, face: str) -> Iterator[Segment]:
+    """U か D の面を、ステッカーを 1 つずつ Segment にして描画する。"""
+
+    size: int = cube_net.size
+    sticker: str = cube_net._sticker
+    spacing: Segment = Segment(" " * cube_net._letter_spacing)
+
+    for i, face_row in enumerate(cube_net._cube.faces[face], start=1):
+        # L の面の分の空白
+        for j in range(1, size + 1):
+            yield Segment(" " * len(sticker))
+
+            if j < size:
+                yield spacing
+
+        yield Segment(" " * cube_net._face_right_padding)
+
+        for j, color_char in enumerate(face_row, start=1):
+            yield Segment(sticker, Style(color=cube_net.COLOR_MAP[color_char]))
+
+            if j < size:
+                yield spacing
+
+        yield Segment("\n")
+
+        if i < size:
+            yield Segment("\n" * cube_net._line_spacing)
+
+
+def _render_per_sticker(cube_net: CubeNet) -> Iterator[Segment]:
+    """ステッカーを 1 つずつ Segment にする、まとめる前の描画"""
+
+    size: int = cube_net.size
+    faces: dict[str, list[list[str]]] = cube_net._cube.faces
+    spacing: Segment = Segment(" " * cube_net._letter_spacing)
+    right_padding: Segment = Segment(" " * cube_net._face_right_padding)
+
+    yield from _render_face_per_sticker(cube_net, "U")
+    yield Segment("\n" * cube_net._face_bottom_padding)
+
+    for i, faces_rows in enumerate(
+        zip(faces["L"], faces["F"], faces["R"], faces["B"], strict=True), start=1
+    ):
+        for j, color_char in enumerate(chain.from_iterable(faces_rows)):
+            yield Segment(cube_net._sticker, Style(color=cube_net.COLOR_MAP[color_char]))
+            yield right_padding if j % size == size - 1 else spacing
+
+        yield Segment("\n")
+
+        if i < size:
+            yield Segment("\n" * cube_net._line_spacing)
+
+    yield Segment("\n" * cube_net._face_bottom_padding)
+    yield from _render_face_per_sticker(cube_net, "D")
+
+
+def _get_cells(segments: Iterable[Segment]) -> list[list[Cell]]:
+    """画面に見える文字と、その文字色 (空白は色が見えないので None) を行ごとに返す。"""
+
+    lines: list[list[Cell]] = [[]]
+
+    for segment in segments:
+        color: str | None = (
+            segment.style.color.name
+            if segment.style is not None and segment.style.color is not None
+            else None
+        )
+
+        for char in segment.text:
+            if char == "\n":
+                lines.append([])
+            else:
+                lines[-1].append((char, color if char != " " else None))
+
+    return lines
+
+
+def _render(cube_net: CubeNet) -> list[Segment]:
+    return list(Console(width=200).render(cube_net))
+
+
+@pytest.mark.parametrize("sticker_size", list(StickerSize))
+@pytest.mark.parametrize("size", CUBE_SIZE_VARIANT)
+def test_render_same_as_per_sticker(size: int, sticker_size: StickerSize) -> None:
+    random.seed(size)
+
+    for scramble in (None, generate_scramble(size)):
+        cube_net: CubeNet = CubeNet(size, sticker_size)
+
+        if scramble is not None:
+            cube_net.apply_scramble(scramble)
+        segments: list[Segment] = _render(cube_net)
+        lines: list[list[Cell]] = _get_cells(segments)
+
+        assert lines == _get_cells(_render_per_sticker(cube_net)), scramble
+        # 最後の行の改行の後ろは空
+        assert len(lines) == cube_net.height + 1
+        assert sum(1 for segment in segments if segment.text.strip()) < 6 * size * size, (
+            "同じ色が並ぶステッカーはまとめるべき"
+        )
+
+
+def test_cache_after_state_change() -> None:
+    scramble: str = "R U R' U' F2"
+    cube_net: CubeNet = CubeNet(3)
+    solved: list[Segment] = _render(cube_net)
+
+    cube_net.apply_scramble(scramble)
+    scrambled: list[Segment] = _render(cube_net)
+    expected: CubeNet = CubeNet(3)
+    expected.apply_scramble(scramble)
+
+    assert scrambled != solved, "状態が変わったら描画し直すべき"
+    assert _get_cells(scrambled) == _get_cells(_render_per_sticker(expected))
+
+    # 揃った状態に戻すと、キャッシュが使われて同じ描画になる。
+    cube_net.initialize()
+
+    assert _render(cube_net) == solved
+    assert _get_cells(solved) == _get_cells(_render_per_sticker(cube_net))
+
+    # ステッカーの大きさが変わったら描画し直す。
+    cube_net.sticker_size = StickerSize.MINI
+
+    assert _get_cells(_render(cube_net)) == _get_cells(_render_per_sticker(cube_net))
+    assert len(CubeNet._lines_cache) == 3
+
+
+def test_cache_size() -> None:
+    cube_net: CubeNet = CubeNet(3)
+
+    for _ in range(CubeNet.LINES_CACHE_SIZE + 5):
+        # R U を繰り返すと 105 回で元に戻るので、毎回違う状態になる。
+        cube_net.apply_scramble("R U")
+        _render(cube_net)
+
+    assert len(CubeNet._lines_cache) <= CubeNet.LINES_CACHE_SIZE
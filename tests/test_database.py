@@ -1,9 +1,14 @@
+import math
+import re
+import sqlite3
+from collections.abc import Iterator, Sequence
 from pathlib import Path
 from typing import Any
 
 import pytest
 
-from sctt.modules.database import Database
+from sctt.modules.calculate_ao import AOValue, RollingAO
+from sctt.modules.database import Database, SessionNotFoundError
 
 
 @pytest.fixture
@@ -14,10 +19,12 @@ def temp_db_path(tmp_path: Path) -> Path:
 
 
 @pytest.fixture
-def db(temp_db_path: Path) -> Database:
+def db(temp_db_path: Path) -> Iterator[Database]:
     """テスト用のDatabaseインスタンスを作成"""
 
-    return Database(temp_db_path)
+    db: Database = Database(temp_db_path)
+    yield db
+    db.close()
 
 
 def test_create_session(db: Database) -> None:
@@ -68,6 +75,56 @@ def test_add_solve(db: Database) -> None:
     assert solves[0][6] == session_id, "ソルブのセッションIDが一致するべき"
 
 
+def test_add_solve_time_us(db: Database) -> None:
+    """タイムが整数のマイクロ秒でも保存されることを確認する"""
+
+    session_id: int | None = db.create_session("Test Session")
+
+    if session_id is None:
+        raise ValueError
+
+    solve_id: int | None = db.add_solve("3x3x3", 0.0, "R U", session_id, time_us=12_345_678)
+    other_solve_id: int | None = db.add_solve("3x3x3", 9.87, "R U", session_id)
+
+    with db._get_connection() as conn:
+        rows: list[tuple[Any, ...]] = conn.execute(
+            "SELECT id, time, time_us FROM solves ORDER BY id;"
+        ).fetchall()
+
+    assert rows == [(solve_id, 12.345678, 12_345_678), (other_solve_id, 9.87, 9_870_000)]
+
+
+def test_add_time_us_column(temp_db_path: Path) -> None:
+    """time_us 列が無い古いデータベースに列が追加されて、 time から埋められることを確認する"""
+
+    with sqlite3.connect(temp_db_path) as conn:
+        conn.execute(
+            "CREATE TABLE sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+            "created_at TEXT NOT NULL, updated_at TEXT NOT NULL);"
+        )
+        conn.execute(
+            "CREATE TABLE solves (id INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT NOT NULL, "
+            "time REAL NOT NULL, penalty TEXT NOT NULL, scramble TEXT NOT NULL, "
+            "date TEXT NOT NULL, session_id INTEGER NOT NULL, "
+            "FOREIGN KEY (session_id) REFERENCES sessions (id) ON DELETE CASCADE);"
+        )
+        conn.execute(
+            "INSERT INTO sessions VALUES (1, 'old', DATETIME('now'), DATETIME('now'));"
+        )
+        conn.execute(
+            "INSERT INTO solves (event, time, penalty, scramble, date, session_id) "
+            "VALUES ('3x3x3', 10.5, '', 'R U', DATETIME('now'), 1);"
+        )
+
+    conn.close()
+
+    with Database(temp_db_path) as db:
+        with db._get_connection() as conn:
+            assert conn.execute("SELECT time_us FROM solves;").fetchall() == [(10_500_000,)]
+
+        assert db.get_solve(1, 1)[1:4] == ("3x3x3", 10.5, "")
+
+
 def test_remove_solve(db: Database) -> None:
     session_id: int | None = db.create_session("Test Session")
 
@@ -130,3 +187,351 @@ def test_get_solve_times(db: Database) -> None:
     assert solve_times[0][2] == "dnf"
     assert solve_times[1][2] == "plus_2"
     assert solve_times[2][2] == ""
+
+
+def test_iter_solves(db: Database) -> None:
+    session_id: int | None = db.create_session("Test Session")
+    other_session_id: int | None = db.create_session("Other Session")
+
+    if session_id is None or other_session_id is None:
+        raise ValueError
+
+    for i in range(7):
+        db.add_solve("3x3x3", 10.0 + i, "D2 R2 U2", session_id)
+        db.add_solve("3x3x3", 20.0 + i, "D2 R2 U2", other_session_id)
+
+    solves: list[tuple[Any, ...]] = db.get_all_solves(session_id)
+
+    assert list(db.iter_solves(session_id, batch=3)) == solves
+    assert list(db.iter_solves(session_id, after_id=solves[3][0], batch=2)) == solves[4:]
+    assert list(db.iter_solves(session_id, after_id=solves[-1][0])) == []
+
+
+def test_get_solves_page(db: Database) -> None:
+    session_id: int | None = db.create_session("Test Session")
+    other_session_id: int | None = db.create_session("Other Session")
+
+    if session_id is None or other_session_id is None:
+        raise ValueError
+
+    for i in range(7):
+        db.add_solve("3x3x3", 10.0 + i, "D2 R2 U2", session_id)
+        db.add_solve("3x3x3", 20.0 + i, "D2 R2 U2", other_session_id)
+
+    newest_first: list[tuple[Any, ...]] = db.get_all_solves(session_id)[::-1]
+    pages: list[list[tuple[Any, ...]]] = [db.get_solves_page(session_id, limit=3)]
+
+    while pages[-1]:
+        pages.append(db.get_solves_page(session_id, pages[-1][-1][0], 3))
+
+    assert [len(page) for page in pages] == [3, 3, 1, 0]
+    assert [solve for page in pages for solve in page] == newest_first
+
+
+def _expected_solve_stats(db: Database, session_id: int) -> list[tuple[Any, ...]]:
+    solves: list[tuple[Any, ...]] = db.get_solve_ids_and_times_and_penalties(session_id)
+    times_and_penalties: list[tuple[float, str]] = [
+        (time, penalty) for _, time, penalty in solves
+    ]
+    ao_results: list[Sequence[AOValue]] = [
+        RollingAO(n, times_and_penalties).values for n in db.ao_sizes
+    ]
+
+    return [
+        (*solve, *ao_values) for solve, *ao_values in zip(solves, *ao_results, strict=True)
+    ]
+
+
+def _assert_same_solve_stats(
+    actual: list[tuple[Any, ...]], expected: list[tuple[Any, ...]]
+) -> None:
+    assert len(actual) == len(expected)
+
+    for actual_row, expected_row in zip(actual, expected, strict=True):
+        assert actual_row[:3] == expected_row[:3]
+
+        for a, e in zip(actual_row[3:], expected_row[3:], strict=True):
+            if isinstance(e, float) and math.isnan(e):
+                assert isinstance(a, float) and math.isnan(a)
+            else:
+                assert a == e
+
+
+def test_solve_stats(temp_db_path: Path) -> None:
+    with Database(temp_db_path, ao_sizes=(3, 5)) as db:
+        _test_solve_stats(db)
+
+
+def _test_solve_stats(db: Database) -> None:
+    session_id: int | None = db.create_session("Test Session")
+
+    if session_id is None:
+        raise ValueError
+
+    solve_ids: list[int | None] = [
+        db.add_solve("3x3x3", 10.0 + i * 0.37 % 3, "D2 R2 U2", session_id, penalty)
+        for i, penalty in enumerate(["", "", "dnf", "", "plus_2", "", "", "dnf", "", ""])
+    ]
+    _assert_same_solve_stats(
+        db.get_solve_stats(session_id), _expected_solve_stats(db, session_id)
+    )
+
+    for solve_id, penalty in (
+        (solve_ids[4], "dnf"),
+        (solve_ids[0], "plus_2"),
+        (solve_ids[9], ""),
+    ):
+        if solve_id is None:
+            raise ValueError
+
+        db.change_solve_penalty(penalty, solve_id)
+        _assert_same_solve_stats(
+            db.get_solve_stats(session_id), _expected_solve_stats(db, session_id)
+        )
+
+    for solve_id in (solve_ids[5], solve_ids[0], solve_ids[9]):
+        if solve_id is None:
+            raise ValueError
+
+        db.remove_solve(solve_id, session_id)
+        _assert_same_solve_stats(
+            db.get_solve_stats(session_id), _expected_solve_stats(db, session_id)
+        )
+
+
+def test_rebuild_solve_stats(temp_db_path: Path) -> None:
+    with Database(temp_db_path, ao_sizes=(5,)) as db:
+        session_id: int | None = db.create_session("Test Session")
+
+        if session_id is None:
+            raise ValueError
+
+        for i in range(8):
+            db.add_solve("3x3x3", 10.0 + i, "D2 R2 U2", session_id)
+
+        # 同期がずれた状態を作る。
+        with db._get_connection() as conn:
+            conn.execute("DELETE FROM solve_stats;")
+
+        db.rebuild_solve_stats(session_id)
+        _assert_same_solve_stats(
+            db.get_solve_stats(session_id), _expected_solve_stats(db, session_id)
+        )
+
+    # 保存されていない ao N は開いたときに計算される。
+    with Database(temp_db_path, ao_sizes=(3, 5)) as db:
+        _assert_same_solve_stats(
+            db.get_solve_stats(session_id), _expected_solve_stats(db, session_id)
+        )
+
+
+def _get_stored_sizes(db: Database) -> set[int]:
+    with db._get_connection() as conn:
+        return {n for (n,) in conn.execute("SELECT DISTINCT n FROM solve_stats;").fetchall()}
+
+
+def test_keep_solve_stats_sizes(temp_db_path: Path) -> None:
+    """--ao に無い ao N は、 rebuild_solve_stats で全て作り直すまで削除しない"""
+
+    with Database(temp_db_path, ao_sizes=(3, 5)) as db:
+        session_id: int | None = db.create_session("Test Session")
+
+        if session_id is None:
+            raise ValueError
+
+        for i in range(8):
+            db.add_solve("3x3x3", 10.0 + i, "D2 R2 U2", session_id)
+
+    with Database(temp_db_path, ao_sizes=(5,)) as db:
+        assert _get_stored_sizes(db) == {3, 5}, "使われていない ao N も残すべき"
+
+        # 残した ao N も、ソルブを変更したときに更新する。
+        db.add_solve("3x3x3", 9.0, "D2 R2 U2", session_id, "dnf")
+
+    # import や export では、保存されていない ao N を計算しない。
+    with Database(temp_db_path, ao_sizes=(12,), sync_stats=False) as db:
+        assert _get_stored_sizes(db) == {3, 5}
+
+    with Database(temp_db_path, ao_sizes=(3, 5)) as db:
+        _assert_same_solve_stats(
+            db.get_solve_stats(session_id), _expected_solve_stats(db, session_id)
+        )
+
+    with Database(temp_db_path, ao_sizes=(5,), sync_stats=False) as db:
+        db.rebuild_solve_stats()
+
+        assert _get_stored_sizes(db) == {5}, (
+            "全て作り直すときは --ao に無い ao N を削除するべき"
+        )
+
+    with Database(temp_db_path, ao_sizes=(3, 5)) as db:
+        _assert_same_solve_stats(
+            db.get_solve_stats(session_id), _expected_solve_stats(db, session_id)
+        )
+
+
+def test_import_solves(temp_db_path: Path) -> None:
+    with Database(temp_db_path, ao_sizes=(3,)) as db:
+        session_ids: dict[str, int] = db.import_solves(
+            (
+                (
+                    "A" if i % 3 else "B",
+                    "3x3x3",
+                    10_000_000 + i,
+                    "dnf" if i == 4 else "",
+                    "R U",
+                    "2024-01-01 00:00:00",
+                )
+                for i in range(10)
+            ),
+            batch_size=4,
+        )
+
+        assert list(session_ids) == ["B", "A"]
+        assert [len(db.get_all_solves(session_id)) for session_id in session_ids.values()] == [
+            4,
+            6,
+        ]
+        assert db.get_all_solves(session_ids["A"])[0][1:] == (
+            "3x3x3",
+            10.000001,
+            "",
+            "R U",
+            "2024-01-01 00:00:00",
+            session_ids["A"],
+        )
+
+        for session_id in session_ids.values():
+            _assert_same_solve_stats(
+                db.get_solve_stats(session_id), _expected_solve_stats(db, session_id)
+            )
+
+        # 途中で例外が発生した場合は何も追加されず、インデックスは作り直される。
+        def solves() -> Iterator[tuple[str, str, int, str, str, str]]:
+            yield ("C", "3x3x3", 10_000_000, "", "", "2024-01-01 00:00:00")
+            raise ValueError
+
+        with pytest.raises(ValueError):
+            db.import_solves(solves())
+
+        assert len(db.get_all_sessions()) == 2
+
+        with db._get_connection() as conn:
+            assert conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'solves_session_id_id_time_penalty_idx';"
+            ).fetchone()
+
+
+def test_connection_pragmas(db: Database) -> None:
+    with db._get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous;").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA foreign_keys;").fetchone()[0] == 1
+
+
+def test_hot_queries_do_not_scan_tables(db: Database) -> None:
+    """よく使うクエリが solves と solve_stats をフルスキャンしないことを EXPLAIN QUERY PLAN で確認する"""
+
+    session_id: int | None = db.create_session("Test Session")
+
+    if session_id is None:
+        raise ValueError
+
+    for i in range(20):
+        db.add_solve("3x3x3", 10.0 + i, "D2 R2 U2", session_id)
+
+    statements: list[str] = []
+
+    with db._get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+
+    solve_id: int | None = db.add_solve("3x3x3", 12.34, "D2 R2 U2", session_id, "dnf")
+
+    if solve_id is None:
+        raise ValueError
+
+    db.get_session(session_id)
+    db.get_last_session()
+    db.get_solve(session_id, solve_id)
+    db.get_all_solves(session_id)
+    list(db.iter_solves(session_id, batch=5))
+    db.get_solves_page(session_id, solve_id, 5)
+    db.get_solve_ids_and_times_and_penalties(session_id)
+    db.get_previous_solve_range(session_id, solve_id, 12)
+    db.get_solve_stats(session_id)
+    db.get_solve_count(session_id)
+    db.calculate_solve_mean(session_id)
+    db.get_session_summaries()
+    db.get_session_summary(session_id)
+    db.change_solve_penalty("plus_2", solve_id)
+    db.remove_solve(solve_id, session_id)
+    db.rebuild_solve_stats(session_id)
+    db.delete_session(session_id)
+
+    with db._get_connection() as conn:
+        conn.set_trace_callback(None)
+        queries: list[str] = [
+            statement
+            for statement in statements
+            if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))
+        ]
+
+        assert queries
+
+        for query in queries:
+            # SCAN の後ろは別名 (FROM solves AS s など) のこともあるので、テーブル名に戻す。
+            tables: dict[str, str] = {
+                alias: table
+                for table, alias in re.findall(
+                    r"\b(?:FROM|JOIN)\s+(\w+)\s+AS\s+(\w+)", query, re.IGNORECASE
+                )
+            }
+
+            for *_, detail in conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall():
+                # インデックスを使うスキャンと、サブクエリの結果 (SCAN (subquery-1)) のスキャンは除く。
+                if (match := re.match(r"SCAN (\w+)", detail)) is None or " INDEX " in detail:
+                    continue
+
+                # すべてのセッションを返すクエリだけは sessions 全体をスキャンしてよい。
+                assert tables.get(match[1], match[1]) == "sessions", f"{detail}: {query}"
+
+
+def test_get_session_summaries(temp_db_path: Path) -> None:
+    with Database(temp_db_path, ao_sizes=(3, 5)) as db:
+        session_id: int | None = db.create_session("Test Session")
+        empty_session_id: int | None = db.create_session("Empty Session")
+
+        if session_id is None or empty_session_id is None:
+            raise ValueError
+
+        for time, penalty in (
+            (12.0, "dnf"),
+            (10.0, "plus_2"),
+            (13.0, ""),
+            (14.0, ""),
+            (11.0, ""),
+        ):
+            db.add_solve("3x3x3", time, "D2 R2 U2", session_id, penalty)
+
+        summaries: list[tuple[Any, ...]] = db.get_session_summaries()
+
+        assert len(summaries) == 2
+        assert summaries[0] == db.get_session_summary(session_id)
+
+        id, name, solve_count, mean, best, best_ao, created_at, updated_at = summaries[0]
+
+        assert (id, name, solve_count) == (session_id, "Test Session", 5)
+        assert mean == db.calculate_solve_mean(session_id)
+        assert best == 11.0, "DNF は除いて +2 を足したタイムで比べるべき"
+        # ao3: (DNF, 12.00+, 13) -> 13, (12.00+, 13, 14) -> 13, (13, 14, 11) -> 13
+        assert best_ao == 13.0
+        assert (created_at, updated_at) == db.get_session(session_id)[2:]
+
+        _, name, solve_count, mean, best, best_ao, _, _ = summaries[1]
+
+        assert (name, solve_count) == ("Empty Session", 0)
+        assert math.isnan(mean) and math.isnan(best)
+        assert isinstance(best_ao, float) and math.isnan(best_ao)
+
+        with pytest.raises(SessionNotFoundError):
+            db.get_session_summary(empty_session_id + 1)
@@ -0,0 +1,128 @@
+import csv
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from sctt.modules.database import Database, SessionNotFoundError
+from sctt.modules.exporter import (
+    ColumnBatch,
+    ExportFormat,
+    detect_format,
+    export_session,
+    read_columnar,
+)
+from sctt.modules.importer import ImportReport, read_csv
+from sctt.utils import convert_utc_to_local
+
+SOLVES: list[tuple[str, str, int, str, str, str]] = [
+    ("s", "3x3x3", 12_340_000, "", "R U R' U'", "2024-01-01 00:00:00"),
+    ("s", "4x4x4", 62_500_000, "plus_2", "Rw U", "2024-06-01 12:30:00"),
+    ("s", "3x3x3", 9_000_001, "dnf", "", "2024-12-31 23:59:59"),
+]
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Iterator[Database]:
+    db: Database = Database(tmp_path / "sctt_pytest.db")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def session_id(db: Database) -> int:
+    return db.import_solves(SOLVES)["s"]
+
+
+def test_export_csv(db: Database, session_id: int, tmp_path: Path) -> None:
+    path: Path = tmp_path / "solves.csv"
+
+    assert export_session(db, session_id, path, batch_size=2) == 3
+
+    with open(path, encoding="utf-8", newline="") as file:
+        rows: list[dict[str, str]] = list(csv.DictReader(file))
+
+    assert [row["penalty"] for row in rows] == ["", "+2", "DNF"]
+    assert [row["date"] for row in rows] == [convert_utc_to_local(date) for *_, date in SOLVES]
+
+    # 書き出した CSV はそのままインポートできる。
+    report: ImportReport = ImportReport()
+    reimported: list[tuple[Any, ...]] = [solve[1:] for solve in read_csv(path, report)]
+
+    assert report.skipped == 0
+    assert reimported == [solve[1:] for solve in SOLVES]
+
+
+def test_export_jsonl(db: Database, session_id: int, tmp_path: Path) -> None:
+    path: Path = tmp_path / "solves.jsonl"
+
+    assert export_session(db, session_id, path) == 3
+
+    with open(path, encoding="utf-8") as file:
+        rows: list[dict[str, Any]] = [json.loads(line) for line in file]
+
+    assert [
+        (row["event"], row["time_us"], row["penalty"], row["scramble"]) for row in rows
+    ] == [solve[1:5] for solve in SOLVES]
+
+
+def test_export_columnar(db: Database, session_id: int, tmp_path: Path) -> None:
+    path: Path = tmp_path / "solves.scol"
+
+    assert export_session(db, session_id, path, batch_size=2) == 3
+
+    batches: list[ColumnBatch] = list(read_columnar(path))
+
+    assert [len(batch.ids) for batch in batches] == [2, 1]
+    assert [time for batch in batches for time in batch.times_us] == [
+        12_340_000,
+        62_500_000,
+        9_000_001,
+    ]
+    assert [penalty for batch in batches for penalty in batch.penalties] == [
+        "",
+        "plus_2",
+        "dnf",
+    ]
+    assert [event for batch in batches for event in batch.events] == [
+        "3x3x3",
+        "4x4x4",
+        "3x3x3",
+    ]
+    assert [scramble for batch in batches for scramble in batch.scrambles] == [
+        "R U R' U'",
+        "Rw U",
+        "",
+    ]
+    assert batches[0].timestamps[0] == 1_704_067_200
+
+
+def test_export_empty_session(db: Database, tmp_path: Path) -> None:
+    session_id: int | None = db.create_session("empty")
+
+    if session_id is None:
+        raise ValueError
+
+    path: Path = tmp_path / "solves.scol"
+
+    assert export_session(db, session_id, path) == 0
+    assert list(read_columnar(path)) == []
+
+
+def test_export_errors(db: Database, session_id: int, tmp_path: Path) -> None:
+    with pytest.raises(SessionNotFoundError):
+        export_session(db, session_id + 1, tmp_path / "solves.csv")
+
+    with pytest.raises(ValueError):
+        export_session(db, session_id, tmp_path / "solves.txt")
+
+    with pytest.raises(ValueError):
+        list(read_columnar(Path(__file__)))
+
+
+def test_detect_format() -> None:
+    assert detect_format(Path("a.CSV")) == ExportFormat.CSV
+    assert detect_format(Path("a.jsonl")) == ExportFormat.JSONL
+    assert detect_format(Path("a.scol")) == ExportFormat.COLUMNAR
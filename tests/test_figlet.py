@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pytest
+from textual_pyfiglet.pyfiglet import figlet_format
+
+from sctt.modules.figlet import GlyphRenderer
+from sctt.modules.timer import Timer
+
+FONT: Path = Path(__file__).parents[1] / "src" / "sctt" / "fonts" / "mono_banner"
+
+
+def test_render_matches_figlet_format() -> None:
+    """figlet_format と同じ結果になることを確認する (折り返しを含む)"""
+
+    glyph_renderer: GlyphRenderer = GlyphRenderer(FONT)
+
+    for seconds in (0.0, 1.23, 9.99, 12.3, 61.05, 754.5, 3_600.0, Timer.MAXIMUM_TIME):
+        for decimal_places in (1, 2):
+            text: str = Timer.format_time(seconds, decimal_places)
+
+            for width in (12, 25, 40, 80, 200):
+                assert glyph_renderer.render(text, width) == str(
+                    figlet_format(text, str(FONT), width=width)
+                ), (text, width)
+
+
+def test_render_not_pre_rendered_character() -> None:
+    """あらかじめ描画していない文字は figlet_format で描画する"""
+
+    glyph_renderer: GlyphRenderer = GlyphRenderer(FONT, "0123456789")
+
+    assert glyph_renderer.render("1:23", 80) == str(figlet_format("1:23", str(FONT), width=80))
+
+
+def test_render_narrow_width() -> None:
+    """1 文字も入らない幅では 1 文字ずつの行にする"""
+
+    glyph_renderer: GlyphRenderer = GlyphRenderer(FONT)
+
+    assert glyph_renderer.render("12", 1) == glyph_renderer.render(
+        "1", 80
+    ) + glyph_renderer.render("2", 80)
+
+
+def test_render_empty() -> None:
+    assert GlyphRenderer(FONT).render("", 80) == ""
+
+
+def test_overlapping_font() -> None:
+    """文字を重ねて並べるフォントはあらかじめ描画できない"""
+
+    with pytest.raises(ValueError):
+        GlyphRenderer(Path("standard"), "AV")
@@ -0,0 +1,226 @@
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from sctt.modules.database import Database
+from sctt.modules.importer import (
+    ImportedSolve,
+    ImportFormat,
+    ImportReport,
+    _JSONStreamReader,
+    create_solve,
+    detect_format,
+    import_file,
+    parse_time,
+    read_cstimer,
+    read_csv,
+    read_twisty_timer,
+)
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Iterator[Database]:
+    db: Database = Database(tmp_path / "sctt_pytest.db", ao_sizes=(5,))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def cstimer_file(tmp_path: Path) -> Path:
+    session_data: dict[str, Any] = {
+        "1": {"name": "main", "opt": {}},
+        "2": {"name": "big", "opt": {"scrType": "444wca"}},
+        "3": {"name": "pyra", "opt": {"scrType": "pyrso"}},
+    }
+    data: dict[str, Any] = {
+        "session1": [
+            [[0, 12345], "R U R' U'", "", 1700000000],
+            [[2000, 10000], "F2 B2", "comment", 1700000060],
+            [[-1, 9000], "D L2", "", 1700000120],
+            [[0, 11000], "Rw 3Uw", "", 1700000180],
+            "broken",
+        ],
+        "session2": [[[0, 60000], "Rw Uw 3Fw", "", 1700000000]],
+        "session3": [[[0, 3000], "R U", "", 1700000000]],
+        "properties": {"sessionData": json.dumps(session_data)},
+    }
+    path: Path = tmp_path / "cstimer.json"
+    path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    return path
+
+
+def test_parse_time() -> None:
+    assert parse_time("12.34") == 12_340_000
+    assert parse_time("1:02.5") == 62_500_000
+    assert parse_time("1:01:02.5") == 3_662_500_000
+
+    for text in ("", "1:2:3:4", "abc"):
+        with pytest.raises(ValueError):
+            parse_time(text)
+
+
+def test_create_solve() -> None:
+    assert create_solve("s", "2x2x2", 1, "", " R  U2 ", "") == ImportedSolve(
+        "s", "2x2x2", 1, "", "R U2", ""
+    )
+    assert create_solve("s", "3x3x3", 0, "dnf", "", "").penalty == "dnf"
+    assert create_solve("s", "5x5x5", 1, "", "3Rw", "").scramble == "3Rw"
+
+    for event, time_us, penalty, scramble in (
+        ("megaminx", 1, "", ""),
+        ("3x3x3", 1, "+2", ""),
+        ("3x3x3", 0, "", ""),
+        ("3x3x3", 36_000_000_000, "", ""),
+        ("3x3x3", 1, "", "R X"),
+        ("2x2x2", 1, "", "Rw"),
+        ("3x3x3", 1, "", "3Rw"),
+    ):
+        with pytest.raises(ValueError):
+            create_solve("s", event, time_us, penalty, scramble, "")
+
+
+def test_json_stream_reader(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """値がチャンクの境目で切れていても正しくデコードできることを確認する"""
+
+    monkeypatch.setattr(_JSONStreamReader, "CHUNK_SIZE", 3)
+    values: list[Any] = [123456789, "a b c", [1.5, {"x": None}], True]
+    path: Path = tmp_path / "values.json"
+    path.write_text(" [ " + " , ".join(map(json.dumps, values)) + " ] ", encoding="utf-8")
+
+    with open(path, encoding="utf-8") as file:
+        reader: _JSONStreamReader = _JSONStreamReader(file)
+        reader.expect("[")
+        decoded: list[Any] = []
+
+        while reader.peek() != "]":
+            decoded.append(reader.decode())
+
+            if reader.peek() == ",":
+                reader.expect(",")
+
+        reader.expect("]")
+
+        assert reader.peek() == ""
+
+    assert decoded == values
+
+
+def test_read_cstimer(cstimer_file: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(_JSONStreamReader, "CHUNK_SIZE", 16)
+    report: ImportReport = ImportReport()
+    solves: list[ImportedSolve] = list(read_cstimer(cstimer_file, report))
+
+    assert solves == [
+        ImportedSolve("main", "3x3x3", 12_345_000, "", "R U R' U'", "2023-11-14 22:13:20"),
+        ImportedSolve("main", "3x3x3", 10_000_000, "plus_2", "F2 B2", "2023-11-14 22:14:20"),
+        ImportedSolve("main", "3x3x3", 9_000_000, "dnf", "D L2", "2023-11-14 22:15:20"),
+        ImportedSolve("big", "4x4x4", 60_000_000, "", "Rw Uw 3Fw", "2023-11-14 22:13:20"),
+    ]
+    assert report.skipped == 3
+    assert report.errors[0].startswith("session1[3]: ")
+    assert report.errors[2] == "session3[0]: Unsupported event: pyrso"
+
+
+def test_read_cstimer_without_properties(tmp_path: Path) -> None:
+    path: Path = tmp_path / "cstimer.json"
+    path.write_text('{"session1": [[[0, 1000], "R", "", 0]]}', encoding="utf-8")
+
+    assert [solve.session for solve in read_cstimer(path, ImportReport())] == ["session1"]
+
+
+def test_read_cstimer_invalid_json(tmp_path: Path) -> None:
+    path: Path = tmp_path / "cstimer.json"
+    path.write_text('{"session1": [[[0, 1000], "R", "", 0]', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(read_cstimer(path, ImportReport()))
+
+
+def test_read_twisty_timer(tmp_path: Path) -> None:
+    path: Path = tmp_path / "backup.txt"
+    path.write_text(
+        '"Puzzle";"Category";"Time(millis)";"Date(millis)";"Scramble";"Penalty";"Comment"\n'
+        '"333";"Normal";"12345";"1700000000000";"R U";"0";""\n'
+        '"333";"Normal";"14000";"1700000060000";"F2";"1";""\n'
+        '"222";"Normal";"3000";"1700000120000";"R U F";"2";""\n'
+        '"sq1";"Normal";"3000";"1700000120000";"";"0";""\n'
+        '"333";"Normal";"3000";"1700000120000";"R";"5";""\n',
+        encoding="utf-8",
+    )
+    report: ImportReport = ImportReport()
+
+    assert list(read_twisty_timer(path, report)) == [
+        ImportedSolve("3x3x3 Normal", "3x3x3", 12_345_000, "", "R U", "2023-11-14 22:13:20"),
+        ImportedSolve(
+            "3x3x3 Normal", "3x3x3", 12_000_000, "plus_2", "F2", "2023-11-14 22:14:20"
+        ),
+        ImportedSolve(
+            "2x2x2 Normal", "2x2x2", 3_000_000, "dnf", "R U F", "2023-11-14 22:15:20"
+        ),
+    ]
+    assert report.errors == ["line 5: Unsupported puzzle: sq1", "line 6: Invalid penalty: 5"]
+
+
+def test_read_csv(tmp_path: Path) -> None:
+    path: Path = tmp_path / "times.csv"
+    path.write_text(
+        "Time,Penalty,Scramble,Date,Event\n"
+        "12.34,,R U,2024-01-01T09:00:00+09:00,\n"
+        "1:02.50,+2,Rw U,2024-01-01T00:00:00Z,4x4x4\n"
+        "9.00,DNF,,2024-01-01 00:00:00+00:00,\n"
+        "abc,,,,\n",
+        encoding="utf-8",
+    )
+    report: ImportReport = ImportReport()
+
+    assert list(read_csv(path, report)) == [
+        ImportedSolve("times", "3x3x3", 12_340_000, "", "R U", "2024-01-01 00:00:00"),
+        ImportedSolve("times", "4x4x4", 62_500_000, "plus_2", "Rw U", "2024-01-01 00:00:00"),
+        ImportedSolve("times", "3x3x3", 9_000_000, "dnf", "", "2024-01-01 00:00:00"),
+    ]
+    assert report.skipped == 1
+    assert report.errors[0].startswith("line 5: ")
+
+
+def test_read_csv_without_time_column(tmp_path: Path) -> None:
+    path: Path = tmp_path / "times.csv"
+    path.write_text("scramble\nR U\n", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(read_csv(path, ImportReport()))
+
+
+def test_detect_format(tmp_path: Path, cstimer_file: Path) -> None:
+    twisty_timer_file: Path = tmp_path / "backup.txt"
+    twisty_timer_file.write_text('"Puzzle";"Category";"Time(millis)"\n', encoding="utf-8")
+    csv_file: Path = tmp_path / "times.txt"
+    csv_file.write_text("time,penalty\n", encoding="utf-8")
+
+    assert detect_format(cstimer_file) == ImportFormat.CSTIMER
+    assert detect_format(twisty_timer_file) == ImportFormat.TWISTY_TIMER
+    assert detect_format(csv_file) == ImportFormat.CSV
+
+
+def test_import_file(db: Database, cstimer_file: Path) -> None:
+    report: ImportReport = import_file(db, cstimer_file)
+
+    assert report.counts == {"main": 3, "big": 1}
+    assert report.total == 4
+    assert report.skipped == 3
+    assert [session[1] for session in db.get_all_sessions()] == ["main", "big"]
+    assert [solve[1:5] for solve in db.get_all_solves(report.session_ids["main"])] == [
+        ("3x3x3", 12.345, "", "R U R' U'"),
+        ("3x3x3", 10.0, "plus_2", "F2 B2"),
+        ("3x3x3", 9.0, "dnf", "D L2"),
+    ]
+    assert len(db.get_solve_stats(report.session_ids["big"])) == 1
+
+
+def test_import_file_into_one_session(db: Database, cstimer_file: Path) -> None:
+    report: ImportReport = import_file(db, cstimer_file, ImportFormat.CSTIMER, "imported")
+
+    assert report.counts == {"imported": 4}
+    assert len(db.get_all_solves(report.session_ids["imported"])) == 4
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from sctt.modules.key_events import KeyEvent, KeyEventQueue, LatencyHistogram
+
+
+def test_histogram_record() -> None:
+    histogram: LatencyHistogram = LatencyHistogram(num_buckets=4)
+
+    for latency_ns in (0, 1_000, 1_001, 2_000, 3_999, 8_000, 100_000):
+        histogram.record(latency_ns)
+
+    # 区間の上限は 1, 2, 4, 8 µs (8 µs を超える値は最後の区間に入る)
+    assert histogram.buckets() == [(1_000, 2), (2_000, 2), (4_000, 1), (8_000, 2)]
+    assert histogram.count == 7
+    assert histogram.max_ns == 100_000
+    assert histogram.mean_ns == pytest.approx(116_000 / 7)
+
+
+def test_histogram_percentile() -> None:
+    histogram: LatencyHistogram = LatencyHistogram()
+
+    assert histogram.percentile(50) == 0
+
+    for _ in range(90):
+        histogram.record(500)
+
+    for _ in range(10):
+        histogram.record(3_000_000)
+
+    assert histogram.percentile(50) == 1_000
+    assert histogram.percentile(90) == 1_000
+    assert histogram.percentile(99) == 4_096_000
+
+    with pytest.raises(ValueError):
+        histogram.percentile(101)
+
+    histogram.reset()
+
+    assert histogram.count == 0
+
+
+def test_queue_drain() -> None:
+    """届いた順に取り出せて、遅延が記録されることを確認する"""
+
+    queue: KeyEventQueue = KeyEventQueue()
+    events: list[KeyEvent] = [KeyEvent("down", i) for i in range(3)]
+
+    for event in events:
+        queue.put(event)
+
+    assert len(queue) == 3
+    assert list(queue.drain()) == events
+    assert len(queue) == 0
+    assert queue.delay_histogram.count == 3
+
+
+def test_queue_notify_once() -> None:
+    """取り出されるまでは notify を 1 回しか呼ばないことを確認する"""
+
+    notified: list[None] = []
+    queue: KeyEventQueue = KeyEventQueue(lambda: notified.append(None))
+
+    queue.put(KeyEvent("down", 0))
+    queue.put(KeyEvent("up", 1))
+
+    assert len(notified) == 1
+
+    list(queue.drain())
+    queue.put(KeyEvent("down", 2))
+
+    assert len(notified) == 2
+
+
+def test_queue_from_another_thread() -> None:
+    """別のスレッドから追加したイベントを取りこぼさないことを確認する"""
+
+    queue: KeyEventQueue = KeyEventQueue()
+    received: list[KeyEvent] = []
+
+    def put_events() -> None:
+        for i in range(10_000):
+            queue.put(KeyEvent("down", i))
+
+    thread: threading.Thread = threading.Thread(target=put_events)
+    thread.start()
+
+    while thread.is_alive():
+        received.extend(queue.drain())
+
+    thread.join()
+    received.extend(queue.drain())
+
+    assert [event.timestamp_ns for event in received] == list(range(10_000))
@@ -0,0 +1,105 @@
+import random
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from sctt.modules.pocket_cube import (
+    MOVES,
+    N_MOVES,
+    N_STATES,
+    N_TWIST,
+    UNKNOWN_DISTANCE,
+    PocketCubeScrambler,
+    generate_distance_table,
+    get_distance_table_file,
+)
+from sctt.modules.simulate import Cube
+
+
+@pytest.fixture(scope="module")
+def scrambler() -> PocketCubeScrambler:
+    """6 手までの状態だけを求めた表を使う (すべて求めると時間がかかる)"""
+
+    return PocketCubeScrambler(generate_distance_table(max_depth=6))
+
+
+def _apply_moves(scrambler: PocketCubeScrambler, moves: list[str]) -> int:
+    state: int = 0
+
+    for move in moves:
+        perm, twist = divmod(state, N_TWIST)
+        index: int = MOVES.index(move)
+        state = (
+            scrambler.perm_move[perm * N_MOVES + index] * N_TWIST
+            + scrambler.twist_move[twist * N_MOVES + index]
+        )
+
+    return state
+
+
+class _FixedRandom(random.Random):
+    def __init__(self, values: list[int]) -> None:
+        super().__init__()
+        self.values: list[int] = values
+
+    def randrange(self, *args: object, **kwargs: object) -> int:
+        return self.values.pop(0)
+
+
+def test_distance_table(scrambler: PocketCubeScrambler) -> None:
+    counts: Counter[int] = Counter()
+
+    # 1 バイトに 2 つの状態の手数が入っている。
+    for value, count in Counter(bytes(scrambler.distances)).items():
+        counts[value & 0xF] += count
+        counts[value >> 4] += count
+
+    # 2x2x2 の各手数の状態の数 (HTM)
+    assert [counts[distance] for distance in range(7)] == [1, 9, 54, 321, 1847, 9992, 50136]
+    assert counts[UNKNOWN_DISTANCE] == N_STATES - sum(
+        counts[distance] for distance in range(7)
+    )
+
+
+def test_solve(scrambler: PocketCubeScrambler) -> None:
+    """最短の解をシミュレーターで適用して、キューブが揃うことを確認する"""
+
+    rng: random.Random = random.Random(0)
+    solved_state: bytes = Cube(2).state
+
+    for _ in range(20):
+        scramble: list[str] = [rng.choice(MOVES) for _ in range(6)]
+        solution: list[str] = scrambler.solve(_apply_moves(scrambler, scramble))
+        cube: Cube = Cube(2)
+        cube.apply_scramble(" ".join(scramble + solution))
+
+        assert len(solution) <= len(scramble)
+        assert cube.state == solved_state
+
+    assert scrambler.solve(0) == []
+    assert scrambler.solve(_apply_moves(scrambler, ["R", "U"])) == ["U'", "R'"]
+
+
+def test_generate_scramble(scrambler: PocketCubeScrambler) -> None:
+    state: int = _apply_moves(scrambler, ["R", "U", "F", "R2", "U'"])
+    # 揃っている状態と 1 手の状態は選び直す。
+    rng: _FixedRandom = _FixedRandom([0, _apply_moves(scrambler, ["R"]), state])
+    scramble: str = scrambler.generate_scramble(rng)
+
+    assert _apply_moves(scrambler, scramble.split()) == state
+    assert len(scramble.split()) == 5
+
+
+def test_load(tmp_path: Path) -> None:
+    assert PocketCubeScrambler.load(tmp_path) is None
+
+    get_distance_table_file(tmp_path).write_bytes(bytes(10))
+
+    assert PocketCubeScrambler.load(tmp_path) is None, "大きさが違うファイルは読み込まないべき"
+
+    get_distance_table_file(tmp_path).write_bytes(bytes(N_STATES // 2))
+    scrambler: PocketCubeScrambler | None = PocketCubeScrambler.load(tmp_path)
+
+    assert scrambler is not None
+    assert scrambler.get_distance(N_STATES - 1) == 0
@@ -0,0 +1,68 @@
+import pytest
+
+from sctt.modules.refresh_scheduler import RefreshScheduler
+from sctt.modules.timer import Timer
+
+
+def test_get_next_deadline() -> None:
+    """表示が次に変わる経過時間を確認する"""
+
+    scheduler: RefreshScheduler = RefreshScheduler(0.1)
+
+    assert scheduler.get_next_deadline(0.0) == pytest.approx(0.05)
+    assert scheduler.get_next_deadline(0.05) == pytest.approx(0.15)
+    assert scheduler.get_next_deadline(1.23) == pytest.approx(1.25)
+    assert scheduler.get_next_deadline(59.97) == pytest.approx(60.0)
+    assert scheduler.get_next_deadline(60.0) == pytest.approx(60.05)
+
+
+def test_deadline_is_where_display_changes() -> None:
+    """予定した時刻の前後で、表示されるタイムが変わることを確認する"""
+
+    scheduler: RefreshScheduler = RefreshScheduler(0.1)
+    elapsed_time: float = 0.0
+
+    for _ in range(1_300):
+        deadline: float = scheduler.get_next_deadline(elapsed_time)
+
+        assert Timer.format_time(deadline - 0.001, 1) == Timer.format_time(elapsed_time, 1)
+        assert Timer.format_time(deadline + 0.001, 1) != Timer.format_time(elapsed_time, 1)
+
+        elapsed_time = deadline + 0.001
+
+
+def test_schedule() -> None:
+    scheduler: RefreshScheduler = RefreshScheduler(0.1, margin=0.001)
+
+    assert scheduler.schedule(1.21) == pytest.approx(0.041)
+    assert scheduler.deadline == pytest.approx(1.25)
+
+
+def test_record_frame() -> None:
+    """描画した回数、描画しなかった回数、遅れた回数と描画にかかった時間を確認する"""
+
+    scheduler: RefreshScheduler = RefreshScheduler(0.1, miss_tolerance=0.01)
+
+    scheduler.schedule(0.0)
+    scheduler.record_frame(0.051, 0.002, True)
+    scheduler.schedule(0.051)
+    scheduler.record_frame(0.149, 0.0, False)
+    scheduler.schedule(0.149)
+    scheduler.record_frame(0.2, 0.004, True)
+
+    assert scheduler.frame_count == 2
+    assert scheduler.skipped_count == 1
+    assert scheduler.missed_deadline_count == 1
+    assert scheduler.last_frame_time == pytest.approx(0.004)
+    assert scheduler.max_frame_time == pytest.approx(0.004)
+    assert scheduler.mean_frame_time == pytest.approx(0.003)
+
+    scheduler.reset()
+
+    assert scheduler.frame_count == 0
+    assert scheduler.mean_frame_time == 0.0
+
+
+def test_invalid_resolution() -> None:
+    with pytest.raises(ValueError):
+        RefreshScheduler(0)
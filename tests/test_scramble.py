@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from sctt.modules.scramble import (
+    CUBE_SIZE_VARIANT,
+    MODIFIERS,
+    generate_scrambles,
+    get_scramble_moves,
+    iter_scrambles,
+    write_scrambles,
+)
+
+
+def _split_move(token: str) -> str:
+    return token.removesuffix("2").removesuffix("'")
+
+
+def test_generate_scrambles() -> None:
+    pytest.importorskip("numpy")
+
+    for size in CUBE_SIZE_VARIANT:
+        moves, scramble_length = get_scramble_moves(size)
+        scrambles: list[str] = generate_scrambles(size, 50, seed=0)
+
+        assert len(scrambles) == 50
+
+        for scramble in scrambles:
+            tokens: list[str] = scramble.split(" ")
+            scramble_moves: list[str] = [_split_move(token) for token in tokens]
+
+            assert len(tokens) == scramble_length
+            assert set(scramble_moves) <= set(moves)
+            assert {
+                token.removeprefix(move)
+                for token, move in zip(tokens, scramble_moves, strict=True)
+            } <= set(MODIFIERS)
+            # generate_scramble と同じく、直前 2 つと同じ回転記号は選ばない。
+            assert all(
+                move not in scramble_moves[max(i - 2, 0) : i]
+                for i, move in enumerate(scramble_moves)
+            ), scramble
+
+
+def test_generate_scrambles_seed() -> None:
+    pytest.importorskip("numpy")
+
+    assert generate_scrambles(3, 20, seed=1) == generate_scrambles(3, 20, seed=1)
+    assert generate_scrambles(3, 20, seed=1) != generate_scrambles(3, 20, seed=2)
+    assert generate_scrambles(3, 0) == []
+
+
+def test_iter_scrambles_batches() -> None:
+    pytest.importorskip("numpy")
+
+    assert [len(batch) for batch in iter_scrambles(4, 7, seed=0, batch_size=3)] == [3, 3, 1]
+
+    for kwargs in ({"count": -1}, {"count": 1, "batch_size": 0}):
+        with pytest.raises(ValueError):
+            list(iter_scrambles(3, **kwargs))
+
+    with pytest.raises(ValueError):
+        generate_scrambles(8, 1)
+
+
+def test_write_scrambles(tmp_path: Path) -> None:
+    pytest.importorskip("numpy")
+
+    path: Path = tmp_path / "scrambles.txt"
+
+    assert write_scrambles(path, 3, 25, seed=3) == 25
+    assert path.read_text(encoding="utf-8").splitlines() == generate_scrambles(3, 25, seed=3)
@@ -0,0 +1,136 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from sctt.modules.scramble_queue import ScrambleQueue
+from sctt.modules.simulate import Cube
+from sctt.modules.two_phase import MAX_LENGTH
+
+
+def _wait_until_filled(
+    scramble_queue: ScrambleQueue, cube_size: int, timeout: float = 10
+) -> None:
+    deadline: float = time.monotonic() + timeout
+
+    while scramble_queue.count(cube_size) < scramble_queue.prefetch_count:
+        assert time.monotonic() < deadline, "スクランブルが用意されるべき"
+        time.sleep(0.01)
+
+
+def test_pop_prefetched_scramble() -> None:
+    scramble_queue: ScrambleQueue = ScrambleQueue(prefetch_count=2)
+    scramble_queue.start()
+
+    try:
+        scramble_queue.prefetch(4)
+        _wait_until_filled(scramble_queue, 4)
+
+        scramble, cube = scramble_queue.pop(4)
+        expected_cube: Cube = Cube(4)
+        expected_cube.apply_scramble(scramble)
+
+        assert cube.size == 4
+        assert cube.faces == expected_cube.faces, "スクランブルを適用済みのキューブであるべき"
+
+        # 取り出した分は補充される。
+        _wait_until_filled(scramble_queue, 4)
+    finally:
+        scramble_queue.stop()
+
+
+def test_stop_while_generating(monkeypatch: pytest.MonkeyPatch) -> None:
+    """スクランブルの生成が終わらなくても、 stop は STOP_TIMEOUT で戻る"""
+
+    monkeypatch.setattr(ScrambleQueue, "STOP_TIMEOUT", 0.1)
+    generating: threading.Event = threading.Event()
+    finish: threading.Event = threading.Event()
+
+    def generate_scramble() -> str:
+        generating.set()
+        finish.wait()
+        return "R"
+
+    scramble_queue: ScrambleQueue = ScrambleQueue(prefetch_count=1)
+    scramble_queue._random_state_scramblers[3] = generate_scramble
+    scramble_queue.start()
+    scramble_queue.prefetch(3)
+
+    try:
+        assert generating.wait(10)
+        thread: threading.Thread | None = scramble_queue._thread
+        started_at: float = time.monotonic()
+        scramble_queue.stop()
+
+        assert time.monotonic() - started_at < 5, "生成中のスレッドを待ち続けないべき"
+        assert scramble_queue._thread is None
+    finally:
+        finish.set()
+
+    assert thread is not None
+    thread.join(10)
+
+    assert not thread.is_alive()
+
+
+def test_pop_without_worker() -> None:
+    """ワーカーが動いていない場合はその場で生成する"""
+
+    scramble_queue: ScrambleQueue = ScrambleQueue()
+    scramble, cube = scramble_queue.pop(2)
+    expected_cube: Cube = Cube(2)
+    expected_cube.apply_scramble(scramble)
+
+    assert cube.faces == expected_cube.faces
+
+
+def test_invalid_cube_size() -> None:
+    with pytest.raises(ValueError):
+        ScrambleQueue().pop(8)
+
+
+def test_pop_without_random_state_tables(tmp_path: Path) -> None:
+    """表が無い間は、 2x2x2 と 3x3x3 もランダムな回転記号のスクランブルにする"""
+
+    scramble_queue: ScrambleQueue = ScrambleQueue(tables_dir=tmp_path)
+
+    for cube_size, scramble_length in ((2, 10), (3, 20)):
+        scramble, cube = scramble_queue.pop(cube_size)
+        expected_cube: Cube = Cube(cube_size)
+        expected_cube.apply_scramble(scramble)
+
+        assert len(scramble.split()) == scramble_length
+        assert cube.faces == expected_cube.faces
+
+
+@pytest.mark.slow
+def test_random_state_3x3x3_scramble(two_phase_tables_dir: Path) -> None:
+    """3x3x3 のランダムな状態のスクランブルは別のプロセスで生成する"""
+
+    scramble_queue: ScrambleQueue = ScrambleQueue(
+        prefetch_count=1, tables_dir=two_phase_tables_dir
+    )
+    scramble, _ = scramble_queue.pop(3)
+
+    assert len(scramble.split()) == 20, (
+        "用意が間に合っていない場合は、その場でソルバーを使わずにランダムな回転記号にするべき"
+    )
+    assert scramble_queue._solver_executor is None
+
+    scramble_queue.start()
+
+    try:
+        scramble_queue.prefetch(3)
+        _wait_until_filled(scramble_queue, 3, timeout=60)
+        scramble, cube = scramble_queue.pop(3)
+        expected_cube: Cube = Cube(3)
+        expected_cube.apply_scramble(scramble)
+
+        assert len(scramble.split()) <= MAX_LENGTH
+        assert cube.faces == expected_cube.faces
+        assert scramble_queue._solver_executor is not None
+    finally:
+        scramble_queue.stop()
+
+    assert scramble_queue._solver_executor is None, "stop でソルバーのプロセスも止めるべき"
@@ -0,0 +1,80 @@
+import asyncio
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+from textual.app import App, ComposeResult
+
+from sctt.modules.scramble_queue import ScrambleQueue
+from sctt.modules.two_phase import MAX_LENGTH, get_tables_file
+from sctt.widgets import scramble_widget
+from sctt.widgets.scramble_widget import ScrambleWidget
+
+
+class ScrambleApp(App[None]):
+    def compose(self) -> ComposeResult:
+        yield ScrambleWidget()
+
+
+def test_start_table_processes_in_app(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """アプリの実行中 (sys.stderr が置き換えられている間) でも、表を生成するプロセスを起動できる"""
+
+    monkeypatch.setattr(scramble_widget, "get_cache_dir", lambda: tmp_path)
+
+    async def run() -> None:
+        app: ScrambleApp = ScrambleApp()
+
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            scramble_queue: ScrambleQueue = app.query_one(ScrambleWidget).scramble_queue
+
+            try:
+                assert app.return_code is None
+                assert set(scramble_queue._tables_processes) == {2, 3}
+
+                for process in scramble_queue._tables_processes.values():
+                    assert process is not None and process.is_alive()
+            finally:
+                # 表の生成は時間がかかるので、最後まで待たない。
+                for process in scramble_queue._tables_processes.values():
+                    if process is not None:
+                        process.terminate()
+                        process.join()
+
+    asyncio.run(run())
+
+
+@pytest.mark.slow
+def test_random_state_scramble_in_app(
+    two_phase_tables_dir: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """アプリの実行中でも、ソルバーのプロセスで 3x3x3 のスクランブルを生成できる"""
+
+    shutil.copy(get_tables_file(two_phase_tables_dir), tmp_path)
+    monkeypatch.setattr(scramble_widget, "get_cache_dir", lambda: tmp_path)
+
+    async def run() -> None:
+        app: ScrambleApp = ScrambleApp()
+
+        async with app.run_test() as pilot:
+            scramble_queue: ScrambleQueue = app.query_one(ScrambleWidget).scramble_queue
+            deadline: float = time.monotonic() + 60
+
+            while scramble_queue.count(3) < scramble_queue.prefetch_count:
+                assert time.monotonic() < deadline, "スクランブルが用意されるべき"
+                assert scramble_queue._thread is not None and scramble_queue._thread.is_alive()
+                await pilot.pause(0.05)
+
+            scramble, _ = scramble_queue.pop(3)
+
+            assert len(scramble.split()) <= MAX_LENGTH
+            assert scramble_queue._solver_executor is not None
+
+            # 2x2x2 の表は無いので、生成しているプロセスを止めておく。
+            for process in scramble_queue._tables_processes.values():
+                if process is not None:
+                    process.terminate()
+                    process.join()
+
+    asyncio.run(run())
@@ -1,4 +1,15 @@
-from sctt.modules.simulate import Cube
+import random
+
+import pytest
+
+from sctt.modules.scramble import CUBE_SIZE_VARIANT, generate_scramble
+from sctt.modules.simulate import (
+    ArrayCube,
+    Cube,
+    ListCube,
+    apply_scrambles,
+    compile_scramble,
+)
 
 
 def test_apply_scramble() -> None:
@@ -16,3 +27,120 @@ def test_apply_scramble() -> None:
     cube.apply_scramble(scramble)
 
     assert cube.faces == expected_faces
+
+
+def test_array_cube_matches_list_cube() -> None:
+    """ArrayCube と ListCube が同じ状態になることを確認する"""
+
+    random.seed(0)
+
+    for size in CUBE_SIZE_VARIANT:
+        for _ in range(5):
+            scramble: str = generate_scramble(size)
+            array_cube: ArrayCube = ArrayCube(size)
+            list_cube: ListCube = ListCube(size)
+
+            array_cube.apply_scramble(scramble)
+            list_cube.apply_scramble(scramble)
+
+            assert array_cube.faces == list_cube.faces, scramble
+
+
+def test_array_cube_all_moves() -> None:
+    for move in sorted(ArrayCube.VALID_MOVES):
+        array_cube: ArrayCube = ArrayCube(7)
+        list_cube: ListCube = ListCube(7)
+
+        array_cube.apply_scramble(f"{move} R U")
+        list_cube.apply_scramble(f"{move} R U")
+
+        assert array_cube.faces == list_cube.faces, move
+
+
+def test_invalid_scramble() -> None:
+    cube: Cube = Cube()
+
+    with pytest.raises(ValueError):
+        cube.apply_scramble("R U X")
+
+
+def test_compile_scramble() -> None:
+    """合成した置換が 1 手ずつ回した結果と同じになることを確認する"""
+
+    scramble: str = "R U R' U' F2 3Rw' D"
+    permutation: tuple[int, ...] = compile_scramble(5, scramble)
+    cube: ArrayCube = ArrayCube(5)
+
+    for move in scramble.split(" "):
+        cube.apply_scramble(move)
+
+    assert bytes(ArrayCube(5).state[i] for i in permutation) == cube.state
+
+    # 同じスクランブルはキャッシュから返す。
+    hits: int = compile_scramble.cache_info().hits
+    assert compile_scramble(5, scramble) is permutation
+    assert compile_scramble.cache_info().hits == hits + 1
+
+
+def test_apply_scramble_twice() -> None:
+    scramble: str = "R U R' U' F2 D B'"
+    cube: Cube = Cube()
+    cube.apply_scramble(scramble)
+    cube.apply_scramble(scramble)
+
+    expected_cube: ListCube = ListCube()
+    expected_cube.apply_scramble(f"{scramble} {scramble}")
+
+    assert cube.faces == expected_cube.faces
+
+
+def test_invalid_scramble_keeps_state() -> None:
+    cube: Cube = Cube()
+    cube.apply_scramble("R U")
+    state: bytes = cube.state
+
+    with pytest.raises(ValueError):
+        cube.apply_scramble("F X")
+
+    assert cube.state == state
+
+
+def test_apply_scrambles() -> None:
+    """まとめて適用した状態が 1 つずつ適用した状態と同じになることを確認する"""
+
+    np = pytest.importorskip("numpy")
+
+    random.seed(0)
+
+    for size in CUBE_SIZE_VARIANT:
+        # 長さの違うスクランブルを混ぜる。
+        scrambles: list[str] = [generate_scramble(size) for _ in range(5)] + ["R", "U R'"]
+        states = apply_scrambles(size, scrambles)
+
+        assert states.shape == (len(scrambles), 6 * size * size)
+        assert states.dtype == np.uint8
+
+        for scramble, state in zip(scrambles, states, strict=True):
+            cube: ArrayCube = ArrayCube(size)
+            cube.apply_scramble(scramble)
+
+            assert state.tobytes() == cube.state, scramble
+
+    # 適用済みの状態から続けて回せる。
+    states = apply_scrambles(3, ["R U"])
+    cube = ArrayCube(3)
+    cube.apply_scramble("R U F2")
+
+    assert apply_scrambles(3, ["F2"], states)[0].tobytes() == cube.state
+
+
+def test_apply_scrambles_invalid() -> None:
+    np = pytest.importorskip("numpy")
+
+    with pytest.raises(ValueError):
+        apply_scrambles(3, ["R U", "R X"])
+
+    with pytest.raises(ValueError):
+        apply_scrambles(3, ["R U"], np.zeros((2, 54), dtype=np.uint8))
+
+    assert apply_scrambles(3, []).shape == (0, 54)
@@ -0,0 +1,170 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+from pathlib import Path
+
+import pytest
+from textual.app import App, ComposeResult
+from textual.pilot import Pilot
+
+from sctt.modules.database import Database
+from sctt.widgets.stats_widget import StatsWidget
+
+AO_SIZES: tuple[int, ...] = (3, 5, 12)
+
+Solve = tuple[int, float, str]
+
+
+class StatsApp(App[None]):
+    def __init__(self, ao_sizes: tuple[int, ...]) -> None:
+        super().__init__()
+        self.ao_sizes: tuple[int, ...] = ao_sizes
+
+    def compose(self) -> ComposeResult:
+        yield StatsWidget(self.ao_sizes)
+
+
+def _generate_solves(count: int) -> list[Solve]:
+    solves: list[Solve] = []
+
+    for i in range(1, count + 1):
+        penalty: str = "dnf" if i % 7 == 0 else "plus_2" if i % 4 == 0 else ""
+        solves.append((i, 10 + (i * 37 % 13) / 10, penalty))
+
+    return solves
+
+
+def _capture(widget: StatsWidget) -> tuple[list[list[str]], list[list[str]]]:
+    """すべての行のセルと、描画された行 (余白を除いた単語) を返す。"""
+
+    cells: list[list[str]] = [
+        [cell.plain for cell in widget._get_row_cells(row)] for row in range(widget.row_count)
+    ]
+    lines: list[list[str]] = [
+        widget.render_line(y).text.split() for y in range(widget.row_count + 1)
+    ]
+    return cells, lines
+
+
+def _run(
+    ao_sizes: tuple[int, ...],
+    initial_solves: list[Solve],
+    scenario: Callable[
+        [StatsWidget, Callable[[list[Solve]], Awaitable[None]]], Awaitable[None]
+    ],
+) -> None:
+    """initial_solves の表を作って描画してから scenario を実行する。
+
+    scenario は表を差分で更新したあと、 check に同じ状態のソルブを渡す。 check は、そのソルブで
+    update して作り直した表と、描画したセルがすべて同じになることを確認する。
+    """
+
+    async def run() -> None:
+        app: StatsApp = StatsApp(ao_sizes)
+
+        async with app.run_test(size=(100, 60)) as pilot:
+            widget: StatsWidget = app.query_one(StatsWidget)
+            widget.update(initial_solves)
+            await pilot.pause()
+            # 差分で更新する前に、セルのキャッシュを作っておく。
+            _capture(widget)
+
+            async def check(solves: list[Solve]) -> None:
+                await _check(pilot, widget, solves)
+
+            await scenario(widget, check)
+
+    asyncio.run(run())
+
+
+async def _check(pilot: Pilot[None], widget: StatsWidget, solves: list[Solve]) -> None:
+    await pilot.pause()
+    actual: tuple[list[list[str]], list[list[str]]] = _capture(widget)
+    widget.update(solves)
+    await pilot.pause()
+
+    assert actual == _capture(widget)
+
+
+def test_append_solve() -> None:
+    solves: list[Solve] = _generate_solves(20)
+
+    async def scenario(
+        widget: StatsWidget, check: Callable[[list[Solve]], Awaitable[None]]
+    ) -> None:
+        for solve in solves[10:]:
+            widget.append_solve(*solve)
+
+        await check(solves)
+
+        # 空の表に追加する
+        widget.update([])
+        widget.append_solve(*solves[0])
+        await check(solves[:1])
+
+    _run(AO_SIZES, solves[:10], scenario)
+
+
+@pytest.mark.parametrize("ao_sizes", [(5,), AO_SIZES])
+def test_remove_solve(ao_sizes: tuple[int, ...]) -> None:
+    solves: list[Solve] = _generate_solves(20)
+
+    async def scenario(
+        widget: StatsWidget, check: Callable[[list[Solve]], Awaitable[None]]
+    ) -> None:
+        remaining: list[Solve] = list(solves)
+
+        # 途中、最新、最古のソルブを削除する。 (削除した行より上の番号と ao N も変わる)
+        for solve_id in (6, 20, 1, 12):
+            widget.remove_solve(solve_id)
+            remaining = [solve for solve in remaining if solve[0] != solve_id]
+            await check(remaining)
+
+    _run(ao_sizes, solves, scenario)
+
+
+def test_update_penalty() -> None:
+    solves: list[Solve] = _generate_solves(20)
+
+    async def scenario(
+        widget: StatsWidget, check: Callable[[list[Solve]], Awaitable[None]]
+    ) -> None:
+        current: list[Solve] = list(solves)
+
+        for solve_id, penalty in ((10, "dnf"), (10, "plus_2"), (7, ""), (1, "dnf"), (20, "")):
+            widget.update_penalty(solve_id, penalty)
+            current = [
+                (id, time, penalty if id == solve_id else solve_penalty)
+                for id, time, solve_penalty in current
+            ]
+            await check(current)
+
+    _run(AO_SIZES, solves, scenario)
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> Iterator[Database]:
+    db: Database = Database(tmp_path / "sctt_pytest.db", AO_SIZES)
+    yield db
+    db.close()
+
+
+def test_update_stats(db: Database) -> None:
+    session_id: int | None = db.create_session("s")
+
+    if session_id is None:
+        raise ValueError
+
+    for _, time, penalty in _generate_solves(20):
+        db.add_solve("3x3x3", time, "", session_id, penalty)
+
+    solve_ids: list[int] = [solve[0] for solve in db.get_all_solves(session_id)]
+    db.remove_solve(solve_ids[5], session_id)
+    db.change_solve_penalty("dnf", solve_ids[8])
+
+    async def scenario(
+        widget: StatsWidget, check: Callable[[list[Solve]], Awaitable[None]]
+    ) -> None:
+        widget.update_stats(db.get_solve_stats(session_id))
+        await check([row[:3] for row in db.get_solve_stats(session_id)])
+
+    _run(AO_SIZES, _generate_solves(3), scenario)
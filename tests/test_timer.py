@@ -18,8 +18,8 @@ def test_on_press_to_waiting_for_start(monkeypatch: MonkeyPatch) -> None:
     """STOPPED 状態から on_press で WAITING_FOR_START に移行"""
 
     timer: Timer = Timer()
-    fake_time: float = 100.0  # 正規化された時間
-    monkeypatch.setattr(time, "perf_counter", lambda: fake_time)
+    fake_time: int = 100_000_000_000  # 正規化された時間 (ナノ秒)
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: fake_time)
 
     timer.on_press()
 
@@ -30,14 +30,16 @@ def test_on_press_to_ready_to_start(monkeypatch: MonkeyPatch) -> None:
     """WAITING_FOR_START で持続時間が満たされた場合"""
 
     timer: Timer = Timer()
-    monkeypatch.setattr(time, "perf_counter", lambda: 0.0)
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: 0)
 
     timer.on_press()
 
     assert timer.state == TimerState.WAITING_FOR_START
 
     # 持続時間が waiting_time を超える
-    monkeypatch.setattr(time, "perf_counter", lambda: timer.waiting_time + 0.1)
+    monkeypatch.setattr(
+        time, "perf_counter_ns", lambda: round((timer.waiting_time + 0.1) * 1e9)
+    )
     timer.on_press()
 
     assert timer.state == TimerState.READY_TO_START
@@ -47,49 +49,105 @@ def test_on_release_to_running(monkeypatch: MonkeyPatch) -> None:
     """READY_TO_START の状態から on_release で RUNNING に移行"""
 
     timer: Timer = Timer()
-    monkeypatch.setattr(time, "perf_counter", lambda: 0.0)
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: 0)
 
     timer.on_press()
     timer.state = TimerState.READY_TO_START  # ダイレクトにREADY_TO_STARTにする
 
-    fake_start_time: float = 50.0
-    monkeypatch.setattr(time, "perf_counter", lambda: fake_start_time)
+    fake_start_time: int = 50_000_000_000
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: fake_start_time)
     timer.on_release()
 
     assert timer.state == TimerState.RUNNING
-    assert timer._start_time == fake_start_time
+    assert timer._start_time_ns == fake_start_time
 
 
 def test_calculate_elapsed_time_running(monkeypatch: MonkeyPatch) -> None:
     """RUNNING の状態での経過時間の計算"""
 
     timer: Timer = Timer()
-    start_time: float = 100.0
-    monkeypatch.setattr(time, "perf_counter", lambda: start_time)
+    start_time: int = 100_000_000_000
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: start_time)
     timer.state = TimerState.RUNNING
-    timer._start_time = start_time
+    timer._start_time_ns = start_time
 
     # 5秒経過
-    monkeypatch.setattr(time, "perf_counter", lambda: start_time + 5)
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: start_time + 5_000_000_000)
 
     assert timer.elapsed_time == 5.0
+    assert timer.elapsed_time_ns == 5_000_000_000
 
 
 def test_calculate_elapsed_time_maximum(monkeypatch: MonkeyPatch) -> None:
     """経過時間が MAXIMUM_TIME を超えないか確認"""
 
     timer: Timer = Timer()
-    start_time: float = 100.0
-    monkeypatch.setattr(time, "perf_counter", lambda: start_time)
+    start_time: int = 100_000_000_000
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: start_time)
     timer.state = TimerState.RUNNING
-    timer._start_time = start_time
+    timer._start_time_ns = start_time
 
     # 最大値+10秒経過
-    monkeypatch.setattr(time, "perf_counter", lambda: start_time + Timer.MAXIMUM_TIME + 10)
+    monkeypatch.setattr(
+        time, "perf_counter_ns", lambda: start_time + Timer.MAXIMUM_TIME_NS + 10_000_000_000
+    )
 
     assert timer.elapsed_time == Timer.MAXIMUM_TIME
 
 
+def test_event_timestamps(monkeypatch: MonkeyPatch) -> None:
+    """渡したイベントの時刻でタイムが決まり、処理までの遅れが記録されることを確認"""
+
+    timer: Timer = Timer()
+    # イベントはすべて 1 秒遅れて処理される
+    delay: int = 1_000_000_000
+    now: int = 0
+
+    def press(timestamp_ns: int) -> None:
+        nonlocal now
+        now = timestamp_ns + delay
+        timer.on_press(timestamp_ns)
+
+    def release(timestamp_ns: int) -> None:
+        nonlocal now
+        now = timestamp_ns + delay
+        timer.on_release(timestamp_ns)
+
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: now)
+
+    press(0)
+    press(400_000_000)
+
+    assert timer.state == TimerState.READY_TO_START
+
+    release(500_000_000)
+
+    assert timer.state == TimerState.RUNNING
+
+    press(12_845_678_901)
+
+    assert timer.state == TimerState.STOPPED
+    assert timer.elapsed_time_ns == 12_345_678_901
+    assert timer.last_event_latency_ns == delay
+
+    # 時刻を渡さなかった場合は呼んだ時刻になる
+    timer.on_release()
+
+    assert timer.last_event_latency_ns == 0
+
+
+def test_elapsed_time_is_fixed_at_stop(monkeypatch: MonkeyPatch) -> None:
+    """止めたあとは経過時間が変わらないことを確認"""
+
+    timer: Timer = Timer()
+    timer.state = TimerState.RUNNING
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: 7_000_000_000)
+    timer.on_press()
+    monkeypatch.setattr(time, "perf_counter_ns", lambda: 9_000_000_000)
+
+    assert timer.elapsed_time_ns == 7_000_000_000
+
+
 def test_format_time() -> None:
     """format_time メソッドのフォーマット確認"""
 
@@ -0,0 +1,207 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from sctt.modules.simulate import Cube
+from sctt.modules.two_phase import (
+    FACE_CUBES,
+    MAX_LENGTH,
+    MOVE_CUBES,
+    MOVES,
+    N_FLIP,
+    N_PHASE2_MOVES,
+    N_SLICE,
+    N_SLICE_PERM,
+    N_TWIST,
+    PHASE2_MOVES,
+    SOLVED,
+    TABLE_LAYOUT,
+    CubieCube,
+    TwoPhaseSolver,
+    TwoPhaseTables,
+    _build_move_table,
+    _build_permutation_move_table,
+    _build_pruning_table,
+    _flip_cube,
+    _get_parity,
+    _slice_cube,
+    _twist_cube,
+    generate_random_cube,
+    generate_random_state_scramble,
+    get_flip,
+    get_slice,
+    get_tables_file,
+    get_twist,
+    invert_moves,
+)
+
+
+@pytest.fixture(scope="module")
+def solver() -> TwoPhaseSolver:
+    """移動表は本物で、枝刈り表がすべて 0 のソルバー
+
+    枝刈り表が無くても (反復深化の深さ優先探索になるだけで) 解は正しいので、短い手順だけを解かせる。
+    """
+
+    all_moves: range = range(len(MOVES))
+    tables: TwoPhaseTables = TwoPhaseTables(
+        twist_move=_build_move_table(N_TWIST, _twist_cube, get_twist, all_moves),
+        flip_move=_build_move_table(N_FLIP, _flip_cube, get_flip, all_moves),
+        slice_move=_build_move_table(N_SLICE, _slice_cube, get_slice, all_moves),
+        corners_move=_build_permutation_move_table(8, lambda cube: cube.cp, PHASE2_MOVES),
+        ud_edges_move=_build_permutation_move_table(8, lambda cube: cube.ep[:8], PHASE2_MOVES),
+        slice_perm_move=_build_permutation_move_table(
+            4, lambda cube: [edge - 8 for edge in cube.ep[8:]], PHASE2_MOVES
+        ),
+        slice_twist_prune=bytes(N_SLICE * N_TWIST),
+        slice_flip_prune=bytes(N_SLICE * N_FLIP),
+        corners_slice_prune=bytes(40320 * N_SLICE_PERM),
+        ud_edges_slice_prune=bytes(40320 * N_SLICE_PERM),
+    )
+    return TwoPhaseSolver(tables, max_length=4)
+
+
+def _apply_moves(moves: list[str]) -> CubieCube:
+    cube: CubieCube = SOLVED
+
+    for move in moves:
+        cube = cube.multiply(MOVE_CUBES[MOVES.index(move)])
+
+    return cube
+
+
+def test_face_cubes() -> None:
+    for face_cube in FACE_CUBES:
+        cube: CubieCube = SOLVED
+
+        for _ in range(4):
+            cube = cube.multiply(face_cube)
+
+        assert cube == SOLVED, "4 回まわすと元に戻るべき"
+
+
+def test_coordinates() -> None:
+    for coordinate in (0, 1, 1000, N_TWIST - 1):
+        assert get_twist(_twist_cube(coordinate)) == coordinate
+
+    for coordinate in (0, 1, 1000, N_FLIP - 1):
+        assert get_flip(_flip_cube(coordinate)) == coordinate
+
+    for coordinate in (0, 1, 300, N_SLICE - 1):
+        assert get_slice(_slice_cube(coordinate)) == coordinate
+
+
+def test_solve(solver: TwoPhaseSolver) -> None:
+    """解をシミュレーターで適用して、キューブが揃うことを確認する"""
+
+    rng: random.Random = random.Random(0)
+    solved_state: bytes = Cube(3).state
+
+    for _ in range(10):
+        scramble: list[str] = [rng.choice(MOVES) for _ in range(3)]
+        solution: list[str] = solver.solve(_apply_moves(scramble))
+        cube: Cube = Cube(3)
+        cube.apply_scramble(" ".join(scramble + solution))
+
+        assert len(solution) <= solver.max_length
+        assert cube.state == solved_state
+
+    assert solver.solve(SOLVED) == []
+    assert solver.solve(_apply_moves(["R", "U", "F2"])) == ["F2", "U'", "R'"]
+
+
+def test_solve_too_long(solver: TwoPhaseSolver) -> None:
+    with pytest.raises(ValueError):
+        TwoPhaseSolver(solver.tables, max_length=1).solve(_apply_moves(["R", "U"]))
+
+
+@pytest.mark.slow
+def test_solve_with_tables(two_phase_tables_dir: Path) -> None:
+    """本物の表で、ランダムな状態を MAX_LENGTH 手以内で解けることを確認する"""
+
+    tables: TwoPhaseTables | None = TwoPhaseTables.load(two_phase_tables_dir)
+
+    assert tables is not None
+
+    solver: TwoPhaseSolver = TwoPhaseSolver(tables)
+    rng: random.Random = random.Random(0)
+    solved_state: bytes = Cube(3).state
+
+    for _ in range(5):
+        cube: CubieCube = generate_random_cube(rng)
+        solution: list[str] = solver.solve(cube)
+
+        assert len(solution) <= MAX_LENGTH
+
+        for move in solution:
+            cube = cube.multiply(MOVE_CUBES[MOVES.index(move)])
+
+        assert cube == SOLVED
+
+    # ランダムな回転記号のスクランブルの解を、シミュレーターで確かめる。
+    for _ in range(3):
+        scramble: list[str] = [rng.choice(MOVES) for _ in range(25)]
+        solution = solver.solve(_apply_moves(scramble))
+        simulated_cube: Cube = Cube(3)
+        simulated_cube.apply_scramble(" ".join(scramble + solution))
+
+        assert len(solution) <= MAX_LENGTH
+        assert simulated_cube.state == solved_state
+
+    random_state_scramble: list[str] = generate_random_state_scramble(solver, rng).split()
+
+    assert len(random_state_scramble) <= MAX_LENGTH
+    assert set(random_state_scramble) <= set(MOVES)
+
+
+def test_build_pruning_table() -> None:
+    """E 層のエッジの並びだけを揃える手数の表を作る"""
+
+    slice_perm_move = _build_permutation_move_table(
+        4, lambda cube: [edge - 8 for edge in cube.ep[8:]], PHASE2_MOVES
+    )
+    table: bytearray = _build_pruning_table(
+        slice_perm_move, 1, bytes(N_PHASE2_MOVES), N_PHASE2_MOVES
+    )
+
+    assert len(table) == N_SLICE_PERM
+    assert table[0] == 0
+    assert 0xFF not in table, "すべての状態に手数が入るべき"
+    assert table[slice_perm_move[PHASE2_MOVES.index(MOVES.index("R2"))]] == 1
+    assert table.count(1) == 4, "R2, F2, L2, B2 の 4 つ"
+
+
+def test_generate_random_cube() -> None:
+    rng: random.Random = random.Random(0)
+
+    for _ in range(100):
+        cube: CubieCube = generate_random_cube(rng)
+
+        assert sorted(cube.cp) == list(range(8))
+        assert sorted(cube.ep) == list(range(12))
+        assert _get_parity(cube.cp) == _get_parity(cube.ep)
+        assert sum(cube.co) % 3 == 0
+        assert sum(cube.eo) % 2 == 0
+
+
+def test_invert_moves() -> None:
+    assert invert_moves(["R", "U2", "F'"]) == ["F", "U2", "R'"]
+
+
+def test_load_tables(tmp_path: Path) -> None:
+    assert TwoPhaseTables.load(tmp_path) is None
+
+    size: int = sum(
+        length * (2 if typecode == "H" else 1) for _, typecode, length in TABLE_LAYOUT
+    )
+    get_tables_file(tmp_path).write_bytes(bytes(size - 1))
+
+    assert TwoPhaseTables.load(tmp_path) is None, "大きさが違うファイルは読み込まないべき"
+
+    get_tables_file(tmp_path).write_bytes(bytes(size))
+    tables: TwoPhaseTables | None = TwoPhaseTables.load(tmp_path)
+
+    assert tables is not None
+    assert len(tables.twist_move) == N_TWIST * len(MOVES)
+    assert tables.slice_twist_prune[N_SLICE * N_TWIST - 1] == 0
@@ -0,0 +1,215 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import pytest
+from rich.text import Text
+from textual import on
+from textual.app import App, ComposeResult
+from textual.coordinate import Coordinate
+from textual.pilot import Pilot
+from textual.widgets.data_table import CellKey, ColumnKey, RowKey
+
+from sctt.widgets.virtual_data_table import VirtualDataTable
+
+# 表示できる行数 (見出しの 1 行を除く)
+HEIGHT: int = 10
+ROW_COUNT: int = 1000
+
+
+class ListTable(VirtualDataTable):
+    """行のデータをリストで持つ表。 create_row を呼んだ行を記録する。"""
+
+    def __init__(self, rows: list[list[str]]) -> None:
+        super().__init__()
+        self.rows: list[list[str]] = rows
+        self.created_rows: list[int] = []
+
+    def on_mount(self) -> None:
+        self.add_columns(("a", "a"), ("b", "b"))
+
+    def get_row_count(self) -> int:
+        return len(self.rows)
+
+    def get_row_key(self, row_index: int) -> str:
+        return str(row_index * 10)
+
+    def get_row_index(self, row_key: str) -> int:
+        row_index, remainder = divmod(int(row_key), 10)
+
+        if remainder or not 0 <= row_index < len(self.rows):
+            raise KeyError(row_key)
+
+        return row_index
+
+    def create_row(self, row_index: int) -> list[Text]:
+        self.created_rows.append(row_index)
+        return [Text(cell) for cell in self.rows[row_index]]
+
+    def get_column_content_widths(self) -> list[int]:
+        return [max((len(row[i]) for row in self.rows), default=0) for i in range(2)]
+
+
+class TableApp(App[None]):
+    def __init__(self, rows: list[list[str]]) -> None:
+        super().__init__()
+        self.rows: list[list[str]] = rows
+        self.selected: list[VirtualDataTable.CellSelected] = []
+
+    def compose(self) -> ComposeResult:
+        yield ListTable(self.rows)
+
+    @on(VirtualDataTable.CellSelected)
+    def record_selected(self, event: VirtualDataTable.CellSelected) -> None:
+        self.selected.append(event)
+
+
+def _run(test: Callable[[Pilot[None], ListTable], Awaitable[None]]) -> None:
+    async def run() -> None:
+        app: TableApp = TableApp([[f"a{i}", f"b{i}"] for i in range(ROW_COUNT)])
+
+        async with app.run_test(size=(40, HEIGHT + 1)) as pilot:
+            table: ListTable = app.query_one(ListTable)
+            table.focus()
+            await pilot.pause()
+            await test(pilot, table)
+
+    asyncio.run(run())
+
+
+def _get_lines(table: ListTable) -> list[list[str]]:
+    return [table.render_line(y).text.split() for y in range(table.size.height)]
+
+
+def test_not_implemented() -> None:
+    """行のデータのメソッドはサブクラスで実装する"""
+
+    table: VirtualDataTable = VirtualDataTable()
+
+    with pytest.raises(NotImplementedError):
+        table.get_row_count()
+
+    with pytest.raises(NotImplementedError):
+        table.create_row(0)
+
+
+def test_render() -> None:
+    async def test(pilot: Pilot[None], table: ListTable) -> None:
+        assert table.size.height == HEIGHT + 1
+        assert _get_lines(table) == [["a", "b"]] + [[f"a{i}", f"b{i}"] for i in range(HEIGHT)]
+        assert max(table.created_rows) < HEIGHT + table.OVERSCAN, "見えている行だけを作るべき"
+
+        table.action_scroll_bottom()
+        await pilot.pause()
+
+        assert _get_lines(table)[-1] == [f"a{ROW_COUNT - 1}", f"b{ROW_COUNT - 1}"]
+        assert len(table._row_cells) <= HEIGHT + 1 + 2 * table.OVERSCAN, (
+            "見えている範囲から離れた行のセルは捨てるべき"
+        )
+        assert len(set(table.created_rows)) < 2 * (HEIGHT + table.OVERSCAN)
+
+    _run(test)
+
+
+def test_refresh_rows() -> None:
+    async def test(pilot: Pilot[None], table: ListTable) -> None:
+        table.rows[2] = ["x", "y"]
+        table.rows[5] = ["x", "y"]
+        await pilot.pause()
+
+        assert _get_lines(table)[3] == ["a2", "b2"], (
+            "refresh_rows を呼ぶまではキャッシュを使うべき"
+        )
+
+        table.refresh_rows(range(2, 3))
+        await pilot.pause()
+        lines: list[list[str]] = _get_lines(table)
+
+        assert lines[3] == ["x", "y"]
+        assert lines[6] == ["a5", "b5"], "範囲外の行はキャッシュを使うべき"
+
+        table.refresh_rows()
+        await pilot.pause()
+
+        assert _get_lines(table)[6] == ["x", "y"]
+
+        # 行を追加すると、仮想的な大きさと列の幅が変わる。
+        table.rows.insert(0, ["a" * 20, "b"])
+        table.refresh_rows()
+        await pilot.pause()
+
+        assert table.row_count == ROW_COUNT + 1
+        assert table.virtual_size.height == ROW_COUNT + 2
+        assert table.virtual_size.width == 20 + len(f"b{ROW_COUNT - 1}") + 4
+        assert _get_lines(table)[1:3] == [["a" * 20, "b"], ["a0", "b0"]]
+
+    _run(test)
+
+
+def test_cursor() -> None:
+    async def test(pilot: Pilot[None], table: ListTable) -> None:
+        await pilot.press("down", "down", "right")
+
+        assert table.cursor_coordinate == Coordinate(2, 1)
+
+        await pilot.press("right", "up", "up", "up")
+
+        assert table.cursor_coordinate == Coordinate(0, 1), "表の外には出ないべき"
+
+        await pilot.press("pagedown")
+
+        assert table.cursor_coordinate.row == HEIGHT
+
+        await pilot.press("G", "home")
+        await pilot.pause()
+
+        assert table.cursor_coordinate == Coordinate(ROW_COUNT - 1, 0)
+        assert table.scroll_y == ROW_COUNT - HEIGHT, "カーソルの行までスクロールするべき"
+
+        await pilot.press("g", "end")
+        await pilot.pause()
+
+        assert table.cursor_coordinate == Coordinate(0, 1)
+        assert table.scroll_y == 0
+
+        # 行が減ったら、カーソルは表の中に戻る。
+        table.move_cursor(row=ROW_COUNT - 1)
+        del table.rows[10:]
+        table.refresh_rows()
+
+        assert table.cursor_coordinate == Coordinate(9, 1)
+
+    _run(test)
+
+
+def test_cell_selected() -> None:
+    async def test(pilot: Pilot[None], table: ListTable) -> None:
+        app: TableApp = pilot.app  # type: ignore[assignment]
+        await pilot.press("down", "right", "enter")
+        # 見出しの行は選択できない。
+        await pilot.click(ListTable, offset=(2, 0))
+        await pilot.click(ListTable, offset=(2, 4))
+
+        assert [
+            (event.value.plain, event.coordinate, event.cell_key, event.control)
+            for event in app.selected
+        ] == [
+            ("b1", Coordinate(1, 1), CellKey(RowKey("10"), ColumnKey("b")), table),
+            ("a3", Coordinate(3, 0), CellKey(RowKey("30"), ColumnKey("a")), table),
+        ]
+        assert table.cursor_coordinate == Coordinate(3, 0)
+
+    _run(test)
+
+
+def test_get_cell() -> None:
+    async def test(pilot: Pilot[None], table: ListTable) -> None:
+        assert table.get_cell("30", "b").plain == "b3"
+        assert table.get_cell(RowKey("9990"), ColumnKey("a")).plain == f"a{ROW_COUNT - 1}"
+
+        with pytest.raises(KeyError):
+            table.get_cell("31", "a")
+
+        with pytest.raises(KeyError):
+            table.get_cell(RowKey(None), "a")
+
+    _run(test)